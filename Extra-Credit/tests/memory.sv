@@ -34,7 +34,7 @@ module memory(data_out, data_in, addr, enable, wr, clk, rst, data_valid);
 
     // Instantiate the memory model structure
     logic [15:0] mem_addr [0:65535]; 
-    logic [15:0] data_mem [0:65535];
+    logic [15:0] data_mem [0:65535] = '{default: 16'h0000};  // Zeroed, as the image may only hold the populated regions
 
 
     /////////////////////////////////////////////////////////////////////////////
@@ -43,6 +43,7 @@ module memory1c (data_out, data_in, data, addr, enable, wr, clk, rst);
    
    reg [15:0]      mem [0:2**ADDR_WIDTH-1];
    reg            loaded;
+   reg [ADDR_WIDTH:0] i;
    
    assign         data_out = (enable & (~wr))? {mem[addr[ADDR_WIDTH-1 :1]]}: 0; //Read
    initial begin
@@ -53,6 +54,9 @@ module memory1c (data_out, data_in, data, addr, enable, wr, clk, rst);
       if (rst) begin
          //load loadfile_all.img
          if (!loaded) begin
+            // Zero the memory, as the image may only hold the populated regions.
+            for (i = 0; i < 2**ADDR_WIDTH; i = i + 1)
+               mem[i] = 0;
             if (data)
               $readmemh("./tests/data.img", mem);
             else
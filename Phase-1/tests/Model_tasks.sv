@@ -26,7 +26,8 @@ package Model_tasks;
   // Task to load an image file into memory.
   task automatic LoadImage(input string filename, ref logic [15:0] memory [0:65535]);
     begin
-      // Use $readmemh to load the file contents into memory
+      // Zero the words not in the image, then use $readmemh to load the file contents into memory
+      memory = '{default: 16'h0000};
       $readmemh(filename, memory);
     end
   endtask
@@ -22,7 +22,7 @@ module cpu_model (clk, rst_n, hlt, pc);
   // Signals for the PC and instruction memory
   logic [15:0] nxt_pc;             // Next PC address
   logic [15:0] pc_inst;            // Instruction at the current PC address
-  logic [15:0] inst_mem [0:65535]; // Instruction memory (read-only)
+  logic [15:0] inst_mem [0:65535] = '{default: 16'h0000}; // Instruction memory (read-only), zeroed as the image may only hold the populated regions
 
   // Signals from the decoded instruction
   logic [3:0] opcode;     // opcode of the instruction
@@ -29,7 +29,7 @@ module Fetch_model (
   logic predicted_taken;            // The predicted value of the current instruction.
   logic enable;                     // Enables the reads/writes for PC, instruction memory, and BHT, BTB.
   logic hlt_fetched;                // Indicates if the fetched instruction is a halt instruction.
-  logic [15:0] inst_mem [0:65535];  // Models the instruction memory.
+  logic [15:0] inst_mem [0:65535] = '{default: 16'h0000};  // Models the instruction memory, zeroed as the image may only hold the populated regions.
   logic [15:0] PC_target;           // The target address of the branch instruction from the BTB or the next PC.
   logic [15:0] PC_new;              // The PC is updated with the current PC if HLT is fetched, or the target address otherwise.
   logic [15:0] PC_update;           // The address to update the PC with.
@@ -40,6 +40,7 @@ module memory4c (data_out, data_in, addr, enable, wr, clk, rst, data_valid);
 
    reg [15:0]      mem [0:2**ADDR_WIDTH-1];
    reg            loaded;
+   reg [ADDR_WIDTH:0] i;
 
    assign         data_out_4 = (enable & (~wr))? {mem[addr[ADDR_WIDTH-1 :1]]}: 0; //Read
    assign	     data_valid_4 = (enable & (~wr));
@@ -50,6 +51,9 @@ module memory4c (data_out, data_in, addr, enable, wr, clk, rst, data_valid);
       if (rst) begin
          //load loadfile_all.img
          if (!loaded) begin
+            // Zero the memory, as the image may only hold the populated regions.
+            for (i = 0; i < 2**ADDR_WIDTH; i = i + 1)
+               mem[i] = 0;
             $readmemh("./tests/loadfile_all.img", mem);
             loaded = 1;
          end
@@ -0,0 +1,514 @@
+import os
+import re
+import sys
+import shutil
+import hashlib
+import argparse
+import threading
+
+# Constants for directory paths.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+TEST_PROGRAMS_DIR = os.path.join(ROOT_DIR, "TestPrograms")
+IMAGE_CACHE_DIR = os.path.join(ROOT_DIR, ".image_cache")
+
+# Number of 16-bit words in a full memory image.
+MEM_WORDS = 65536
+
+# Shortest run of zero words left out of a sparse image, as an `@addr` record costs about as much as one word.
+MIN_ZERO_RUN = 2
+
+# Version of the assembler output, part of the image cache key so a change to the assembler invalidates the cache.
+ASSEMBLER_VERSION = 2
+
+# Register encodings.
+REGS = {f"R{n}": format(n, "04b") for n in range(16)}
+
+# Number of arguments and opcode of each instruction.
+NUM_ARGS = {
+    "ADD": 3, "SUB": 3, "PADDSB": 3, "XOR": 3, "SLL": 3, "SRA": 3, "ROR": 3, "RED": 3,
+    "LW": 3, "SW": 3, "LLB": 2, "LHB": 2, "B": 2, "BR": 2, "PCS": 1, "HLT": 0,
+}
+OPCODES = {
+    "ADD": "0000", "SUB": "0001", "XOR": "0010", "RED": "0011", "SLL": "0100", "SRA": "0101", "ROR": "0110", "PADDSB": "0111",
+    "LW": "1000", "SW": "1001", "LLB": "1010", "LHB": "1011", "B": "1100", "BR": "1101", "PCS": "1110", "HLT": "1111",
+}
+
+# Regular expression for the leading number of a decimal operand, as Perl converts strings to numbers.
+DECIMAL_PATTERN = re.compile(r'\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)')
+
+# Regular expression for the placeholder of a branch target, resolved once all labels are known.
+LABEL_REF_PATTERN = re.compile(r'\|(.+)\|(\d+)\|(\w)\|')
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for the assembler.
+
+    Arguments:
+        - 'program' is the WISC-S25 assembly file (.list/.s) to assemble.
+        - The '-a' flag assembles every program in the TestPrograms directory instead.
+        - The '-o' flag writes the memory image of the program to the given file.
+        - The '-p' flag writes the padded image of all MEM_WORDS words instead of a sparse image.
+        - The '-c' flag checks the images are equivalent to the padded images of the programs.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Assemble WISC-S25 programs into memory images.")
+
+    # The program to assemble.
+    parser.add_argument("program", nargs="?", help="WISC-S25 assembly file (.list/.s) to assemble.")
+
+    # Flag to assemble every program in the TestPrograms directory.
+    parser.add_argument("-a", "--all", action="store_true", help="Assemble all programs in the TestPrograms directory into the image cache.")
+
+    # File to write the memory image to.
+    parser.add_argument("-o", "--outfile", help="Memory image to write (default: print the assembled words).")
+
+    # Flag to write padded images.
+    parser.add_argument("-p", "--padded", action="store_true", help="Write the padded image of all 65536 words instead of a sparse image.")
+
+    # Flag to check the images.
+    parser.add_argument("-c", "--check", action="store_true", help="Check the images are equivalent to the padded images of the programs.")
+
+    # Parse and return the arguments.
+    return parser.parse_args()
+
+
+def perl_hex(value):
+    """
+    Convert a string to a number the way Perl's `hex` does.
+
+    Args:
+        value (str): The hex string, with or without a `0x` prefix.
+
+    Returns:
+        int: The value of the leading hex digits, or 0 if there are none.
+    """
+    value = re.sub(r'^0?[xX]', '', value)
+    digits = re.match(r'[0-9a-fA-F_]*', value).group(0).replace("_", "")
+    return int(digits, 16) if digits else 0
+
+
+def perl_number(value):
+    """
+    Convert a string to an integer the way Perl numifies it for `sprintf("%b")`.
+
+    Args:
+        value (str): The decimal string.
+
+    Returns:
+        int: The value of the leading decimal number truncated towards zero, or 0 if there is none.
+    """
+    match = DECIMAL_PATTERN.match(value)
+    return int(float(match.group(1))) if match else 0
+
+
+def dec_to_bin(value, width):
+    """
+    Format a number as a two's complement binary string of the given width.
+
+    Args:
+        value (int): The number to format.
+        width (int): The number of bits, keeping the least significant ones.
+
+    Returns:
+        str: The binary string.
+    """
+    return format(value & ((1 << width) - 1), f"0{width}b")
+
+
+def parse_immediate(value, width):
+    """
+    Parse an immediate operand, in hex if it is prefixed with `0x`, otherwise in decimal.
+
+    Args:
+        value (str): The operand.
+        width (int): The number of bits of the immediate field.
+
+    Returns:
+        str: The immediate field as a binary string.
+    """
+    if re.match(r'0x', value, re.IGNORECASE):
+        return dec_to_bin(perl_hex(value[2:]), width)
+    return dec_to_bin(perl_number(value), width)
+
+
+def register(name, line):
+    """
+    Encode a register operand.
+
+    Args:
+        name (str): The register name, e.g. `R3`.
+        line (str): The source line, for the error message.
+
+    Returns:
+        str: The register field as a binary string.
+
+    Raises:
+        ValueError: If the register does not exist.
+    """
+    if name not in REGS:
+        raise ValueError(f"Bad register ({name})\n{line}")
+    return REGS[name]
+
+
+def assemble_source(lines):
+    """
+    Assemble WISC-S25 assembly source into machine words, accepting the same syntax as `assembler.pl`.
+
+    Labels must start with L, immediates are decimal or `0x` prefixed hex, comments start with `#`
+    or `//`, and `MEM <addr>` / `DATA <value>` place data words. The words are returned in address
+    order with unused addresses left out, exactly as `assembler.pl` prints them.
+
+    Args:
+        lines (iterable): The lines of the assembly source.
+
+    Returns:
+        list: The assembled 16-bit words.
+
+    Raises:
+        ValueError: If the source has an unknown instruction, a bad operand or an undefined label.
+    """
+    labels = {}
+    mem = {}
+    addr = 0
+
+    for line in lines:
+        # Remove comments and skip blank lines.
+        line = re.sub(r'#(.*)$', '', line, count=1)
+        line = re.sub(r'//(.*)$', '', line, count=1)
+        if re.match(r'\s*$', line):
+            continue
+
+        # Memory directives set the address or place a data word.
+        match = re.search(r'MEM\s+(\S*)', line)
+        if match:
+            addr = perl_hex(match.group(1))
+            continue
+        match = re.search(r'DATA\s+(.*)', line)
+        if match:
+            data = re.sub(r'\s*(\S+)\s*', r'\1', match.group(1), count=1).rjust(4, "0")
+            mem[addr] = dec_to_bin(perl_hex(data), 16)
+            addr += 1
+            continue
+
+        line = line.upper()
+
+        # Capture labels.
+        match = re.match(r'(.*):', line)
+        if match:
+            labels[re.sub(r'\s*(\S+)\s*', r'\1', match.group(1), count=1)] = addr
+            line = line[match.end():]
+
+        match = re.match(r'\s*(\S+)\s*(.*)', line)
+        if not match:
+            continue
+        instr = match.group(1)
+
+        # Split the arguments on commas, dropping trailing empty ones, and strip single word arguments.
+        args = match.group(2).split(",")
+        while args and args[-1] == "":
+            args.pop()
+        args = [re.sub(r'^\s*(\S+)\s*$', r'\1', arg, count=1) for arg in args]
+
+        if instr not in NUM_ARGS:
+            raise ValueError(f"Unknown instruction\n{line}")
+        if NUM_ARGS[instr] != len(args):
+            raise ValueError(f"Error:\n{line}\nWrong number of arguments (need {NUM_ARGS[instr]} args)")
+
+        bits = OPCODES[instr]
+        if instr in ("RED", "XOR", "PADDSB", "ADD", "SUB"):
+            bits += "".join(register(reg, line) for reg in args[:3])
+        elif instr in ("SRA", "SLL", "ROR", "LW", "SW"):
+            bits += "".join(register(reg, line) for reg in args[:2]) + dec_to_bin(perl_number(args[2]), 4)
+        elif instr in ("LLB", "LHB"):
+            bits += register(args[0], line) + parse_immediate(args[1], 8)
+        elif instr == "BR":
+            if re.search(r'[a-zA-Z]', args[0]):
+                raise ValueError(f"Control letters not yet supported\n{line}")
+            bits += args[0] + "0" + register(args[1], line) + "0000"
+        elif instr == "B":
+            if re.search(r'[a-zA-Z]', args[0]):
+                raise ValueError(f"Control letters not yet supported\n{line}")
+            if not re.search(r'[a-zA-Z]', args[1]):
+                raise ValueError(f"Error: Invalid label name: \"{args[1]}\"")
+            bits += args[0] + f"|{args[1]}|9|B|"
+        elif instr == "PCS":
+            bits += register(args[0], line) + "00000000"
+        else:
+            bits += "000000000000"
+
+        mem[addr] = bits
+        addr += 1
+
+    # Resolve branch targets and convert the words in address order.
+    words = []
+    for i in sorted(mem):
+        bits = mem[i]
+        match = LABEL_REF_PATTERN.search(bits)
+        if match:
+            # A label at address 0 cannot be referenced, as in assembler.pl.
+            if not labels.get(match.group(1)):
+                raise ValueError(f"Error:\nLabel referenced, but doesnt exist ({match.group(1)})")
+            bits = bits[:match.start()] + dec_to_bin(labels[match.group(1)] - i - 1, int(match.group(2))) + bits[match.end():]
+        if not re.fullmatch(r'[01]{16}', bits):
+            raise ValueError(f"Error:\nMalformed instruction at address {i:04x}")
+        words.append(int(bits, 2))
+
+    return words
+
+
+def assemble_file(asm_file):
+    """
+    Assemble a WISC-S25 assembly file into machine words.
+
+    Args:
+        asm_file (str): Path to the WISC-S25 assembly file.
+
+    Returns:
+        list: The assembled 16-bit words (see `assemble_source`).
+    """
+    with open(asm_file, "r") as f:
+        return assemble_source(f)
+
+
+def format_image(words, padded=False):
+    """
+    Format machine words as a `$readmemh` memory image.
+
+    A sparse image holds an `@addr` record for each run of non-zero words and leaves out the runs
+    of zero words between and after them. The memories zero their contents before loading an image,
+    so a sparse image loads the same memory as the padded image while being a fraction of its size.
+
+    Args:
+        words (list): The 16-bit words stored from address 0.
+        padded (bool, optional): Write all MEM_WORDS words, padded with zero words. Defaults to False.
+
+    Returns:
+        str: The image, one 4 digit upper case hex word per line.
+    """
+    if padded:
+        return "".join(f"{word:04X}\n" for word in words) + "0000\n" * (MEM_WORDS - len(words))
+
+    lines = []
+    addr = 0
+    while addr < len(words):
+        # Find the end of the run of zero words at the current address.
+        end = addr
+        while end < len(words) and words[end] == 0:
+            end += 1
+
+        # Leave out the trailing zero words, and runs long enough to be worth a new record.
+        if end == len(words):
+            break
+        if not lines or end - addr >= MIN_ZERO_RUN:
+            lines.append(f"@{end:04X}")
+            addr = end
+
+        lines.append(f"{words[addr]:04X}")
+        addr += 1
+
+    # An all zero program still gets a record, so the image is never empty.
+    if not lines:
+        lines = ["@0000", "0000"]
+
+    return "\n".join(lines) + "\n"
+
+
+def read_image(image_file):
+    """
+    Read a `$readmemh` style memory image into a list of 16-bit words.
+
+    Args:
+        image_file (str): Path to the memory image, one hex word per line with optional `@addr` records.
+
+    Returns:
+        list: A list of MEM_WORDS integers holding the memory contents (unspecified words are 0).
+    """
+    # Start with an all zero memory.
+    memory = [0] * MEM_WORDS
+
+    # Current word address being filled.
+    addr = 0
+
+    with open(image_file, "r") as f:
+        for line in f:
+            # Strip comments and whitespace, skipping empty lines.
+            line = line.split("//", 1)[0].strip()
+            if not line:
+                continue
+
+            # Each line may hold several whitespace separated tokens.
+            for token in line.split():
+                if token.startswith("@"):
+                    # An address record moves the fill pointer.
+                    addr = int(token[1:], 16)
+                else:
+                    # A data record fills the current word and moves to the next one.
+                    memory[addr] = int(token, 16) & 0xFFFF
+                    addr += 1
+
+    return memory
+
+
+def check_image(image_file, words):
+    """
+    Check a memory image loads the same memory as the padded image of the given words.
+
+    Args:
+        image_file (str): Path to the memory image, sparse or padded.
+        words (list): The 16-bit words stored from address 0.
+
+    Returns:
+        list: The word addresses where the image differs from the padded image (empty if equivalent).
+    """
+    padded = words + [0] * (MEM_WORDS - len(words))
+    return [addr for addr, word in enumerate(read_image(image_file)) if word != padded[addr]]
+
+
+def get_cached_image(asm_file, padded=False):
+    """
+    Get the memory image of an assembly file from the image cache, assembling it only if it changed.
+
+    Images are stored in `.image_cache` under the hash of the source, the assembler version and
+    the image format, so an unchanged program is never assembled or written again.
+
+    Args:
+        asm_file (str): Path to the WISC-S25 assembly file.
+        padded (bool, optional): Get the padded image instead of the sparse image. Defaults to False.
+
+    Returns:
+        str: Path to the cached memory image.
+
+    Raises:
+        ValueError: If the program fails to assemble.
+    """
+    with open(asm_file, "rb") as f:
+        source = f.read()
+    key = hashlib.sha1(f"{ASSEMBLER_VERSION}\n{padded}\n".encode() + source).hexdigest()
+    image_file = os.path.join(IMAGE_CACHE_DIR, f"{key}.img")
+    if os.path.exists(image_file):
+        return image_file
+
+    image = format_image(assemble_source(source.decode("utf-8", errors="replace").splitlines(keepends=True)), padded)
+
+    # Write the image atomically, as other tests or runs may be reading the cache.
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    temp_file = f"{image_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_file, "w") as f:
+        f.write(image)
+    os.replace(temp_file, image_file)
+
+    return image_file
+
+
+def install_image(asm_file, image_file, padded=False):
+    """
+    Install the memory image of an assembly file at the given path, e.g. `tests/loadfile_all.img`.
+
+    The image is linked to the cached image (see `get_cached_image`), falling back to a copy when
+    the cache is on another file system, and is left untouched if it already is the cached image.
+
+    Args:
+        asm_file (str): Path to the WISC-S25 assembly file.
+        image_file (str): Path to install the memory image at.
+        padded (bool, optional): Install the padded image instead of the sparse image. Defaults to False.
+
+    Raises:
+        ValueError: If the program fails to assemble.
+    """
+    cached_file = get_cached_image(asm_file, padded)
+    if os.path.exists(image_file) and os.path.samefile(cached_file, image_file):
+        return
+
+    # Replace the image atomically, never writing through an existing link into the cache.
+    temp_file = f"{image_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(cached_file, temp_file)
+    except OSError:
+        shutil.copyfile(cached_file, temp_file)
+    os.replace(temp_file, image_file)
+
+
+def assemble_all(programs_dir=TEST_PROGRAMS_DIR, padded=False):
+    """
+    Assemble every program in a directory into the image cache.
+
+    Args:
+        programs_dir (str, optional): The directory of the programs. Defaults to TestPrograms.
+        padded (bool, optional): Assemble padded images instead of sparse images. Defaults to False.
+
+    Returns:
+        dict: Mapping of each program name (without extension) to its cached memory image.
+
+    Raises:
+        ValueError: If any program fails to assemble.
+    """
+    programs = sorted(f for f in os.listdir(programs_dir) if f.endswith((".list", ".s")))
+    return {os.path.splitext(f)[0]: get_cached_image(os.path.join(programs_dir, f), padded) for f in programs}
+
+
+def report_check(name, image_file, asm_file):
+    """
+    Check a memory image against the padded image of its program and print the result.
+
+    Args:
+        name (str): The name of the program, used in the printed messages.
+        image_file (str): Path to the memory image.
+        asm_file (str): Path to the WISC-S25 assembly file of the image.
+
+    Returns:
+        bool: True if the image is equivalent to the padded image, False otherwise.
+
+    Raises:
+        ValueError: If the program fails to assemble.
+    """
+    mismatches = check_image(image_file, assemble_file(asm_file))
+    if mismatches:
+        print(f"{name}: Image differs from the padded image at {len(mismatches)} word(s), first at @{mismatches[0]:04X}.")
+        return False
+
+    print(f"{name}: Image is equivalent to the padded image.")
+    return True
+
+
+def main():
+    """
+    Main function to assemble one program, or all programs in TestPrograms into the image cache.
+    """
+    args = parse_arguments()
+
+    try:
+        if args.all:
+            images = assemble_all(padded=args.padded)
+            passed = True
+            for program in sorted(f for f in os.listdir(TEST_PROGRAMS_DIR) if f.endswith((".list", ".s"))):
+                name = os.path.splitext(program)[0]
+                if args.check:
+                    passed &= report_check(name, images[name], os.path.join(TEST_PROGRAMS_DIR, program))
+                else:
+                    print(f"{name}: {os.path.relpath(images[name], ROOT_DIR)}")
+            if not passed:
+                sys.exit(1)
+        elif args.program and (args.outfile or args.check):
+            image_file = args.outfile or get_cached_image(args.program, args.padded)
+            if args.outfile:
+                install_image(args.program, args.outfile, args.padded)
+            if args.check and not report_check(os.path.basename(args.program), image_file, args.program):
+                sys.exit(1)
+        elif args.program:
+            for word in assemble_file(args.program):
+                print(f"{word:04X}")
+        else:
+            print("No program given. Pass a program or '-a' to assemble all programs in TestPrograms.")
+            sys.exit(1)
+    except ValueError as e:
+        print(f"\n===== Error assembling file {os.path.basename(args.program or TEST_PROGRAMS_DIR)} =====")
+        print(str(e).replace("\n", " ").strip())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
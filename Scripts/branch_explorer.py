@@ -0,0 +1,429 @@
+import os
+import sys
+import json
+import argparse
+import itertools
+import concurrent.futures
+
+from isa_model import MAX_CYCLES, B, BR, list_programs, load_program, simulate
+from trace_diff import iter_cycles, parse_fields
+
+# Fetch redirect penalty of a mispredicted branch: branches resolve in ID, so one fetched instruction is flushed.
+FLUSH_PENALTY = 1
+
+# The predictor of DynamicBranchPredictor.v: an 8-entry tagged 2-bit BHT and an 8-entry BTB, both indexed by PC[3:1].
+BASELINE = {"bht_entries": 8, "index": "pc", "history": 0, "tagged": True, "counter_bits": 2, "btb_entries": 8}
+
+# Design space swept by default.
+SWEEP = {
+    "bht_entries": [4, 8, 16, 32, 64, 128, 256, 512, 1024],
+    "index": ["pc", "xor"],
+    "history": [0, 2, 4, 6, 8],
+    "tagged": [True, False],
+    "counter_bits": [1, 2, 3],
+    "btb_entries": [4, 8, 16, 32, 64, 128],
+}
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for the branch predictor explorer.
+
+    Arguments:
+        - 'workloads' are the programs (.list/.s/.img, run on the ISA model) or SIMLOG files to replay.
+        - The '-a' flag uses every program in the TestPrograms directory instead.
+        - The '-j' flag sets the number of worker processes evaluating configurations.
+        - The '-n' flag sets the number of best configurations printed.
+        - The '-f' flag sets the cycles lost per misprediction.
+        - The '-o' flag writes the results of every configuration to a JSON file.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Sweep branch predictor configurations over branch streams of WISC-S25 programs.")
+
+    # The workloads to replay.
+    parser.add_argument("workloads", nargs="*", help="Programs (.list/.s/.img) to run on the ISA model, or simulation logs (verilogsim.log).")
+
+    # Flag to use every program in the TestPrograms directory.
+    parser.add_argument("-a", "--all", action="store_true", help="Use all programs in the TestPrograms directory.")
+
+    # Number of worker processes.
+    parser.add_argument("-j", "--jobs", type=int, default=int(os.environ.get("JOBS", os.cpu_count() or 1)), help="Number of worker processes (default: $JOBS or the number of CPUs).")
+
+    # Number of configurations printed.
+    parser.add_argument("-n", "--top", type=int, default=10, help="Number of best configurations to print (default 10).")
+
+    # Cycles lost per misprediction.
+    parser.add_argument("-f", "--flush-penalty", type=int, default=FLUSH_PENALTY, help=f"Cycles lost per misprediction (default {FLUSH_PENALTY}).")
+
+    # File to write every result to.
+    parser.add_argument("-o", "--output", help="JSON file to write the results of every configuration to.")
+
+    # Parse and return the arguments.
+    return parser.parse_args()
+
+
+def model_branches(program_file, max_cycles=MAX_CYCLES):
+    """
+    Extract the branch stream of a program by running it on the ISA model.
+
+    Args:
+        program_file (str): Assembly file or memory image to run.
+        max_cycles (int): The cycle limit of the model.
+
+    Returns:
+        list: One (pc, taken, target) tuple per executed branch, in program order.
+    """
+    records = []
+    simulate(load_program(program_file), None, max_cycles, zero_nop=True, records=records)
+
+    branches = []
+    for k, (pc, inst, *_) in enumerate(records):
+        if inst >> 12 not in (B, BR):
+            continue
+        # A branch is taken when the next instruction is not at PC+2, or it is unconditional.
+        target = records[k + 1][0] if k + 1 < len(records) else (pc + 2) & 0xFFFF
+        taken = target != (pc + 2) & 0xFFFF or (inst >> 9) & 0x7 == 7
+        branches.append((pc, taken, target))
+    return branches
+
+
+def log_branches(log_file):
+    """
+    Extract the branch stream of a program from the fetch PCs of its simulation log.
+
+    Args:
+        log_file (str): Path of the `verilogsim.log` file.
+
+    Returns:
+        list: One (pc, taken, target) tuple per executed branch, in program order.
+
+    Description:
+        - Cycles repeating the PC of the cycle before are stalls, and are merged into one fetch.
+        - In a single cycle (Phase-1) log every fetch executes. In a pipelined log a branch resolves in ID,
+          so a redirect that does not directly follow a fetched branch flushes the fetch before it. A redirect
+          directly after a fetched branch is still a flush if that branch was fetched on the wrong path of
+          the branch before it, i.e. the redirect goes where the branch before it falls through or jumps.
+        - The branches are then those of the executed path, taken if the next executed PC is not PC+2.
+    """
+    fetches = []
+    pipelined = None
+    for _, _, tokens in iter_cycles(log_file):
+        fields = dict(parse_fields(tokens))
+        if pipelined is None:
+            # The single cycle testbench logs no M: data out column.
+            pipelined = "M.data_out" in fields
+        try:
+            pc, inst = int(fields["PC"], 16), int(fields["I"], 16)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if fetches and fetches[-1][0] == pc:
+            # A stall, keeping the instruction once it is fetched (the I-cache reads zero while missing).
+            fetches[-1] = (pc, inst or fetches[-1][1])
+        else:
+            fetches.append((pc, inst))
+
+    def is_branch(inst):
+        return inst >> 12 in (B, BR)
+
+    def b_target(pc, inst):
+        # Target of a B instruction: PC+2 plus the sign extended 9-bit word offset.
+        offset = inst & 0x1FF
+        return (pc + 2 + ((offset - 0x200 if offset & 0x100 else offset) << 1)) & 0xFFFF
+
+    executed = []
+    for pc, inst in fetches:
+        if pipelined and len(executed) >= 1:
+            prev_pc, prev_inst = executed[-1]
+            redirect = pc != (prev_pc + 2) & 0xFFFF
+            flushed = redirect and not is_branch(prev_inst)
+            if redirect and is_branch(prev_inst) and len(executed) >= 2:
+                # The branch before may have fetched this branch on its wrong path.
+                before_pc, before_inst = executed[-2]
+                if is_branch(before_inst):
+                    fall_through = (before_pc + 2) & 0xFFFF
+                    flushed = (prev_pc != fall_through and pc == fall_through) or (
+                        before_inst >> 12 == B and prev_pc == fall_through and pc == b_target(before_pc, before_inst)
+                    )
+            if flushed:
+                executed.pop()
+        executed.append((pc, inst))
+
+    branches = []
+    for k, (pc, inst) in enumerate(executed):
+        if not is_branch(inst) or inst >> 12 == 0xF:
+            continue
+        target = executed[k + 1][0] if k + 1 < len(executed) else (pc + 2) & 0xFFFF
+        taken = target != (pc + 2) & 0xFFFF or (inst >> 9) & 0x7 == 7
+        branches.append((pc, taken, target))
+    return branches
+
+
+def iter_configs():
+    """
+    Iterate over the predictor configurations of the sweep, the baseline first.
+
+    Yields:
+        dict: A configuration with the keys of SWEEP.
+    """
+    yield dict(BASELINE)
+    for values in itertools.product(*SWEEP.values()):
+        config = dict(zip(SWEEP, values))
+        # History bits only index the BHT if they fit, and do not make sense with fewer entries.
+        if config["history"] and 1 << config["history"] > config["bht_entries"]:
+            continue
+        if config != BASELINE:
+            yield config
+
+
+def predict_directions(config, branches):
+    """
+    Replay a branch stream through the BHT of a predictor configuration.
+
+    Args:
+        config (dict): The predictor configuration (see SWEEP, the BTB size is not used).
+        branches (list): (pc, taken, target) tuples of the executed branches.
+
+    Returns:
+        int: A bit set with bit i set if branch i is predicted taken.
+
+    Description:
+        - The BHT holds saturating counters, reset to and allocated as weakly not taken, and predicts taken
+          when the counter's MSB is set. A tagged BHT predicts weakly not taken when the tag of the entry
+          does not match, as BHT.v does.
+        - "pc" indexes the BHT by PC bits above bit 0 (concatenated with the global history bits below
+          them if any). "xor" folds the upper PC bits (gshare with global history) into the index.
+    """
+    entries, history_bits, tagged = config["bht_entries"], config["history"], config["tagged"]
+    index_bits = entries.bit_length() - 1
+    weak_not_taken = (1 << (config["counter_bits"] - 1)) - 1
+    strongest = (1 << config["counter_bits"]) - 1
+    xor = config["index"] == "xor"
+
+    counters = [weak_not_taken] * entries
+    tags = [None] * entries
+    history = 0
+    history_mask = (1 << history_bits) - 1
+
+    predicted = 0
+    for i, (pc, taken, _) in enumerate(branches):
+        word = pc >> 1
+        if xor:
+            index = (word ^ (word >> index_bits) ^ (history << (index_bits - history_bits))) % entries
+        else:
+            index = ((word << history_bits) | history) % entries
+        tag = pc >> (index_bits + 1)
+
+        # Predict, then update the counter (allocating the entry on a tag miss) and the global history.
+        counter = counters[index] if not tagged or tags[index] == tag else weak_not_taken
+        if counter > weak_not_taken:
+            predicted |= 1 << i
+        counters[index] = min(counter + 1, strongest) if taken else max(counter - 1, 0)
+        tags[index] = tag
+        history = ((history << 1) | taken) & history_mask
+
+    return predicted
+
+
+def predict_targets(btb_entries, branches):
+    """
+    Replay a branch stream through a BTB.
+
+    Args:
+        btb_entries (int): The number of entries of the untagged BTB, indexed by PC bits above bit 0.
+        branches (list): (pc, taken, target) tuples of the executed branches.
+
+    Returns:
+        int: A bit set with bit i set if the BTB does not hold the target of branch i, written by taken branches.
+    """
+    btb = [None] * btb_entries
+    wrong = 0
+    for i, (pc, taken, target) in enumerate(branches):
+        index = (pc >> 1) % btb_entries
+        if btb[index] != target:
+            wrong |= 1 << i
+        if taken:
+            btb[index] = target
+    return wrong
+
+
+def outcome_sets(branches):
+    """
+    Get the bit sets of the outcomes of a branch stream.
+
+    Args:
+        branches (list): (pc, taken, target) tuples of the executed branches.
+
+    Returns:
+        tuple: (taken, redirected) bit sets with bit i set if branch i is taken, and if it is taken to
+               a target other than PC+2 (so fetching PC+2 is a misprediction).
+    """
+    taken = redirected = 0
+    for i, (pc, is_taken, target) in enumerate(branches):
+        if is_taken:
+            taken |= 1 << i
+            if target != (pc + 2) & 0xFFFF:
+                redirected |= 1 << i
+    return taken, redirected
+
+
+def count_mispredictions(predicted, wrong_target, taken, redirected):
+    """
+    Count the mispredictions of a predictor from the bit sets of its BHT and BTB.
+
+    A branch is mispredicted if it is predicted taken and either not taken or its BTB target is wrong,
+    or if it is predicted not taken and taken to a target other than PC+2.
+
+    Args:
+        predicted (int): The branches predicted taken (see `predict_directions`).
+        wrong_target (int): The branches whose BTB target is wrong (see `predict_targets`).
+        taken (int): The branches taken (see `outcome_sets`).
+        redirected (int): The branches taken to a target other than PC+2.
+
+    Returns:
+        int: The number of mispredictions.
+    """
+    return bin((predicted & (~taken | wrong_target)) | (~predicted & redirected)).count("1")
+
+
+def evaluate_batch(configs, streams):
+    """
+    Replay every workload through the BHT of each of a batch of configurations (the unit of work of a worker process).
+
+    Args:
+        configs (list): The predictor configurations.
+        streams (list): The branch stream of each workload.
+
+    Returns:
+        list: For each configuration, the bit set of predicted taken branches of each workload.
+    """
+    return [[predict_directions(config, branches) for branches in streams] for config in configs]
+
+
+def bht_key(config):
+    """
+    Get the BHT parameters of a predictor configuration, which configurations differing only in their BTB share.
+
+    Args:
+        config (dict): The predictor configuration.
+
+    Returns:
+        tuple: The values of the configuration other than the BTB size.
+    """
+    return tuple(value for key, value in config.items() if key != "btb_entries")
+
+
+def describe(config):
+    """
+    Describe a predictor configuration in one short line.
+
+    Args:
+        config (dict): The predictor configuration.
+
+    Returns:
+        str: e.g. "BHT 8x2b pc tagged, BTB 8" or "BHT 64x2b xor h4, BTB 16".
+    """
+    history = f" h{config['history']}" if config["history"] else ""
+    tagged = " tagged" if config["tagged"] else ""
+    return f"BHT {config['bht_entries']}x{config['counter_bits']}b {config['index']}{history}{tagged}, BTB {config['btb_entries']}"
+
+
+def main():
+    """
+    Main function to sweep predictor configurations over the branch streams of the workloads.
+    """
+    args = parse_arguments()
+
+    # Select the workloads.
+    if args.all:
+        workloads = list_programs()
+    elif args.workloads:
+        workloads = args.workloads
+    else:
+        print("No workloads given. Pass programs or simulation logs, or '-a' to use all programs in TestPrograms.")
+        sys.exit(1)
+
+    # Extract the branch stream of each workload.
+    names, streams = [], []
+    try:
+        for workload in workloads:
+            if workload.endswith((".list", ".s", ".img")):
+                branches = model_branches(workload)
+                name = os.path.splitext(os.path.basename(workload))[0]
+            else:
+                branches = log_branches(workload)
+                name = os.path.basename(workload).replace("_verilogsim.log.txt", "")
+            names.append(name)
+            streams.append(branches)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"\n===== Error assembling file {os.path.basename(workload)} =====")
+        print(str(e).replace("\n", " ").strip())
+        sys.exit(1)
+
+    # The BHT and the BTB predict independently, so each BHT configuration and each BTB size is replayed
+    # once, in batches across worker processes, and the outcomes are combined as bit sets per branch.
+    configs = list(iter_configs())
+    bht_configs = list({bht_key(config): config for config in configs}.values())
+    batch = max(1, len(bht_configs) // (args.jobs * 4))
+    batches = [bht_configs[i:i + batch] for i in range(0, len(bht_configs), batch)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        directions = [sets for batch_sets in executor.map(evaluate_batch, batches, itertools.repeat(streams)) for sets in batch_sets]
+    directions = {bht_key(config): sets for config, sets in zip(bht_configs, directions)}
+    targets = {size: [predict_targets(size, branches) for branches in streams] for size in {config["btb_entries"] for config in configs}}
+    outcomes = [outcome_sets(branches) for branches in streams]
+
+    results = [
+        [
+            count_mispredictions(predicted, wrong_target, *outcome)
+            for predicted, wrong_target, outcome in zip(directions[bht_key(config)], targets[config["btb_entries"]], outcomes)
+        ]
+        for config in configs
+    ]
+
+    # Summarize each workload with the baseline and the static predict not taken predictor.
+    baseline = results[0]
+    print(f"{len(configs)} predictor configurations over {len(names)} workloads.")
+    for name, branches, mispredictions in zip(names, streams, baseline):
+        taken = sum(taken for _, taken, _ in branches)
+        rate = f"{mispredictions / len(branches):.1%}" if branches else "-"
+        print(f"{name}: {len(branches)} branches, {taken} taken, baseline ({describe(BASELINE)}) mispredicts {mispredictions} ({rate}), predict not taken {taken}")
+
+    # Rank the configurations by their total mispredictions, then by size.
+    totals = [sum(counts) for counts in results]
+    ranking = sorted(range(len(configs)), key=lambda k: (totals[k], configs[k]["bht_entries"] * configs[k]["counter_bits"] + configs[k]["btb_entries"] * 16))
+    total_branches = sum(len(branches) for branches in streams)
+
+    print(f"\nBest {min(args.top, len(configs))} configurations (cycles saved vs baseline at {args.flush_penalty} cycle(s) per misprediction):")
+    for k in ranking[:args.top]:
+        rate = f"{totals[k] / total_branches:.1%}" if total_branches else "-"
+        saved = (sum(baseline) - totals[k]) * args.flush_penalty
+        per_workload = ", ".join(f"{name} {count}" for name, count in zip(names, results[k]))
+        print(f"  {describe(configs[k])}: {totals[k]} mispredictions ({rate}), {saved:+d} cycles saved [{per_workload}]")
+
+    # Write every result.
+    if args.output:
+        report = {
+            "workloads": [{"name": name, "branches": len(branches), "taken": sum(taken for _, taken, _ in branches)} for name, branches in zip(names, streams)],
+            "flush_penalty": args.flush_penalty,
+            "configurations": [
+                {
+                    "config": config,
+                    "baseline": config == BASELINE,
+                    "mispredictions": counts,
+                    "mispredict_rate": [count / len(branches) if branches else None for count, branches in zip(counts, streams)],
+                    "cycles_saved": [(base - count) * args.flush_penalty for base, count in zip(baseline, counts)],
+                }
+                for config, counts in zip(configs, results)
+            ],
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults of all configurations written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+import os
+import sys
+import json
+import random
+import argparse
+import itertools
+import concurrent.futures
+
+from isa_model import MAX_CYCLES, list_programs, default_data_file, load_program, read_image, simulate
+from timing_model import MEM_LATENCY, BLOCK_WORDS, CACHE_SETS, CACHE_WAYS
+from trace_diff import iter_cycles, parse_fields
+
+# The caches of Cache.v: 64 sets of 2 LRU ways of 8-word blocks, filled over the 4-cycle memory4c.
+BASELINE = {"sets": CACHE_SETS, "ways": CACHE_WAYS, "block_words": BLOCK_WORDS, "policy": "lru", "latency": MEM_LATENCY}
+
+# Design space swept by default. The miss latency only scales the stall cycles, so it costs no replays.
+SWEEP = {
+    "sets": [16, 32, 64, 128, 256],
+    "ways": [1, 2, 4, 8],
+    "block_words": [2, 4, 8, 16],
+    "policy": ["lru", "fifo", "random"],
+    "latency": [2, 4, 8, 16],
+}
+
+# Seed of the victim choice of the random replacement policy, so sweeps are repeatable.
+RANDOM_SEED = 1
+
+# The two caches, named after the stall signals cpu_tb.sv monitors.
+CACHES = (("icache", "I_cache_stall"), ("dcache", "D_cache_stall"))
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for the cache explorer.
+
+    Arguments:
+        - 'workloads' are the programs (.list/.s/.img, run on the ISA model) or SIMLOG files to replay.
+        - The '-a' flag uses every program in the TestPrograms directory instead.
+        - The '-j' flag sets the number of worker processes replaying configurations.
+        - The '-n' flag sets the number of best configurations printed.
+        - The '-s' flag limits the ranking to caches of at most a number of bytes.
+        - The '-o' flag writes the results of every configuration to a JSON file.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Sweep L1 cache configurations over the address traces of WISC-S25 programs.")
+
+    # The workloads to replay.
+    parser.add_argument("workloads", nargs="*", help="Programs (.list/.s/.img) to run on the ISA model, or simulation logs (verilogsim.log).")
+
+    # Flag to use every program in the TestPrograms directory.
+    parser.add_argument("-a", "--all", action="store_true", help="Use all programs in the TestPrograms directory.")
+
+    # Number of worker processes.
+    parser.add_argument("-j", "--jobs", type=int, default=int(os.environ.get("JOBS", os.cpu_count() or 1)), help="Number of worker processes (default: $JOBS or the number of CPUs).")
+
+    # Number of configurations printed.
+    parser.add_argument("-n", "--top", type=int, default=10, help="Number of best configurations to print (default 10).")
+
+    # Largest cache ranked.
+    parser.add_argument("-s", "--max-size", type=int, help="Only rank caches of at most this many data bytes (e.g. 2048).")
+
+    # File to write every result to.
+    parser.add_argument("-o", "--output", help="JSON file to write the results of every configuration to.")
+
+    # Parse and return the arguments.
+    return parser.parse_args()
+
+
+def model_traces(program_file, max_cycles=MAX_CYCLES):
+    """
+    Extract the address traces of a program by running it on the ISA model.
+
+    Args:
+        program_file (str): Assembly file or memory image to run.
+        max_cycles (int): The cycle limit of the model.
+
+    Returns:
+        tuple: (fetches, accesses) - the byte addresses of the instruction fetches and of the loads and
+               stores, in program order. Fetches on a mispredicted path are not part of the trace.
+    """
+    data_file = default_data_file(3)
+    records = []
+    simulate(load_program(program_file), read_image(data_file) if data_file else None, max_cycles, zero_nop=True, records=records)
+
+    fetches = [record[0] for record in records]
+    accesses = [record[7] for record in records if record[5] or record[6]]
+    return fetches, accesses
+
+
+def log_traces(log_file):
+    """
+    Extract the address traces of a program from the `PC:` and `M:` fields of its simulation log.
+
+    Args:
+        log_file (str): Path of the `verilogsim.log` file.
+
+    Returns:
+        tuple: (fetches, accesses) - the byte addresses of the instruction fetches and of the loads and
+               stores, in order.
+
+    Description:
+        - Cycles repeating the PC of the cycle before are stalls of one fetch. Fetches flushed later are kept,
+          as they accessed the instruction cache.
+        - A memory operation is a run of cycles accessing the same address, as the memory signals stay
+          asserted while the data cache stalls.
+    """
+    fetches, accesses = [], []
+    pc = access = None
+    for _, _, tokens in iter_cycles(log_file):
+        fields = dict(parse_fields(tokens))
+        try:
+            next_pc = int(fields["PC"], 16)
+        except (KeyError, TypeError, ValueError):
+            next_pc = None
+        if next_pc is not None and next_pc != pc:
+            fetches.append(next_pc)
+        pc = next_pc
+
+        read, write = fields.get("M.read") == "1", fields.get("M.write") == "1"
+        current = (read, write, fields.get("M.addr")) if read or write else None
+        if current is not None and current != access:
+            try:
+                accesses.append(int(current[2], 16))
+            except (TypeError, ValueError):
+                pass
+        access = current
+    return fetches, accesses
+
+
+def to_blocks(addresses, block_words):
+    """
+    Convert a byte address trace into a trace of block numbers, dropping repeated accesses to the last block.
+
+    Args:
+        addresses (list): The byte addresses accessed.
+        block_words (int): The number of 16-bit words per block.
+
+    Returns:
+        tuple: (blocks, repeats) - the block of each access that differs from the block accessed before it,
+               and the number of accesses dropped. A repeat hits in any cache and leaves its state unchanged.
+    """
+    shift = (block_words * 2).bit_length() - 1
+    blocks = []
+    last = None
+    for addr in addresses:
+        block = addr >> shift
+        if block != last:
+            blocks.append(block)
+            last = block
+    return blocks, len(addresses) - len(blocks)
+
+
+def lru_misses(blocks, sets, max_ways):
+    """
+    Count the LRU misses of a block trace for every associativity up to a limit in one pass.
+
+    Args:
+        blocks (list): The block trace (see `to_blocks`).
+        sets (int): The number of sets, indexed by the lower bits of the block number.
+        max_ways (int): The largest associativity counted.
+
+    Returns:
+        list: The number of misses of a cache with 1 to `max_ways` ways, at index ways - 1.
+
+    Description:
+        An access hits in a W-way LRU cache if fewer than W other blocks of its set were accessed since
+        the last access to it (its stack distance), so one pass over the LRU stacks of the sets counts the
+        misses of every associativity.
+    """
+    stacks = [[] for _ in range(sets)]
+    distances = [0] * (max_ways + 1)
+    for block in blocks:
+        stack = stacks[block % sets]
+        try:
+            distance = stack.index(block)
+            del stack[distance]
+        except ValueError:
+            distance = max_ways
+            if len(stack) == max_ways:
+                stack.pop()
+        distances[distance] += 1
+        stack.insert(0, block)
+
+    # A W-way cache misses on every access whose stack distance is W or more.
+    return [sum(distances[ways:]) for ways in range(1, max_ways + 1)]
+
+
+def replacement_misses(blocks, sets, ways, policy):
+    """
+    Count the misses of a block trace on a cache replacing its blocks in FIFO or random order.
+
+    Args:
+        blocks (list): The block trace (see `to_blocks`).
+        sets (int): The number of sets, indexed by the lower bits of the block number.
+        ways (int): The number of ways per set.
+        policy (str): "fifo" or "random".
+
+    Returns:
+        int: The number of misses.
+    """
+    rng = random.Random(RANDOM_SEED)
+    contents = [[] for _ in range(sets)]
+    misses = 0
+    for block in blocks:
+        ways_present = contents[block % sets]
+        if block in ways_present:
+            continue
+        misses += 1
+        if len(ways_present) < ways:
+            ways_present.append(block)
+        elif policy == "fifo":
+            del ways_present[0]
+            ways_present.append(block)
+        else:
+            ways_present[rng.randrange(ways)] = block
+    return misses
+
+
+def replay_geometry(task):
+    """
+    Count the misses of every swept associativity and policy of one cache geometry over the traces (the unit of work of a worker process).
+
+    Args:
+        task (tuple): (sets, block_words, ways, policies, traces) - the geometry, the swept associativities and
+                      policies, and the address traces of each workload.
+
+    Returns:
+        dict: (ways, policy) -> one misses list per trace. A direct mapped cache misses alike under every policy.
+    """
+    sets, block_words, ways_swept, policies, traces = task
+    misses = {}
+    for addresses in traces:
+        blocks, _ = to_blocks(addresses, block_words)
+        lru = lru_misses(blocks, sets, max(ways_swept))
+        for ways in ways_swept:
+            for policy in policies:
+                if policy == "lru" or ways == 1:
+                    count = lru[ways - 1]
+                else:
+                    count = replacement_misses(blocks, sets, ways, policy)
+                misses.setdefault((ways, policy), []).append(count)
+    return misses
+
+
+def iter_configs():
+    """
+    Iterate over the cache configurations of the sweep, the baseline first.
+
+    Yields:
+        dict: A configuration with the keys of SWEEP.
+    """
+    yield dict(BASELINE)
+    for values in itertools.product(*SWEEP.values()):
+        config = dict(zip(SWEEP, values))
+        if config != BASELINE:
+            yield config
+
+
+def miss_penalty(config):
+    """
+    Estimate the stall cycles of one miss, as Cache_Control.v fills a block.
+
+    Args:
+        config (dict): The cache configuration.
+
+    Returns:
+        int: One cycle detecting the miss, one waiting for the memory bus, then the memory latency and one
+             cycle per word of the block.
+    """
+    return 2 + config["latency"] + config["block_words"]
+
+
+def cache_bytes(config):
+    """
+    Get the data capacity of a cache configuration.
+
+    Args:
+        config (dict): The cache configuration.
+
+    Returns:
+        int: The number of data bytes (tags and valid bits are not counted).
+    """
+    return config["sets"] * config["ways"] * config["block_words"] * 2
+
+
+def describe(config):
+    """
+    Describe a cache configuration in one short line.
+
+    Args:
+        config (dict): The cache configuration.
+
+    Returns:
+        str: e.g. "2048B: 64 sets x 2 ways x 8 words, lru, latency 4".
+    """
+    return (f"{cache_bytes(config)}B: {config['sets']} sets x {config['ways']} ways x {config['block_words']} words, "
+            f"{config['policy']}, latency {config['latency']}")
+
+
+def main():
+    """
+    Main function to sweep cache configurations over the address traces of the workloads.
+    """
+    args = parse_arguments()
+
+    # Select the workloads.
+    if args.all:
+        workloads = list_programs()
+    elif args.workloads:
+        workloads = args.workloads
+    else:
+        print("No workloads given. Pass programs or simulation logs, or '-a' to use all programs in TestPrograms.")
+        sys.exit(1)
+
+    # Extract the instruction and data address traces of each workload.
+    names, traces = [], []
+    try:
+        for workload in workloads:
+            if workload.endswith((".list", ".s", ".img")):
+                fetches, accesses = model_traces(workload)
+                name = os.path.splitext(os.path.basename(workload))[0]
+            else:
+                fetches, accesses = log_traces(workload)
+                name = os.path.basename(workload).replace("_verilogsim.log.txt", "")
+            names.append(name)
+            traces.extend([fetches, accesses])
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"\n===== Error assembling file {os.path.basename(workload)} =====")
+        print(str(e).replace("\n", " ").strip())
+        sys.exit(1)
+
+    # Replay each geometry (sets and block size) once across worker processes. The LRU stack distances give
+    # every associativity at once, FIFO and random replacement are replayed per associativity, and the
+    # latency only scales the stall cycles of the misses.
+    configs = list(iter_configs())
+    geometries = sorted({(config["sets"], config["block_words"]) for config in configs})
+    ways_swept = sorted({config["ways"] for config in configs})
+    policies = sorted({config["policy"] for config in configs})
+    tasks = [(sets, block_words, ways_swept, policies, traces) for sets, block_words in geometries]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        replayed = dict(zip(geometries, executor.map(replay_geometry, tasks)))
+
+    # Hits, misses and stall cycles of each configuration, per workload and cache.
+    results = []
+    for config in configs:
+        misses = replayed[(config["sets"], config["block_words"])][(config["ways"], config["policy"])]
+        result = {"config": config, "bytes": cache_bytes(config), "baseline": config == BASELINE, "workloads": []}
+        for k, name in enumerate(names):
+            workload = {"name": name}
+            for j, (cache, stall) in enumerate(CACHES):
+                accesses, count = len(traces[2 * k + j]), misses[2 * k + j]
+                workload[cache] = {
+                    "accesses": accesses,
+                    "misses": count,
+                    "hit_rate": (accesses - count) / accesses if accesses else None,
+                    stall: count * miss_penalty(config),
+                }
+            result["workloads"].append(workload)
+        result["stall_cycles"] = sum(w[cache][stall] for w in result["workloads"] for cache, stall in CACHES)
+        results.append(result)
+
+    # Summarize each workload with the baseline caches.
+    print(f"{len(configs)} cache configurations over {len(names)} workloads.")
+    for workload in results[0]["workloads"]:
+        summary = ", ".join(
+            f"{cache} {workload[cache]['accesses'] - workload[cache]['misses']}/{workload[cache]['accesses']} hits, {stall} {workload[cache][stall]}"
+            for cache, stall in CACHES
+        )
+        print(f"{workload['name']}: baseline ({describe(BASELINE)}) {summary}")
+
+    # Rank the configurations by their total stall cycles, then by size.
+    ranked = sorted(
+        (result for result in results if args.max_size is None or result["bytes"] <= args.max_size),
+        key=lambda result: (result["stall_cycles"], result["bytes"])
+    )
+    baseline_stalls = results[0]["stall_cycles"]
+    limit = f" of at most {args.max_size} bytes" if args.max_size is not None else ""
+    print(f"\nBest {min(args.top, len(ranked))} configurations{limit} (estimated I_cache_stall + D_cache_stall cycles):")
+    for result in ranked[:args.top]:
+        rates = []
+        for cache, _ in CACHES:
+            accesses = sum(w[cache]["accesses"] for w in result["workloads"])
+            misses = sum(w[cache]["misses"] for w in result["workloads"])
+            rates.append(f"{cache} {(accesses - misses) / accesses:.1%}" if accesses else f"{cache} -")
+        print(f"  {describe(result['config'])}: {result['stall_cycles']} stall cycles "
+              f"({result['stall_cycles'] - baseline_stalls:+d} vs baseline), {', '.join(rates)}")
+
+    # Write every result.
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"workloads": names, "configurations": results}, f, indent=2)
+        print(f"\nResults of all configurations written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,27 @@
 import os
 import re
 import sys
+import gzip
+import json
+import time
+import fcntl
 import random
+import signal
+import shutil
+import socket
+import tempfile
+import hashlib
 import argparse
+import difflib
+import datetime
+import threading
+import contextlib
 import subprocess
 from pathlib import Path
 import concurrent.futures
+import xml.etree.ElementTree as ET
+
+from assembler import install_image
 
 # Constants for directory paths.
 ROOT_DIR = os.path.abspath("..")
@@ -30,6 +46,126 @@ LOGS_DIR = None
 TRANSCRIPT_DIR = None
 COMPILATION_DIR = None
 WORK_DIR = None
+MODULE_INDEX_FILE = None
+TEST_HISTORY_FILE = None
+RESULT_CACHE_FILE = None
+RESULT_CACHE_DIR = None
+SIGNAL_INDEX_DIR = None
+
+# Regular expressions for finding module and package definitions.
+MODULE_DEF_PATTERN = re.compile(r'^\s*module\s+(\w+)', re.MULTILINE)
+PACKAGE_DEF_PATTERN = re.compile(r'^\s*package\s+(\w+)', re.MULTILINE)
+
+# Regular expressions for identifying dependencies (module instantiations and package imports) in a file.
+MODULE_INST_PATTERN = re.compile(r'^\s*(\w+)\s*(#\([^)]*\))?\s+\w+\s*(\[[^\]]*\])?\s*\(.*?\);', re.DOTALL | re.MULTILINE)
+IMPORT_PATTERN = re.compile(r'^\s*import\s+(\w+)\s*::\*;', re.MULTILINE)
+INCLUDE_PATTERN = re.compile(r'^\s*`include\s+"([^"]+)"', re.MULTILINE)
+
+# The format version of the module index, bumped whenever the stored entries change.
+MODULE_INDEX_VERSION = 2
+
+# The module/package index of the selected directory, loaded once per run and shared by all tests.
+MODULE_INDEX = None
+MODULE_INDEX_LOCK = threading.Lock()
+
+# The vlog flags every work library is compiled with.
+VLOG_FLAGS = "+acc -stats=none"
+
+# The simulator session server, keeping designs elaborated between simulations (see sim_server.py).
+SESSION_SERVER = os.path.join(SCRIPTS_DIR, "sim_server.py")
+
+# Seconds to wait for a newly started session server to accept connections.
+SESSION_SERVER_STARTUP = 10
+
+# The files the testbenches read, and the files and directories they write, relative to the directory
+# they run in. A session of the session server runs in a directory of its own, so they are copied
+# into it before and moved back out of it after each run.
+SESSION_INPUTS = ["tests/loadfile_all.img", "tests/data.img"]
+SESSION_OUTPUTS = ["outputs", "tests/output/logs/transcript", "verilogsim.plog", "verilogsim.ptrace"]
+
+# The flags every compiled simulation model is built with, by backend.
+MODEL_FLAGS = {
+    "verilator": "--binary -j 0 -Wno-fatal -Wno-lint -Wno-style",
+    "icarus": "-g2012",
+}
+
+# Patterns of the SystemVerilog features a simulator backend may not support, matched on sources without comments.
+SV_FEATURE_PATTERNS = {
+    "packages": re.compile(r'^\s*(package\s+\w+|import\s+\w+\s*::)', re.MULTILINE),
+    "classes": re.compile(r'^\s*(virtual\s+)?class\s+\w+', re.MULTILINE),
+    "unpacked structs": re.compile(r'\bstruct\s*\{'),
+    "concurrent assertions": re.compile(r'\bassert\s+property\b'),
+    "dynamic processes": re.compile(r'\bjoin_(any|none)\b'),
+}
+COMMENT_PATTERN = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+
+# The shared design library of a phase, compiled once for all testbenches with the shared library option.
+SHARED_LIBRARY = "design"
+SHARED_LIBRARY_LOCK = threading.Lock()
+
+# The format version of the signal hierarchy index, bumped whenever the stored entries change.
+SIGNAL_INDEX_VERSION = 1
+
+# The number of recent runtimes kept per test for scheduling.
+TEST_HISTORY_RUNS = 5
+
+# The format version of the result cache, bumped whenever the key or the stored entries change.
+RESULT_CACHE_VERSION = 2
+RESULT_CACHE_LOCK = threading.Lock()
+
+# The verdicts of a test stored in the result cache.
+CACHED_STATUSES = ("success", "warning", "error")
+
+# Memory images a source file loads, e.g. `$readmemh("./tests/loadfile_all.img", mem);`.
+READMEM_PATTERN = re.compile(r'\$readmem[hb]\s*\(\s*"([^"]+)"')
+
+# The deadline of the test running on the current thread, and the process groups of the running commands.
+TEST_CONTEXT = threading.local()
+ACTIVE_PROCESSES = set()
+ACTIVE_PROCESSES_LOCK = threading.Lock()
+
+# The wall-clock time of the stages of the run before the tests start.
+RUN_STAGES = {}
+
+# Regular expression for the statistics the testbenches write at the end of the SIMLOG.
+SIM_STAT_PATTERN = re.compile(r'^SIMLOG::\s+(\w+)\s+(\d+)\s*$', re.MULTILINE)
+
+# Regular expression for the simulation time vsim reports with a $stop, $error or assertion.
+SIM_TIME_PATTERN = re.compile(r'\bTime:\s*([\d.]+)\s*(fs|ps|ns|us|ms|s)\b')
+
+# Picoseconds per simulation time unit.
+TIME_UNITS_PS = {"fs": 1e-3, "ps": 1, "ns": 1e3, "us": 1e6, "ms": 1e9, "s": 1e12}
+
+# Regular expression for the cycle the testbench checks report their messages at (e.g. `@ Cycle: 12`).
+SIM_CYCLE_PATTERN = re.compile(r'@ Cycle:\s*(\d+)')
+
+# Clock period of the testbenches in ps (`#5 clk = ~clk` in ns), whose cycles are counted as `$time/10`.
+CLOCK_PERIOD_PS = int(10 * TIME_UNITS_PS["ns"])
+
+# Suffix of the per-testbench waveform logging profiles in the add_wave_commands directory.
+LOG_PROFILE_SUFFIX = "_log_profile.txt"
+
+# The statuses of a simulation transcript, from the least to the most severe.
+TRANSCRIPT_STATUS_PRIORITY = ["unknown", "warning", "success", "error"]
+
+# The cross-phase cache of compiled design units, shared by all phase directories.
+COMPILE_CACHE_DIR = os.path.join(ROOT_DIR, ".compile_cache")
+
+# The cross-phase cache of Vcheck verdicts, keyed by the content hash of each design file.
+VCHECK_CACHE_FILE = os.path.join(ROOT_DIR, ".vcheck_cache.json")
+
+# The compilation order of each resolved source file, shared by all tests in a run.
+DEPENDENCY_ORDERS = {}
+DEPENDENCY_ORDERS_LOCK = threading.Lock()
+
+# Keywords and gate primitives that the instantiation pattern can match but never name a module.
+VERILOG_KEYWORDS = frozenset([
+    "module", "endmodule", "task", "endtask", "function", "endfunction", "begin", "end", "if", "else",
+    "case", "casez", "casex", "endcase", "for", "while", "repeat", "forever", "fork", "join", "initial",
+    "always", "always_ff", "always_comb", "always_latch", "assign", "assert", "wire", "reg", "logic",
+    "input", "output", "inout", "return", "wait", "generate", "endgenerate",
+    "and", "or", "not", "nand", "nor", "xor", "xnor", "buf", "bufif0", "bufif1", "notif0", "notif1",
+])
 
 
 def parse_arguments():
@@ -44,8 +180,12 @@ def parse_arguments():
         - The '-m' flag is optional and specifies the mode for running tests:
             0=Command-line, 1=Save waves, 2=GUI, 3=View saved waves.
         - The '-a' flag allows running all testbenches in the specified directory.
-        - The '-c' flag enables design file checking for compliancy in the specified directory.
+        - The '-c' flag enables design file checking for compliancy in the specified directory (or all directories with '-a').
         - The '-l' flag enables the selection of logs to display: 't' for transcript and 'c' for compilation.
+        - The '-sim' option selects the simulator backend (questa, verilator or icarus), and the '-sc'
+          flag reports which testbenches of the directory it can run.
+        - The '-ss' flag runs command-line Questa simulations in the persistent session server.
+        - The '-f' flag re-runs command-line tests whose result is cached.
 
     Returns:
         argparse.Namespace: A namespace object containing the parsed arguments.
@@ -73,11 +213,111 @@ def parse_arguments():
     # Option to check all verilog files within a directory.
     parser.add_argument("-c", "--check", action="store_true", help="Check all Verilog design files in the directory.")
 
+    # Flag to compile the design sources once into a library shared by all testbenches.
+    parser.add_argument("-sl", "--shared", action="store_true", help="Compile the design files once into a shared library for all testbenches.")
+
+    # Flag to take the design units from the cross-phase compiled-module cache.
+    parser.add_argument("-cc", "--cache", action="store_true", help="Compile each unique design file once into a cache shared by all directories.")
+
+    # Option to limit the number of tests run in parallel, e.g. to the number of simulator licenses.
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=int(os.environ.get("JOBS", os.cpu_count() or 1)),
+        help="Maximum number of tests to run in parallel (default: $JOBS or the number of cores)."
+    )
+
+    # Option to limit the wall-clock time of each test.
+    parser.add_argument(
+        "-to", "--timeout", type=float, default=float(os.environ["TIMEOUT"]) if os.environ.get("TIMEOUT") else None,
+        help="Wall-clock timeout of each test in seconds (default: $TIMEOUT or none)."
+    )
+
+    # Option to set how long a simulation keeps running after its first failure.
+    parser.add_argument(
+        "-gr", "--grace", type=float, default=float(os.environ.get("GRACE", 2)),
+        help="Seconds a command-line simulation keeps running after its first failure; negative runs to completion (default: $GRACE or 2)."
+    )
+
+    # Option to set the waveform window recorded before a failure.
+    parser.add_argument(
+        "-ww", "--wave-window", type=float, default=float(os.environ.get("WAVE_WINDOW", 2000)),
+        help="Nanoseconds of waveforms recorded before the first failure of a command-line simulation; negative records the whole run (default: $WAVE_WINDOW or 2000)."
+    )
+
+    # Option to checkpoint command-line simulations periodically.
+    parser.add_argument(
+        "-cp", "--checkpoint", type=float, default=float(os.environ.get("CHECKPOINT", 0)),
+        help="Nanoseconds between checkpoints of a command-line simulation, restored from to record a failure's waveforms; 0 disables them (default: $CHECKPOINT or 0)."
+    )
+
+    # Option to set the number of waveform files kept uncompressed.
+    parser.add_argument(
+        "-wk", "--wave-keep", type=int, default=int(os.environ.get("WAVE_KEEP", 10)),
+        help="Number of most recent waveform files kept uncompressed, older ones are gzipped (default: $WAVE_KEEP or 10)."
+    )
+
+    # Option to set how long compressed waveform files are kept.
+    parser.add_argument(
+        "-wr", "--wave-retention", type=float, default=float(os.environ.get("WAVE_RETENTION", 30)),
+        help="Days compressed waveform files are kept before they are removed (default: $WAVE_RETENTION or 30)."
+    )
+
+    # Option to select the simulator backend.
+    parser.add_argument(
+        "-sim", "--simulator", choices=list(SIMULATORS), default=os.environ.get("SIMULATOR", "questa"),
+        help="Simulator to run the tests with; verilator and icarus run command-line mode only (default: $SIMULATOR or questa)."
+    )
+
+    # Option to set the threads of a compiled simulation model.
+    parser.add_argument(
+        "-st", "--sim-threads", type=int, default=int(os.environ.get("SIM_THREADS", 1)),
+        help="Threads of each Verilator simulation model (default: $SIM_THREADS or 1)."
+    )
+
+    # Flag to run command-line simulations in the persistent session server.
+    parser.add_argument(
+        "-ss", "--session", action="store_true", default=bool(os.environ.get("SIM_SESSION")),
+        help="Run command-line simulations in a persistent vsim session per design, elaborating it once (default: on if $SIM_SESSION is set)."
+    )
+
+    # Flag to re-run tests whose result is cached.
+    parser.add_argument(
+        "-f", "--force", action="store_true", default=bool(os.environ.get("FORCE")),
+        help="Re-run command-line tests even if nothing they depend on changed since their cached result (default: on if $FORCE is set)."
+    )
+
+    # Flag to report which testbenches the simulator can run.
+    parser.add_argument("-sc", "--capabilities", action="store_true", help="Report which testbenches of the directory the simulator can run.")
+
+    # Option to select the directory without prompting.
+    parser.add_argument(
+        "-d", "--directory", choices=[os.path.basename(directory) for directory in [PHASE1_DIR, PHASE2_DIR, PHASE3_DIR, EXTRA_CREDIT_DIR]],
+        help="The directory to use, instead of prompting for one."
+    )
+
+    # Flag to run every test program against the processor testbench.
+    parser.add_argument("-mx", "--matrix", action="store_true", help="Run every test program against the processor testbench of the directory (or of every directory).")
+
     # Option to select which type of log to display.
     parser.add_argument("-l", "--logs", type=str, choices=["t", "c"], help="Display logs: 't' for transcript, 'c' for compilation.")
 
-    # Parse and return the arguments.
-    return parser.parse_args()
+    # Parse the arguments.
+    args = parser.parse_args()
+
+    # Ensure at least one test runs at a time.
+    if args.jobs < 1:
+        parser.error("The number of jobs must be at least 1.")
+
+    # Ensure the simulator can run the selected mode and is installed.
+    backend = get_backend(args)
+    if not (args.logs or args.check or args.capabilities):
+        if args.mode not in backend["modes"] or (args.synth and not backend["synth"]):
+            parser.error(f"The {args.simulator} simulator only runs the RTL testbenches in command-line mode (-m 0).")
+        if shutil.which(backend["tool"]) is None:
+            parser.error(f"The {args.simulator} simulator needs '{backend['tool']}' on the PATH.")
+    if args.sim_threads < 1:
+        parser.error("The number of simulation threads must be at least 1.")
+
+    return args
 
 
 def choose_directory(args):
@@ -93,6 +333,10 @@ def choose_directory(args):
     # Define the top-level valid directories
     top_level_dirs = [PHASE1_DIR, PHASE2_DIR, PHASE3_DIR, EXTRA_CREDIT_DIR]
 
+    # Use the directory given on the command line, if any.
+    if args.directory:
+        return os.path.join(ROOT_DIR, args.directory)
+
     # Determine the prompt message based on the args flags
     if args.logs == "c":
         prompt_message = "Enter the number of the directory to view compilation logs: "
@@ -147,7 +391,7 @@ def setup_directories(name):
               and ready for use.
     """
     # Modifying the global directory variables declared above.
-    global TEST_DIR, OUTPUTS_DIR, TESTS_DIR, CELL_LIBRARY_PATH, DESIGNS_DIR, TEST_PROGRAMS_DIR, WAVE_CMD_DIR, OUTPUT_DIR, WAVES_DIR, LOGS_DIR, TRANSCRIPT_DIR, COMPILATION_DIR, WORK_DIR
+    global TEST_DIR, OUTPUTS_DIR, TESTS_DIR, CELL_LIBRARY_PATH, DESIGNS_DIR, TEST_PROGRAMS_DIR, WAVE_CMD_DIR, OUTPUT_DIR, WAVES_DIR, LOGS_DIR, TRANSCRIPT_DIR, COMPILATION_DIR, WORK_DIR, MODULE_INDEX_FILE, TEST_HISTORY_FILE, SIGNAL_INDEX_DIR, RESULT_CACHE_FILE, RESULT_CACHE_DIR
 
     # Set the path for the main test directory using the provided 'name'.
     TEST_DIR = os.path.join(ROOT_DIR, name)
@@ -177,9 +421,14 @@ def setup_directories(name):
     TRANSCRIPT_DIR = os.path.join(LOGS_DIR, "transcript")  # Directory for transcript logs.
     COMPILATION_DIR = os.path.join(LOGS_DIR, "compilation")  # Directory for compilation logs.
     WORK_DIR = os.path.join(TESTS_DIR, "WORK")           # Directory for temporary work files.
+    MODULE_INDEX_FILE = os.path.join(OUTPUT_DIR, "module_index.json")  # Persistent module/package index.
+    TEST_HISTORY_FILE = os.path.join(OUTPUT_DIR, "test_history.json")  # Recorded runtimes of the tests.
+    RESULT_CACHE_FILE = os.path.join(OUTPUT_DIR, "result_cache.json")  # Cached results of unchanged tests.
+    RESULT_CACHE_DIR = os.path.join(OUTPUT_DIR, "result_cache")  # Transcripts and simulation logs of the cached results.
+    SIGNAL_INDEX_DIR = os.path.join(OUTPUT_DIR, "signal_index")  # Cached signal hierarchies of the testbenches.
 
     # Ensure that all the necessary directories are created, if they do not exist.
-    directories = [WAVE_CMD_DIR, OUTPUT_DIR, WAVES_DIR, LOGS_DIR, TRANSCRIPT_DIR, COMPILATION_DIR, WORK_DIR]
+    directories = [WAVE_CMD_DIR, OUTPUT_DIR, WAVES_DIR, LOGS_DIR, TRANSCRIPT_DIR, COMPILATION_DIR, WORK_DIR, SIGNAL_INDEX_DIR]
     for directory in directories:
         # 'mkdir' ensures that the directory and any necessary parent directories are created.
         # 'exist_ok=True' prevents an error if the directory already exists.
@@ -281,76 +530,159 @@ def display_log(log_type):
     sys.exit(0)
 
 
-def check_design_files():
+def get_vcheck_key():
     """
-    Checks Verilog design files in the current directory, excluding testbench files (_tb.v).
-    Runs the 'java Vcheck <design_file.v>' command on each file and reports any errors.
+    Compute a key identifying the version of the Vcheck tool.
 
-    This function:
-    - Scans the current directory for Verilog design files (.v).
-    - Excludes testbench files (_tb.v).
-    - Runs the Vcheck tool on each file and captures the output.
-    - Prints error messages for any design files that fail the check.
-    - Prints a success message if all design files are compliant.
-    
     Returns:
-        None
+        str: The SHA-1 of the Vcheck class files, so cached verdicts are dropped when the tool changes.
     """
-    # Change the directory to the designs folder.
-    os.chdir(DESIGNS_DIR)
+    key = hashlib.sha1()
+    for class_file in sorted(Path(SCRIPTS_DIR).glob("*.class")):
+        key.update(class_file.name.encode())
+        key.update(class_file.read_bytes())
+    return key.hexdigest()
 
-    # Get absolute paths of all Verilog files (excluding testbench files).
-    verilog_files = [os.path.abspath(f) for f in os.listdir()]
-    
-    # List to store files that fail the check.
-    failed_files = []
 
-    # Iterate over each design file and run the Vcheck command.
+def run_vcheck(vfile):
+    """
+    Run the Vcheck tool on a design file.
+
+    Args:
+        vfile (str): Path to the design file.
+
+    Returns:
+        tuple: (verdict, output) - `True` if the file is compliant, `False` if not, or `None` if the tool
+               failed to run, along with the tool's output or error message.
+    """
+    try:
+        # Run 'java Vcheck <design_file.v>' with the specified classpath.
+        result = run_command(f"java -cp {SCRIPTS_DIR} Vcheck {vfile}")
+    except subprocess.CalledProcessError as e:
+        return None, (e.stderr or b"").decode('utf-8').replace("\n", " ").strip()
+
+    # If the output does NOT start with "End of file", it indicates a failure.
+    output = result.stdout.decode('utf-8').strip()
+    return output.startswith("End of file"), output
+
+
+def check_design_files(design_dirs, args):
+    """
+    Checks the Verilog design files of one or more designs directories for compliancy, excluding testbench files (_tb.v).
+
+    This function:
+    - Collects the design files (.v) of each directory and groups identical files by their content hash,
+      so a file shared by several phases is checked once.
+    - Takes the verdict of each unique file from `.vcheck_cache.json` if it was checked before with the same
+      Vcheck tool, and runs 'java Vcheck <design_file.v>' on the others on a bounded pool of workers.
+    - Prints error messages for any design files that fail the check, and for any the tool failed to run on.
+    - Prints a success message if all design files are compliant.
+
+    Args:
+        design_dirs (list): The designs directories to check.
+        args (argparse.Namespace): Command-line arguments, including the number of parallel jobs.
+
+    Raises:
+        SystemExit: If the Vcheck tool failed to run on any file.
+    """
+    # Get absolute paths of all Verilog files (excluding testbench files), named after their directory if checking several.
+    verilog_files = {}
+    for design_dir in design_dirs:
+        for f in sorted(os.listdir(design_dir)):
+            if f.endswith(".v") and not f.endswith("_tb.v"):
+                vfile = os.path.join(design_dir, f)
+                verilog_files[vfile] = os.path.relpath(vfile, ROOT_DIR) if len(design_dirs) > 1 else f
+
+    if not verilog_files:
+        # Exit gracefully, if no Verilog design files found.
+        print(f"No Verilog design files found in {', '.join(os.path.relpath(d, ROOT_DIR) for d in design_dirs)}. Exiting...")
+        return
+
+    # Group identical files by their content hash.
+    files_by_hash = {}
     for vfile in verilog_files:
-        try:
-            # Run 'java Vcheck <design_file.v>' with the specified classpath
-            result = subprocess.run(
-                f"java -cp {SCRIPTS_DIR} Vcheck {vfile}",  # Command to execute
-                shell=True,                                # Execute in a shell
-                stdout=subprocess.PIPE,                    # Capture standard output
-                stderr=subprocess.PIPE,                    # Capture standard error
-                check=True                                 # Raise exception on non-zero exit code
-            )
-            
-            # Decode the output (result.stdout is in bytes)
-            output = result.stdout.decode('utf-8').strip()  # Convert to string and remove leading/trailing whitespace
-            
-            # If the output does NOT start with "End of file", it indicates a failure
-            if not output.startswith("End of file"):
-                failed_files.append((vfile, output))  # Store failed file and error message
-        
-        except subprocess.CalledProcessError as e:
-            # Handle the exception if the command fails
-            print(f"===== Error running Vcheck on {os.path.basename(vfile)} =====")
-            # Decode and clean the error message from stderr.
-            error_message = e.stderr.decode('utf-8').replace("\n", " ").strip()  # Remove internal newlines
-            print(f"{error_message}")
-            sys.exit(1)  # Exit if there's an error running Vcheck
+        files_by_hash.setdefault(hashlib.sha1(Path(vfile).read_bytes()).hexdigest(), []).append(vfile)
+
+    # Load the verdicts cached with the current tool.
+    tool_key = get_vcheck_key()
+    try:
+        with open(VCHECK_CACHE_FILE, 'r') as cache_fh:
+            cache = json.load(cache_fh)
+        verdicts = cache["verdicts"] if cache.get("tool") == tool_key else {}
+    except (OSError, ValueError, KeyError):
+        verdicts = {}
+
+    # Check each unique file not cached yet, one of its copies standing for all.
+    unchecked = [file_hash for file_hash in files_by_hash if file_hash not in verdicts]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = dict(zip(unchecked, executor.map(lambda file_hash: run_vcheck(files_by_hash[file_hash][0]), unchecked)))
+
+    # Cache the verdicts of the files the tool ran on, atomically as other runs may be reading them.
+    tool_errors = []
+    for file_hash, (verdict, output) in results.items():
+        if verdict is None:
+            tool_errors.append((file_hash, output))
+        else:
+            verdicts[file_hash] = {"compliant": verdict, "output": output}
+    if any(verdict is not None for verdict, _ in results.values()):
+        temp_file = f"{VCHECK_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(temp_file, 'w') as cache_fh:
+            json.dump({"tool": tool_key, "verdicts": verdicts}, cache_fh)
+        os.replace(temp_file, VCHECK_CACHE_FILE)
+
+    print(f"Checked {len(verilog_files)} design files ({len(files_by_hash)} unique, {len(files_by_hash) - len(unchecked)} cached).")
+
+    # Files that fail the check, with their error messages.
+    failed_files = [
+        (vfile, verdicts[file_hash]["output"])
+        for file_hash, vfiles in files_by_hash.items() if file_hash in verdicts and not verdicts[file_hash]["compliant"]
+        for vfile in vfiles
+    ]
 
     # Print results
     if failed_files:
         # If there are failing files, print their errors
         print("The following design files are not compliant:\n")
-        for vfile, error in failed_files:
-            print(f"Check failed for {os.path.basename(vfile)}:\n{error}\n")
-    else:
+        for vfile, error in sorted(failed_files):
+            print(f"Check failed for {verilog_files[vfile]}:\n{error}\n")
+    elif not tool_errors:
         # If no files failed, print success message.
-        if len(verilog_files) != 0:
-            print("YAHOO!! All Verilog design files are compliant.")
-        else:
-        # Exit gracefully, if no Verilog design files found.
-            print(f"No Verilog design files found in {os.path.basename(DESIGNS_DIR)}. Exiting...")
+        print("YAHOO!! All Verilog design files are compliant.")
+
+    if tool_errors:
+        for file_hash, error_message in tool_errors:
+            print(f"===== Error running Vcheck on {', '.join(verilog_files[vfile] for vfile in files_by_hash[file_hash])} =====")
+            print(f"{error_message}")
+        sys.exit(1)  # Exit if there's an error running Vcheck
+
+
+def assemble_file(infile, outfile):
+    """
+    Assemble a WISC-S25 assembly file into a full memory image with the Python assembler.
+
+    The image is taken from the image cache (see `assembler.install_image`), so an unchanged
+    program is neither assembled nor written again.
+
+    Args:
+        infile (str): Path to the WISC-S25 assembly file.
+        outfile (str): Path to the memory image to write, e.g. `tests/loadfile_all.img`.
+
+    Raises:
+        SystemExit: If the assembly process fails.
+    """
+    try:
+        install_image(infile, outfile)
+    except ValueError as e:
+        print(f"\n===== Error assembling file {os.path.basename(infile)} =====")
+        # Format the error message on a single line.
+        print(str(e).replace("\n", " ").strip())
+        sys.exit(1)  # Exit the script with an error code
 
 
 def assemble():
     """
     Lists all WISC-S25 assembly files in the TestPrograms directory, prompts the user to select one, 
-    and then runs `perl ./Scripts/assembler.pl <infile> > TESTS_DIR/instructions.img` to assemble it.
+    and then assembles it into `TESTS_DIR/loadfile_all.img` (see `assemble_file`).
 
     The function ensures the TESTS_DIR exists, provides an interactive selection for the user, 
     and executes the assembler script with error handling.
@@ -385,46 +717,38 @@ def assemble():
         except ValueError:
             print("Invalid input. Please enter a number.")
 
-    # Get the full path of the selected input file.
+    # Get the full path of the selected input file and assemble it.
     infile = os.path.join(TEST_PROGRAMS_DIR, asm_files[choice])
-    assembler_out = os.path.join(TESTS_DIR, "instructions.img")
-    outfile = os.path.join(TESTS_DIR, "loadfile_all.img") 
+    assemble_file(infile, os.path.join(TESTS_DIR, "loadfile_all.img"))
 
-    # Construct the command to run the assembler and store image to temporary file.
-    command = f"perl {SCRIPTS_DIR}/assembler.pl {infile} > {assembler_out}"
+    # Set the infile for use.
+    TEST_FILE = os.path.splitext(os.path.basename(infile))[0]
 
-    # Execute the assembler command with error handling.
-    try:
-        result = subprocess.run(
-            command,
-            shell=True,                                # Execute in a shell
-            stdout=subprocess.PIPE,                    # Capture standard output
-            stderr=subprocess.PIPE,                    # Capture standard error
-            check=True                                 # Raise exception on non-zero exit code
-        )
-    except subprocess.CalledProcessError as e:
-        print(f"\n===== Error assembling file {os.path.basename(infile)} =====")
-        # Decode and format the error message from stderr
-        error_message = e.stderr.decode('utf-8').replace("\n", " ").strip()
-        print(f"{error_message}")
-        sys.exit(1)  # Exit the script with an error code
-    
-    # Parse assembled output (only first 4 chars per line).
-    with open(assembler_out, 'r') as f:
-        assembled_lines = [line.strip()[:4] for line in f.readlines()]
 
-    # Generate full memory image (65536 lines).
-    full_memory = assembled_lines + ["0000"] * (65536 - len(assembled_lines))
+def update_transcript_status(status, line):
+    """
+    Update the status of a simulation transcript with its next line.
 
-    # Write to final output file.
-    with open(outfile, "w") as f:
-        f.write('\n'.join(full_memory) + '\n')
+    Failures take precedence over successes, which take precedence over warnings, so the
+    status of a transcript is the same however it is split into lines.
 
-    # Remove the instructions.img file after use.
-    os.remove(assembler_out)
+    Args:
+        status (str): The status of the transcript so far ("error", "success", "warning" or "unknown").
+        line (str): The next line of the transcript.
 
-    # Set the infile for use.
-    TEST_FILE = os.path.splitext(os.path.basename(infile))[0]
+    Returns:
+        str: The status of the transcript including the line.
+    """
+    if any(word in line for word in ["ERROR", "FAIL"]):
+        line_status = "error"
+    elif any(word in line for word in ["YAHOO!!", "YIPPEE"]):
+        line_status = "success"
+    elif "Warning:" in line:
+        line_status = "warning"
+    else:
+        return status
+
+    return max(status, line_status, key=TRANSCRIPT_STATUS_PRIORITY.index)
 
 
 def check_logs(logfile, mode):
@@ -496,21 +820,17 @@ def check_logs(logfile, mode):
         Description:
             - Reads the simulation transcript log file to look for specific success or failure keywords.
             - Checks for the presence of "ERROR" (for failure), "YAHOO!! All tests passed." (for success),
-              or "Warning:" (for warnings).
+              or "Warning:" (for warnings), see `update_transcript_status`.
         """
-        # Open and read the content of the transcript log file
-        with open(log_file, "r") as file:
-            content = file.read()
+        # Read the transcript log file line by line, keeping the most severe status.
+        status = "unknown"
+        with open(log_file, "r", errors="replace") as file:
+            for line in file:
+                status = update_transcript_status(status, line)
+                if status == "error":
+                    break
 
-            # Check for specific success or failure strings in the transcript
-            if any(word in content for word in ["ERROR", "FAIL"]):
-                return "error"
-            elif any(word in content for word in ["YAHOO!!", "YIPPEE"]):
-                return "success"
-            elif "Warning:" in content:
-                return "warning"
-            else:
-                return "unknown"
+        return status
 
     # Direct to the appropriate check function based on the mode
     if mode == "t":
@@ -519,253 +839,1270 @@ def check_logs(logfile, mode):
         return check_compilation(logfile)
 
 
-def get_files_to_compile(all_files, log_file):
+@contextlib.contextmanager
+def timed_stage(stage):
     """
-    Determine which .v files need recompilation based on the existence and 
-    timestamps of the compilation log file and the source .v files.
+    Record the wall-clock time of a stage of the current test, adding up repeated stages.
 
     Args:
-        all_files (list): A list of all .v files to be considered for compilation.
-        log_file (str): Path to the compilation log file.
+        stage (str): The name of the stage, e.g. "compile" or "simulation".
+    """
+    start_time = time.monotonic()
+    try:
+        yield
+    finally:
+        stages = getattr(TEST_CONTEXT, "stages", None)
+        if stages is not None:
+            stages[stage] = round(stages.get(stage, 0) + time.monotonic() - start_time, 3)
 
-    Returns:
-        str: A space-separated string of .v files that need recompilation.
+
+def run_command(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=False, check=True, cwd=None):
     """
-    # Initialize a string to store the .v files that require recompilation.
-    files_to_recompile = ""
+    Run a shell command of the current test in its own process group, within the test's deadline.
 
-    # Check if the log file exists or if it contains errors.
-    if not os.path.exists(log_file) or check_logs(log_file, "c") == "error":
-        # If the log file doesn't exist or has errors, mark all files for recompilation.
-        for v_file in all_files:
-            files_to_recompile += v_file + " "  # Append file to the list with a space separator.
-        
-        return files_to_recompile  # Return all files for recompilation.
+    Args:
+        command (str): The shell command to run.
+        stdout (int or file, optional): Where to send standard output. Defaults to a pipe.
+        stderr (int or file, optional): Where to send standard error. Defaults to a pipe.
+        text (bool, optional): Whether to decode the captured output as text. Defaults to False.
+        check (bool, optional): Whether to raise an exception on a non-zero exit code. Defaults to True.
+        cwd (str, optional): The directory to run the command in. Defaults to the current directory.
 
-    # Get the modification timestamp of the log file.
-    log_file_mtime = os.path.getmtime(log_file)
+    Returns:
+        subprocess.CompletedProcess: The exit code and captured output of the command.
 
-    # Compare the modification time of each .v file to the log file's timestamp.
-    for v_file in all_files:
-        if os.path.getmtime(v_file) > log_file_mtime:
-            # If the .v file is newer than the log file, mark it for recompilation.
-            files_to_recompile += v_file + " "
+    Raises:
+        subprocess.CalledProcessError: If `check` is set and the command exits with a non-zero code.
+        subprocess.TimeoutExpired: If the test's deadline passes, after killing the command's process group.
+    """
+    deadline = getattr(TEST_CONTEXT, "deadline", None)
+    timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
 
-    return files_to_recompile  # Return the list of files needing recompilation.
+    # Start the command in a new session, so the shell and the simulator it starts can be killed together.
+    process = subprocess.Popen(command, shell=True, stdout=stdout, stderr=stderr, text=text, cwd=cwd, start_new_session=True)
+    with ACTIVE_PROCESSES_LOCK:
+        ACTIVE_PROCESSES.add(process.pid)
+    try:
+        output, errors = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(process.pid)
+        process.communicate()
+        raise
+    finally:
+        with ACTIVE_PROCESSES_LOCK:
+            ACTIVE_PROCESSES.discard(process.pid)
 
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, output, errors)
+    return subprocess.CompletedProcess(command, process.returncode, output, errors)
 
-def compile_files(test_name, dependencies, args):
+
+def run_monitored_simulation(command, log_fh, grace, cwd=None, stop_message=None):
     """
-    Compile the required files for the test simulation.
+    Run a simulation of the current test, monitoring its transcript while it runs.
 
-    This function checks if recompilation is needed by calling `get_files_to_compile`.
-    If no recompilation is needed, it exits without performing compilation.
+    The output of the simulation is written to the log file line by line and classified as it
+    arrives. After the first failure, the simulation's process group is killed once the grace
+    period has passed, so a test that fails early does not run to the end of its stimulus.
 
     Args:
-        test_name (str): The name of the testbench file to be compiled.
-        dependencies (list): List of all .v sub-files as dependencies along with the `_tb.v` file to be considered for compilation.
-        args (argparse.Namespace): Command-line arguments, including flags to modify behavior.
+        command (str): The shell command running the simulation.
+        log_fh (file): The transcript log file to write the output to.
+        grace (float): Seconds to keep the simulation running after the first failure, to capture
+                       its context in the transcript. A negative value runs the simulation to completion.
+        cwd (str, optional): The directory to run the simulation in. Defaults to the current directory.
+        stop_message (str, optional): The message of a simulator exiting with a non-zero code on `$stop`
+                                      (see SIMULATORS), after which the exit is the normal end of the run.
+
+    Returns:
+        str: The status of the transcript ("error", "success", "warning" or "unknown").
 
     Raises:
-        SystemExit: If compilation fails, the program exits with an error.
+        subprocess.CalledProcessError: If the simulation exits with a non-zero code without having failed or stopped.
+        subprocess.TimeoutExpired: If the test's deadline passes, after killing the simulation's process group.
     """
-    # Path to the compilation log file.
-    log_file = os.path.join(COMPILATION_DIR, f"{test_name}_compilation.log")
-
-    # Determine the files that need recompilation.
-    files_to_compile = get_files_to_compile(dependencies, log_file)
-
-    # If post synthesis is requested ignore the found list.
-    if args.synth:
-        files_to_compile = f"-timescale=1ns/1ps {TEST_DIR}/designs/proc.vg {TEST_DIR}/designs/memory4c.v {TEST_DIR}/designs/cpu.v {TESTS_DIR}/Monitor_tasks.sv {TESTS_DIR}/Verification_tasks.sv {TESTS_DIR}/post_synth_tb.sv"
-
-    # If no files need recompilation, exit without performing compilation.
-    if not files_to_compile:
-        return
-    
+    start_time = time.monotonic()
+    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=cwd, start_new_session=True)
+    with ACTIVE_PROCESSES_LOCK:
+        ACTIVE_PROCESSES.add(process.pid)
+
+    # Kill the simulation when the test's deadline passes.
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        kill_process_group(process.pid)
+
+    timers = []
+    deadline = getattr(TEST_CONTEXT, "deadline", None)
+    if deadline is not None:
+        timers.append(threading.Timer(max(deadline - time.monotonic(), 0), expire))
+        timers[-1].start()
+
+    status = "unknown"
+    stopped = False
+    stop_reached = False
     try:
-        # Check if the work library exists, and compile accordingly.
-        if not Path(f"./tests/WORK/{test_name}").is_dir():
-            compile_command = (
-                f"vsim -c -logfile {log_file} -do "
-                f"'vlib ./tests/WORK/{test_name}; vlog +acc -work ./tests/WORK/{test_name} -stats=none {files_to_compile}; quit -f;'"
-            )
-        else:
-            compile_command = (
-                f"vlog +acc -logfile {log_file} -work ./tests/WORK/{test_name} -stats=none {files_to_compile}"
-            )
-        subprocess.run(compile_command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-    except subprocess.CalledProcessError as e:
-        if args.all:
-            print(f"{test_name}: Compilation failed with error {e.returncode}. Run 'make log c' for details. {e.stderr.decode('utf-8')}.")
-        else:
-            # Print log file contents in case of an error when running a single test.
-            with open(log_file, 'r') as log_fh:
-                print("\n===== Compilation failed with the following errors =====\n")
-                print(log_fh.read())
-        sys.exit(1)
-    
-
-    # Check the log file for warnings or errors.
-    result = check_logs(log_file, "c")
-    if result == "warning":
-        print(f"{test_name}: Compilation completed with warnings. Run 'make log c' for details.")
-    elif result == "error":
-        if args.all:
-            print(f"{test_name}: Compilation has errors. Run 'make log c' for details.")
-        else:
-            # Print log file contents in case of an error when running a single test.
-            with open(log_file, 'r') as log_fh:
-                print("\n===== Compilation failed with the following errors =====\n")
-                print(log_fh.read())
-        sys.exit(1)
-
-
-def find_dependencies(dep_file, resolved_files=None, module_definitions=None, package_definitions=None):
+        for raw_line in process.stdout:
+            line = raw_line.decode('utf-8', errors='replace')
+            log_fh.write(line)
+            status = update_transcript_status(status, line)
+            stop_reached = stop_reached or bool(stop_message and stop_message in line)
+
+            # Stop the simulation once the grace period after the first failure has passed.
+            if status == "error" and not stopped and grace >= 0:
+                stopped = True
+                timers.append(threading.Timer(grace, kill_process_group, [process.pid]))
+                timers[-1].start()
+        process.wait()
+    finally:
+        for timer in timers:
+            timer.cancel()
+        with ACTIVE_PROCESSES_LOCK:
+            ACTIVE_PROCESSES.discard(process.pid)
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, time.monotonic() - start_time)
+    if stopped and process.returncode != 0:
+        log_fh.write(f"# Simulation stopped {grace:g} seconds after the first failure.\n")
+    elif process.returncode != 0 and not stop_reached:
+        raise subprocess.CalledProcessError(process.returncode, command, None, b"")
+
+    return status
+
+
+def get_session_socket():
     """
-    Recursively finds all module and package dependencies for a given SystemVerilog testbench file.
-    
-    This function builds a list of files in the correct compilation order, including all modules
-    and packages required by the provided testbench file. It avoids redundant file scanning
-    by maintaining precomputed maps of module and package definitions.
-    
-    Args:
-        dep_file (str): Path to the SystemVerilog testbench file for which dependencies are to be resolved.
-        resolved_files (list, optional): List to store the resolved dependencies in compilation order. 
-                                         Defaults to None, in which case a new list is created.
-        module_definitions (dict, optional): Precomputed mapping of module names to file paths. 
-                                             If None, the map is built during execution.
-        package_definitions (dict, optional): Precomputed mapping of package names to file paths. 
-                                              If None, the map is built during execution.
-    
+    Get the socket of the session server of the selected directory.
+
     Returns:
-        list: A list of file paths in the correct order for compilation, with the top-level testbench file first.
+        str: Path of the Unix socket in the temporary directory, named after the directory's work
+             libraries so each directory has its own server.
     """
-    # Initialize resolved files list and add the current file as the first dependency.
-    if resolved_files is None:
-        resolved_files = []
-    if dep_file not in resolved_files:
-        resolved_files.insert(0, dep_file)
+    return os.path.join(tempfile.gettempdir(), f"sim_server_{hashlib.sha1(WORK_DIR.encode()).hexdigest()[:12]}.sock")
 
-    # Build module and package definitions if not provided.
-    if module_definitions is None or package_definitions is None:
-        module_definitions = {}
-        package_definitions = {}
 
-        # Regular expressions for finding module and package definitions.
-        module_def_pattern = re.compile(r'^\s*module\s+(\w+)', re.MULTILINE)
-        package_def_pattern = re.compile(r'^\s*package\s+(\w+)', re.MULTILINE)
+def connect_session_server():
+    """
+    Connect to the session server of the selected directory, starting it if it is not running.
 
-        # Scan all .v files in the DESIGN_DIR (for modules) and .sv files in the TESTS_DIR (for packages).
-        for directory in [DESIGNS_DIR, TESTS_DIR]:
-            for root, _, files in os.walk(directory): # Scan for design files
-                for file in files:
-                    if file.endswith('.v') or file.endswith('.sv'):  # Design files can be .v or .sv
-                        file_path = os.path.join(root, file)
-                        with open(file_path, 'r') as f:
-                            content = f.read()
-                            # Find module definitions and add to the map.
-                            for match in module_def_pattern.finditer(content):
-                                module_name = match.group(1)
-                                module_definitions.setdefault(module_name, file_path)
-
-        for root, _, files in os.walk(TESTS_DIR):  # Scan for package files
-            for file in files:
-                if file.endswith('.sv'):  # Package files are .sv
-                    file_path = os.path.join(root, file)
-                    with open(file_path, 'r') as f:
-                        content = f.read()
-                        # Find package definitions and add to the map.
-                        for match in package_def_pattern.finditer(content):
-                            package_name = match.group(1)
-                            package_definitions.setdefault(package_name, file_path)
+    The server is started in the background under a file lock, so parallel tests start it only
+    once, and writes its output to `tests/output/logs/sim_server.log`. It exits by itself after
+    being idle (see sim_server.py).
 
-    # Regular expressions for identifying dependencies in the testbench file.
-    module_inst_pattern = re.compile(r'^\s*(\w+)\s*(#\([^)]*\))?\s+\w+\s*(\[[^\]]*\])?\s*\(.*?\);', re.DOTALL | re.MULTILINE)
-    import_pattern = re.compile(r'^\s*import\s+(\w+)\s*::\*;', re.MULTILINE)
+    Returns:
+        socket.socket: The connection to the server.
 
-    # Read the top-level testbench file to extract direct dependencies.
-    with open(dep_file, 'r') as v_file:
-        v_file_content = v_file.read()
+    Raises:
+        OSError: If the server does not accept connections once started.
+    """
+    socket_path = get_session_socket()
 
-    # Collect modules instantiated and packages imported in the testbench file.
-    dependencies = set()
-    dependencies.update(match.group(1) for match in module_inst_pattern.finditer(v_file_content))
-    dependencies.update(match.group(1) for match in import_pattern.finditer(v_file_content))
+    def connect():
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            connection.close()
+            raise
+        return connection
+
+    with open(f"{socket_path}.lock", 'w') as lock_fh:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX)
+        try:
+            return connect()
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
 
-    # Resolve dependencies recursively, ensuring each file is processed only once.
-    for dep in dependencies:
-        if dep in module_definitions:
-            dep_file = module_definitions[dep]
-            if dep_file not in resolved_files:
-                resolved_files.insert(0, dep_file)
-                find_dependencies(dep_file, resolved_files, module_definitions, package_definitions)
-        elif dep in package_definitions:
-            dep_file = package_definitions[dep]
-            if dep_file not in resolved_files:
-                resolved_files.insert(0, dep_file)
-                find_dependencies(dep_file, resolved_files, module_definitions, package_definitions)
-    
-    return resolved_files
+        with open(os.path.join(LOGS_DIR, "sim_server.log"), 'a') as server_log_fh:
+            subprocess.Popen([sys.executable, SESSION_SERVER, "-s", socket_path], stdout=server_log_fh, stderr=subprocess.STDOUT,
+                             stdin=subprocess.DEVNULL, cwd=TEST_DIR, start_new_session=True)
+
+        deadline = time.monotonic() + SESSION_SERVER_STARTUP
+        while True:
+            try:
+                return connect()
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
 
 
-def find_signals(signal_names, test_name):
+def run_session_simulation(test_name, options, script, log_fh, grace, cwd, parallel=1):
     """
-    Find the full hierarchy paths for the given signal names.
+    Run a simulation of the current test in the session server, monitoring its transcript as it arrives.
 
-    This function uses the ModelSim/QuestaSim `vsim` command to search for signals in the design hierarchy.
-    If a full path is provided for a signal, it is directly added to the result.
-    Otherwise, the function searches for signals matching the provided name and resolves their full paths.
+    The design is elaborated once per session, keyed by its vsim options and the compile manifests
+    of its libraries (see `get_library_key`), so recompiling the testbench starts a new session.
+    Each later run restarts an elaborated design with the input files of the given directory, and
+    its output files are moved back to it (see SESSION_INPUTS and SESSION_OUTPUTS). The transcript is checked
+    as in `run_monitored_simulation`; the connection is closed once the grace period after the first
+    failure or the test's deadline has passed, which makes the server interrupt the run.
 
     Args:
-        signal_names (list of str): List of signal names to search for. Full paths or partial names are accepted.
-        test_name (str): The test name used to determine the required signals.
+        test_name (str): The name of the testbench.
+        options (str): The vsim options loading the design, e.g. `-L <library> <WORK_DIR>/<test>.<test>`.
+        script (str): The vsim script to run, without `quit`.
+        log_fh (file): The transcript log file to write the output to.
+        grace (float): Seconds to keep the simulation running after its first failure; negative runs it to completion.
+        cwd (str): The directory to run the simulation for.
+        parallel (int, optional): The number of sessions of the design the server may run this test's
+                                  simulations in at a time, e.g. the number of parallel jobs. Defaults to 1.
 
     Returns:
-        list of str: A list of full hierarchy paths for the provided signals. If a signal cannot be resolved,
-                     it is not included in the returned list.
+        str: The status of the transcript ("error", "success", "warning" or "unknown").
 
     Raises:
-        subprocess.CalledProcessError: If the `vsim` command fails during execution.
+        subprocess.CalledProcessError: If the design cannot be loaded or the session exits during the run.
+        subprocess.TimeoutExpired: If the test's deadline passes.
     """
-    # List to store resolved signal paths.
-    signal_paths = []
+    start_time = time.monotonic()
+    key = hashlib.sha1(f"{options} {get_library_key(test_name)}".encode()).hexdigest()
+    request = {"key": key, "options": options, "cwd": cwd, "inputs": SESSION_INPUTS, "outputs": SESSION_OUTPUTS,
+               "script": script, "parallel": parallel}
+    deadline = getattr(TEST_CONTEXT, "deadline", None)
+
+    status = "unknown"
+    stop_time = None
+    with connect_session_server() as connection:
+        connection.sendall((json.dumps(request) + "\n").encode())
+        reader = connection.makefile('r', encoding='utf-8', errors='replace')
+        while True:
+            limits = [limit for limit in (deadline, stop_time) if limit is not None]
+            connection.settimeout(max(min(limits) - time.monotonic(), 0.001) if limits else None)
+            try:
+                message = reader.readline()
+            except socket.timeout:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise subprocess.TimeoutExpired(SESSION_SERVER, time.monotonic() - start_time)
+                log_fh.write(f"# Simulation stopped {grace:g} seconds after the first failure.\n")
+                return status
+            if not message:
+                raise subprocess.CalledProcessError(1, SESSION_SERVER, None, b"The session server closed the connection.")
+
+            reply = json.loads(message)
+            if "line" in reply:
+                log_fh.write(reply["line"])
+                status = update_transcript_status(status, reply["line"])
+
+                # Stop waiting once the grace period after the first failure has passed.
+                if status == "error" and stop_time is None and grace >= 0:
+                    stop_time = time.monotonic() + grace
+            elif reply.get("error"):
+                raise subprocess.CalledProcessError(1, SESSION_SERVER, None, reply["error"].encode())
+            else:
+                if reply.get("elaboration"):
+                    TEST_CONTEXT.stages["elaboration"] = reply["elaboration"]
+                return status
 
-    for signal in signal_names:
-        # If the signal name already includes a full path, add it directly to the list.
-        if "/" in signal:
-            signal_paths.append(signal)
-            continue
 
-        try:
-            # Run the vsim command to search for signals matching the provided name.
-            result = subprocess.run(
-                f"vsim -c ./tests/WORK/{test_name}.{test_name} -do 'find signals /{test_name}/{signal}* -recursive; quit -f;'",
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+def kill_process_group(pid):
+    """
+    Kill the process group started by `run_command`, ignoring groups that already exited.
+
+    Args:
+        pid (int): The process ID of the group leader.
+    """
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def get_compile_keys(all_files):
+    """
+    Compute the content key of each file to be compiled.
+
+    A file's key is the hash of its contents combined with the contents of the files it includes
+    and the keys of the packages it imports, so a change to an included file or a package also
+    changes the key of every file depending on it, directly or not.
+
+    Args:
+        all_files (list): A list of all .v files to be considered for compilation.
+
+    Returns:
+        dict: Mapping of each file to its SHA-1 content key.
+    """
+    index = load_module_index()
+    keys = {}
+
+    def compile_key(source_file, visiting):
+        if source_file in keys:
+            return keys[source_file]
+
+        # Reuse the hash from the index if the file is indexed.
+        entry = index["files"].get(source_file)
+        if entry is None:
+            entry = scan_source_file(source_file)
+
+        # Combine the file's own hash with the contents of its includes and the keys of the packages it imports.
+        key = hashlib.sha1(entry["hash"].encode())
+        for include in entry.get("includes", []):
+            key.update(include.encode())
+            include_file = os.path.join(os.path.dirname(source_file), include)
+            if os.path.isfile(include_file):
+                with open(include_file, 'rb') as include_fh:
+                    key.update(include_fh.read())
+        for dep in entry["dependencies"]:
+            package_file = index["package_definitions"].get(dep)
+            if package_file and package_file != source_file and package_file not in visiting:
+                key.update(compile_key(package_file, visiting | {source_file}).encode())
+
+        keys[source_file] = key.hexdigest()
+        return keys[source_file]
+
+    for v_file in all_files:
+        compile_key(v_file, frozenset())
+
+    return {v_file: keys[v_file] for v_file in all_files}
+
+
+def load_compile_manifest(manifest_file):
+    """
+    Load the compile manifest of a work library.
+
+    Args:
+        manifest_file (str): Path to the manifest file in the work library.
+
+    Returns:
+        dict: The manifest with the vlog `flags` and the content key of each compiled file (`files`),
+              or an empty manifest if it does not exist or cannot be read.
+    """
+    try:
+        with open(manifest_file, 'r') as manifest_fh:
+            return json.load(manifest_fh)
+    except (OSError, ValueError):
+        return {"flags": None, "files": {}}
+
+
+def save_compile_manifest(manifest_file, flags, compiled_files):
+    """
+    Save the compile manifest of a work library atomically.
+
+    Args:
+        manifest_file (str): Path to the manifest file in the work library.
+        flags (str): The vlog flags the files were compiled with.
+        compiled_files (dict): Mapping of each compiled file to its content key.
+    """
+    temp_file = f"{manifest_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'w') as manifest_fh:
+        json.dump({"flags": flags, "files": compiled_files}, manifest_fh, indent=2)
+    os.replace(temp_file, manifest_file)
+
+
+def get_files_to_compile(all_files, manifest, compile_keys, flags):
+    """
+    Determine which .v files need recompilation based on the compile manifest of the work library.
+
+    A file is recompiled if its content key differs from the one it was last compiled with,
+    which covers changes to the file itself and to any package it imports. All files are
+    recompiled if the library was compiled with different vlog flags.
+
+    Args:
+        all_files (list): A list of all .v files to be considered for compilation.
+        manifest (dict): The compile manifest of the work library (see `load_compile_manifest`).
+        compile_keys (dict): Mapping of each file to its current content key (see `get_compile_keys`).
+        flags (str): The vlog flags the files will be compiled with.
+
+    Returns:
+        str: A space-separated string of .v files that need recompilation.
+    """
+    # Initialize a string to store the .v files that require recompilation.
+    files_to_recompile = ""
+
+    # If the flags changed, mark all files for recompilation.
+    compiled_files = manifest["files"] if manifest["flags"] == flags else {}
+
+    # Compare the content key of each .v file to the one it was compiled with.
+    for v_file in all_files:
+        if compiled_files.get(v_file) != compile_keys[v_file]:
+            files_to_recompile += v_file + " "
+
+    return files_to_recompile  # Return the list of files needing recompilation.
+
+
+def compile_library(library_dir, files, flags, log_file, args, force=False):
+    """
+    Compile the given files into a work library, recompiling only the files that changed.
+
+    This function checks if recompilation is needed by calling `get_files_to_compile`.
+    If no recompilation is needed, it exits without performing compilation. The content
+    keys of the compiled files are recorded in the manifest of the work library. A library
+    compiled with different flags is removed first, so no stale design units remain in it.
+
+    Args:
+        library_dir (str): Path to the work library, e.g. `./tests/WORK/<test_name>`.
+        files (list): List of all .v files to be compiled into the library, in compilation order.
+        flags (str): The vlog flags to compile the files with.
+        log_file (str): Path to the compilation log file.
+        args (argparse.Namespace): Command-line arguments, including flags to modify behavior.
+        force (bool, optional): Whether to recompile all files regardless of the manifest. Defaults to False.
+
+    Raises:
+        SystemExit: If compilation fails, the program exits with an error.
+    """
+    # Path to the compile manifest, kept in the work library so it is removed along with it.
+    library_name = os.path.basename(library_dir)
+    manifest_file = os.path.join(library_dir, "compile_manifest.json")
+
+    # Determine the files that need recompilation, compiling everything into a new library.
+    compile_keys = get_compile_keys(files)
+    if os.path.isdir(library_dir):
+        manifest = load_compile_manifest(manifest_file)
+        if manifest["flags"] != flags:
+            shutil.rmtree(library_dir)
+            manifest = {"flags": None, "files": {}}
+    else:
+        manifest = {"flags": None, "files": {}}
+    files_to_compile = get_files_to_compile(files, manifest, compile_keys, flags)
+
+    if force:
+        files_to_compile = " ".join(files)
+
+    # If no files need recompilation, exit without performing compilation.
+    if not files_to_compile:
+        return
+
+    # Keep the entries of other files compiled into the library, as in a shared library.
+    compiled_files = manifest["files"] if manifest["flags"] == flags else {}
+
+    # Drop the files being recompiled from the manifest first, so they are recompiled again if compilation fails.
+    if os.path.isdir(library_dir):
+        stale_files = set(files_to_compile.split())
+        compiled_files = {v_file: key for v_file, key in compiled_files.items() if v_file not in stale_files}
+        save_compile_manifest(manifest_file, flags, compiled_files)
+    
+    try:
+        # Check if the work library exists, and compile accordingly.
+        if not Path(library_dir).is_dir():
+            compile_command = (
+                f"vsim -c -logfile {log_file} -do "
+                f"'vlib {library_dir}; vlog {flags} -work {library_dir} {files_to_compile}; quit -f;'"
+            )
+        else:
+            compile_command = (
+                f"vlog {flags} -logfile {log_file} -work {library_dir} {files_to_compile}"
             )
+        run_command(compile_command)
+    except subprocess.CalledProcessError as e:
+        if args.all:
+            print(f"{library_name}: Compilation failed with error {e.returncode}. Run 'make log c' for details. {e.stderr.decode('utf-8')}.")
+        else:
+            # Print log file contents in case of an error when running a single test.
+            with open(log_file, 'r') as log_fh:
+                print("\n===== Compilation failed with the following errors =====\n")
+                print(log_fh.read())
+        sys.exit(1)
+    
+
+    # Check the log file for warnings or errors.
+    result = check_logs(log_file, "c")
+    if result == "warning":
+        print(f"{library_name}: Compilation completed with warnings. Run 'make log c' for details.")
+    elif result == "error":
+        if args.all:
+            print(f"{library_name}: Compilation has errors. Run 'make log c' for details.")
+        else:
+            # Print log file contents in case of an error when running a single test.
+            with open(log_file, 'r') as log_fh:
+                print("\n===== Compilation failed with the following errors =====\n")
+                print(log_fh.read())
+        sys.exit(1)
+
+    # Record the content keys the library was compiled with.
+    compiled_files.update(compile_keys)
+    save_compile_manifest(manifest_file, flags, compiled_files)
+
+
+def compile_files(test_name, dependencies, args):
+    """
+    Compile the required files for the test simulation with the selected simulator backend (see SIMULATORS).
+
+    Args:
+        test_name (str): The name of the testbench file to be compiled.
+        dependencies (list): List of all .v sub-files as dependencies along with the `_tb.v` file to be considered for compilation.
+        args (argparse.Namespace): Command-line arguments, including flags to modify behavior.
+
+    Raises:
+        SystemExit: If compilation fails, the program exits with an error.
+    """
+    # Path to the compilation log file.
+    log_file = os.path.join(COMPILATION_DIR, f"{test_name}_compilation.log")
+
+    get_backend(args)["compile"](test_name, dependencies, log_file, args)
+
+
+def compile_work_libraries(test_name, dependencies, log_file, args):
+    """
+    Compile the files of a testbench into Questa work libraries.
+
+    By default all files are compiled into the testbench's own work library. With the shared
+    library option, the design sources are compiled once into the phase's shared `design`
+    library and only the testbench and model files are compiled into the testbench's library,
+    which searches the shared library for the design units.
+
+    Args:
+        test_name (str): The name of the testbench file to be compiled.
+        dependencies (list): List of all .v sub-files as dependencies along with the `_tb.v` file to be considered for compilation.
+        log_file (str): Path to the compilation log file.
+        args (argparse.Namespace): Command-line arguments, including flags to modify behavior.
+
+    Raises:
+        SystemExit: If compilation fails, the program exits with an error.
+    """
+    # If post synthesis is requested ignore the found list, always recompiling the netlist.
+    if args.synth:
+        dependencies = [f"{TEST_DIR}/designs/proc.vg", f"{TEST_DIR}/designs/memory4c.v", f"{TEST_DIR}/designs/cpu.v", f"{TESTS_DIR}/Monitor_tasks.sv", f"{TESTS_DIR}/Verification_tasks.sv", f"{TESTS_DIR}/post_synth_tb.sv"]
+        compile_library(f"./tests/WORK/{test_name}", dependencies, f"{VLOG_FLAGS} -timescale=1ns/1ps", log_file, args, force=True)
+        return
+
+    if not (args.shared or args.cache):
+        compile_library(f"./tests/WORK/{test_name}", dependencies, VLOG_FLAGS, log_file, args)
+        return
+
+    # Split the design sources from the testbench and model files.
+    design_files = [dep for dep in dependencies if os.path.commonpath([dep, DESIGNS_DIR]) == DESIGNS_DIR]
+    test_files = [dep for dep in dependencies if dep not in design_files]
+
+    if args.cache:
+        # Take each design unit from the cross-phase cache, compiling only the ones not cached yet.
+        compile_keys = get_compile_keys(design_files)
+        libraries = [get_cached_library(design_file, compile_keys[design_file], args) for design_file in design_files]
+    else:
+        # Compile the design sources into the shared library, one test and one run at a time.
+        with SHARED_LIBRARY_LOCK, open(os.path.join(WORK_DIR, f"{SHARED_LIBRARY}.lock"), 'w') as lock_fh:
+            fcntl.flock(lock_fh, fcntl.LOCK_EX)
+            compile_library(f"./tests/WORK/{SHARED_LIBRARY}", design_files, VLOG_FLAGS, os.path.join(COMPILATION_DIR, f"{SHARED_LIBRARY}_compilation.log"), args)
+        libraries = [f"./tests/WORK/{SHARED_LIBRARY}"]
+
+    library_options = "".join(f" -L {library}" for library in libraries)
+    compile_library(f"./tests/WORK/{test_name}", test_files, f"{VLOG_FLAGS}{library_options}", log_file, args)
+
+
+def get_cached_library(design_file, compile_key, args):
+    """
+    Get the library of a design file from the cross-phase compiled-module cache, compiling it if needed.
+
+    The cache holds one library per unique design file, named after the hash of its content key
+    (see `get_compile_keys`) and the vlog flags, so byte-identical files in different phases are
+    compiled only once. A library is compiled into a temporary directory under a file lock and
+    then moved into place, so it is either complete or absent.
+
+    Args:
+        design_file (str): Path to the design file.
+        compile_key (str): The content key of the design file.
+        args (argparse.Namespace): Command-line arguments, including flags to modify behavior.
+
+    Returns:
+        str: Path to the library of the design file in the cache.
+
+    Raises:
+        SystemExit: If compilation fails, the program exits with an error.
+    """
+    unit_key = hashlib.sha1(f"{compile_key} {VLOG_FLAGS}".encode()).hexdigest()
+    library_dir = os.path.join(COMPILE_CACHE_DIR, unit_key)
+    if os.path.isdir(library_dir):
+        return library_dir
+
+    os.makedirs(COMPILE_CACHE_DIR, exist_ok=True)
+    with open(f"{library_dir}.lock", 'w') as lock_fh:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX)
+
+        # Another test or run may have compiled it while waiting for the lock.
+        if not os.path.isdir(library_dir):
+            temp_dir = f"{library_dir}.tmp"
+            if os.path.isdir(temp_dir):
+                shutil.rmtree(temp_dir)
+            compile_library(temp_dir, [design_file], VLOG_FLAGS, f"{library_dir}.log", args)
+            os.replace(temp_dir, library_dir)
+
+    return library_dir
+
+
+def get_library_options(test_name):
+    """
+    Get the vsim options for the libraries a testbench was compiled against.
+
+    Args:
+        test_name (str): The name of the testbench.
+
+    Returns:
+        str: The `-L` options for the shared design library or the cached design libraries the
+             testbench was compiled against, otherwise an empty string.
+    """
+    manifest = load_compile_manifest(os.path.join(WORK_DIR, test_name, "compile_manifest.json"))
+
+    # Libraries are given by absolute path, so the options also work from a sandbox directory.
+    libraries = re.findall(r'-L (\S+)', manifest["flags"] or "")
+    return "".join(f"-L {os.path.normpath(os.path.join(TEST_DIR, library))} " for library in libraries)
+
+
+def get_model_path(test_name, args):
+    """
+    Get the path of the simulation model of a testbench built by a simulator other than Questa.
+
+    Args:
+        test_name (str): The name of the testbench.
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+
+    Returns:
+        str: Absolute path to the model's build directory, `tests/WORK/<test_name>.<simulator>`.
+    """
+    return os.path.join(WORK_DIR, f"{test_name}.{args.simulator}")
+
+
+def compile_model(test_name, dependencies, log_file, args):
+    """
+    Build the simulation model of a testbench with Verilator or Icarus Verilog, if any of its files changed.
+
+    The model is built from all the files at once, into `tests/WORK/<test_name>.<simulator>`, with
+    the build command of the backend, and the content keys of the files it was built from are
+    recorded in its compile manifest, so it is only rebuilt when a file or the flags changed.
+
+    Args:
+        test_name (str): The name of the testbench, the top module of the model.
+        dependencies (list): All .v/.sv files of the testbench, in compilation order.
+        log_file (str): Path to the compilation log file.
+        args (argparse.Namespace): Command-line arguments, including flags to modify behavior.
+
+    Raises:
+        SystemExit: If the build fails, the program exits with an error.
+    """
+    backend = get_backend(args)
+    model_dir = get_model_path(test_name, args)
+    manifest_file = os.path.join(model_dir, "compile_manifest.json")
+    flags = backend["flags"](args)
+
+    # Rebuild the whole model if any file or the flags changed.
+    compile_keys = get_compile_keys(dependencies)
+    manifest = load_compile_manifest(manifest_file)
+    if manifest["flags"] == flags and manifest["files"] == compile_keys:
+        return
+
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+    save_compile_manifest(manifest_file, None, {})
+    compile_command = backend["build"](test_name, dependencies, model_dir, flags)
+
+    with open(log_file, 'w') as log_fh:
+        try:
+            run_command(compile_command, stdout=log_fh, stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError as e:
+            if args.all:
+                print(f"{test_name}: Compilation failed with error {e.returncode}. Run 'make log c' for details.")
+            else:
+                # Print log file contents in case of an error when running a single test.
+                with open(log_file, 'r') as log_fh:
+                    print("\n===== Compilation failed with the following errors =====\n")
+                    print(log_fh.read())
+            sys.exit(1)
+
+    save_compile_manifest(manifest_file, flags, compile_keys)
+
+
+def get_vlog_flags(args):
+    """
+    Get the flags the Questa work libraries are compiled with.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments.
+
+    Returns:
+        str: The vlog flags.
+    """
+    return VLOG_FLAGS
+
+
+def get_verilator_flags(args):
+    """
+    Get the flags the Verilator simulation models are built with.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments containing `sim_threads`.
+
+    Returns:
+        str: The flags, including the thread count of the model.
+    """
+    return f"{MODEL_FLAGS['verilator']} --threads {args.sim_threads}"
+
+
+def get_icarus_flags(args):
+    """
+    Get the flags the Icarus Verilog simulation models are built with.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments.
+
+    Returns:
+        str: The iverilog flags.
+    """
+    return MODEL_FLAGS["icarus"]
+
+
+def get_verilator_build_command(test_name, dependencies, model_dir, flags):
+    """
+    Get the command building the Verilator simulation model of a testbench.
+
+    Args:
+        test_name (str): The name of the testbench, the top module of the model.
+        dependencies (list): All .v/.sv files of the testbench, in compilation order.
+        model_dir (str): The build directory of the model.
+        flags (str): The Verilator flags.
+
+    Returns:
+        str: The shell command, building the executable `<model_dir>/<test_name>`.
+    """
+    return f"verilator {flags} --top-module {test_name} -Mdir {model_dir} -o {test_name} {' '.join(dependencies)}"
+
+
+def get_icarus_build_command(test_name, dependencies, model_dir, flags):
+    """
+    Get the command building the Icarus Verilog simulation model of a testbench.
+
+    Args:
+        test_name (str): The name of the testbench, the top module of the model.
+        dependencies (list): All .v/.sv files of the testbench, in compilation order.
+        model_dir (str): The build directory of the model.
+        flags (str): The iverilog flags.
+
+    Returns:
+        str: The shell command, building `<model_dir>/<test_name>.vvp`.
+    """
+    return f"iverilog {flags} -s {test_name} -o {model_dir}/{test_name}.vvp {' '.join(dependencies)}"
+
+
+def get_vsim_command(test_name, args, run_script="run -all;", log_file=None, wave_file=None):
+    """
+    Get the command running the work library of a testbench in command-line vsim.
+
+    Args:
+        test_name (str): The name of the testbench.
+        args (argparse.Namespace): Command-line arguments, including the post-synthesis flag.
+        run_script (str, optional): The vsim commands running the simulation, before it quits.
+        log_file (str, optional): Path to write the vsim transcript to.
+        wave_file (str, optional): Path of the waveform file vsim writes.
+
+    Returns:
+        str: The shell command, which can be run from any directory.
+    """
+    design = f"{get_library_options(test_name)}{WORK_DIR}/{test_name}.{test_name}"
+    if args.synth:
+        design = f"{WORK_DIR}/{test_name}.{test_name} -t ns -Lf {CELL_LIBRARY_PATH}"
+
+    command = f"vsim -c {design}"
+    if wave_file:
+        command += f" -wlf {wave_file}"
+    if log_file:
+        command += f" -logfile {log_file}"
+    return f"{command} -do '{run_script} quit -f;'"
+
+
+def get_verilator_command(test_name, args, run_script=None, log_file=None, wave_file=None):
+    """
+    Get the command running the Verilator simulation model of a testbench built by `compile_model`.
+
+    The model runs to its end and writes its transcript to the standard output, so the vsim script,
+    transcript and waveform file of `get_vsim_command` do not apply.
+
+    Args:
+        test_name (str): The name of the testbench.
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+        run_script (str, optional): Unused.
+        log_file (str, optional): Unused.
+        wave_file (str, optional): Unused.
+
+    Returns:
+        str: The shell command, which can be run from any directory.
+    """
+    return f"{get_model_path(test_name, args)}/{test_name}"
+
+
+def get_icarus_command(test_name, args, run_script=None, log_file=None, wave_file=None):
+    """
+    Get the command running the Icarus Verilog simulation model of a testbench built by `compile_model`.
+
+    The model runs to its end and writes its transcript to the standard output, so the vsim script,
+    transcript and waveform file of `get_vsim_command` do not apply.
+
+    Args:
+        test_name (str): The name of the testbench.
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+        run_script (str, optional): Unused.
+        log_file (str, optional): Unused.
+        wave_file (str, optional): Unused.
+
+    Returns:
+        str: The shell command, which can be run from any directory.
+    """
+    # Run without the interactive prompt, so `$stop` ends the simulation as in `run -all; quit -f;`.
+    return f"vvp -n {get_model_path(test_name, args)}/{test_name}.vvp"
+
+
+def get_session_options(test_name, args):
+    """
+    Get the vsim options loading the work library of a testbench into a session of the session server.
+
+    Args:
+        test_name (str): The name of the testbench.
+        args (argparse.Namespace): Command-line arguments, including the post-synthesis flag.
+
+    Returns:
+        str: The options, which can be used from any directory.
+    """
+    if args.synth:
+        return f"-t ns -Lf {CELL_LIBRARY_PATH} {WORK_DIR}/{test_name}.{test_name}"
+    return f"{get_library_options(test_name)}{WORK_DIR}/{test_name}.{test_name}"
+
+
+def dump_vsim_signals(test_name):
+    """
+    Dump the hierarchy path of every signal under a testbench with a single vsim run.
+
+    Args:
+        test_name (str): The name of the testbench.
+
+    Returns:
+        list of str: The full hierarchy path of every signal under the testbench, in the order vsim found them.
+
+    Raises:
+        SystemExit: If vsim fails to load the testbench.
+    """
+    result = run_command(
+        f"vsim -c {get_library_options(test_name)}./tests/WORK/{test_name}.{test_name} -do 'find signals /{test_name}/* -recursive; quit -f;'",
+        text=True,
+        check=False,
+    )
+    prefix = f"/{test_name}/"
+    signals = list(dict.fromkeys(part for part in result.stdout.split() if part.startswith(prefix)))
+    if not signals:
+        print(f"{test_name}: Error loading the signal hierarchy: {(result.stderr or result.stdout).strip()}")
+        sys.exit(1)
+    return signals
+
+
+# The simulator backends, each with:
+#   - tool: The executable it needs on the PATH.
+#   - modes: The modes (-m) it runs, and synth whether it runs the post-synthesis testbench.
+#   - unsupported: The SystemVerilog features (see SV_FEATURE_PATTERNS) it cannot run testbenches with.
+#   - stop_message: The message it exits with a non-zero code on at `$stop`, where vsim's
+#     `run -all; quit -f;` ends the run normally (see `run_monitored_simulation`).
+#   - compile(test_name, dependencies, log_file, args): Compiles the files of a testbench.
+#   - flags(args): The flags it compiles with, which the cached results depend on.
+#   - build(test_name, dependencies, model_dir, flags): The command building a simulation model (see `compile_model`).
+#   - command(test_name, args, run_script, log_file, wave_file): The command running a compiled testbench.
+#   - session(test_name, args): The options loading a testbench into the session server, or None without sessions.
+#   - signals(test_name): The hierarchy paths of the signals under a testbench, or None without waveforms.
+SIMULATORS = {
+    "questa": {
+        "tool": "vsim", "modes": (0, 1, 2, 3), "synth": True, "unsupported": (), "stop_message": None,
+        "compile": compile_work_libraries, "flags": get_vlog_flags, "build": None,
+        "command": get_vsim_command, "session": get_session_options, "signals": dump_vsim_signals,
+    },
+    "verilator": {
+        "tool": "verilator", "modes": (0,), "synth": False, "unsupported": (), "stop_message": "Verilog $stop",
+        "compile": compile_model, "flags": get_verilator_flags, "build": get_verilator_build_command,
+        "command": get_verilator_command, "session": None, "signals": None,
+    },
+    "icarus": {
+        "tool": "iverilog", "modes": (0,), "synth": False,
+        "unsupported": ("packages", "classes", "unpacked structs", "concurrent assertions", "dynamic processes"), "stop_message": None,
+        "compile": compile_model, "flags": get_icarus_flags, "build": get_icarus_build_command,
+        "command": get_icarus_command, "session": None, "signals": None,
+    },
+}
+
+
+def get_backend(args):
+    """
+    Get the backend of the selected simulator.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+
+    Returns:
+        dict: The backend (see SIMULATORS).
+    """
+    return SIMULATORS[args.simulator]
+
+
+def find_unsupported_features(dependencies, args):
+    """
+    Find the SystemVerilog features of a testbench's files that the selected simulator cannot run.
+
+    Args:
+        dependencies (list): All .v/.sv files of the testbench.
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+
+    Returns:
+        list: Each unsupported feature used, with the first file using it, e.g. "packages (Monitor_tasks.sv)".
+              Empty if the simulator can run the testbench.
+    """
+    unsupported = get_backend(args)["unsupported"]
+    features = {}
+    for dependency in dependencies:
+        if len(features) == len(unsupported):
+            break
+        with open(dependency, 'r', errors='replace') as source_fh:
+            content = COMMENT_PATTERN.sub("", source_fh.read())
+        for feature in unsupported:
+            if feature not in features and SV_FEATURE_PATTERNS[feature].search(content):
+                features[feature] = os.path.basename(dependency)
+
+    return [f"{feature} ({file_name})" for feature, file_name in features.items()]
+
+
+def report_capabilities(args):
+    """
+    Report which testbenches of the selected directory the simulator can run, and why not for the others.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+    """
+    backend = get_backend(args)
+    modes = ", ".join(str(mode) for mode in backend["modes"])
+    features = "".join(f", {feature}" for feature, key in [("post-synthesis", "synth"), ("sessions", "session"), ("waveforms", "signals")] if backend[key])
+    installed = "installed" if shutil.which(backend["tool"]) else f"'{backend['tool']}' not on the PATH"
+    print(f"{args.simulator}: modes {modes}{features}, {installed}.")
+
+    for test_name in find_testbench(True):
+        test_file = os.path.join(TESTS_DIR, f"{test_name}.sv")
+        if not os.path.exists(test_file):
+            test_file = os.path.join(TESTS_DIR, f"{test_name}.v")
+        dependencies, _ = find_dependencies(test_file)
+        features = find_unsupported_features(dependencies, args)
+        print(f"{test_name}: {'cannot run, uses ' + ', '.join(features) if features else 'supported'}.")
+
+
+def scan_source_file(file_path):
+    """
+    Parse a Verilog/SystemVerilog source file for the module/package index.
+
+    Args:
+        file_path (str): Path to the source file.
+
+    Returns:
+        dict: The file's SHA-1 `hash`, the `modules` and `packages` it defines, the modules it
+              instantiates and packages it imports (`dependencies`), in the order they appear,
+              and the files it includes (`includes`).
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    content = data.decode('utf-8', errors='replace')
+
+    # Collect modules instantiated and packages imported, without duplicates.
+    dependencies = [match.group(1) for match in MODULE_INST_PATTERN.finditer(content)]
+    dependencies += [match.group(1) for match in IMPORT_PATTERN.finditer(content)]
+
+    return {
+        "hash": hashlib.sha1(data).hexdigest(),
+        "modules": [match.group(1) for match in MODULE_DEF_PATTERN.finditer(content)],
+        "packages": [match.group(1) for match in PACKAGE_DEF_PATTERN.finditer(content)],
+        "dependencies": list(dict.fromkeys(dependencies)),
+        "includes": list(dict.fromkeys(match.group(1) for match in INCLUDE_PATTERN.finditer(content))),
+    }
+
+
+def load_module_index():
+    """
+    Load the persistent module/package index of the selected directory, updating it incrementally.
+
+    The index is stored in `tests/output/module_index.json` and holds, for every .v/.sv file in the
+    designs and tests directories, its mtime, size and hash along with the parsed definitions and
+    dependencies. Only files whose mtime or size changed are read again, and only files whose hash
+    changed are parsed again. The index is loaded once per run and shared by all tests.
+
+    Returns:
+        dict: The index with keys:
+              - `files`: Per file entries keyed by absolute path (see `scan_source_file`).
+              - `module_definitions`: Mapping of module names to the file defining them.
+              - `package_definitions`: Mapping of package names to the file defining them.
+    """
+    global MODULE_INDEX
+
+    with MODULE_INDEX_LOCK:
+        if MODULE_INDEX is not None:
+            return MODULE_INDEX
+
+        # Load the stored entries, which are keyed by path relative to the test directory.
+        stored = {}
+        if os.path.exists(MODULE_INDEX_FILE):
+            try:
+                with open(MODULE_INDEX_FILE, 'r') as index_fh:
+                    stored_index = json.load(index_fh)
+                # An index of an older format is rebuilt from scratch.
+                if stored_index.get("version") == MODULE_INDEX_VERSION:
+                    stored = stored_index.get("files", {})
+            except (OSError, ValueError):
+                # A corrupt index is rebuilt from scratch.
+                stored = {}
+
+        files = {}
+        module_definitions = {}
+        package_definitions = {}
+        changed = False
+
+        # Scan all .v/.sv files in the DESIGNS_DIR and TESTS_DIR, in the same order as before.
+        for directory in [DESIGNS_DIR, TESTS_DIR]:
+            for root, _, filenames in os.walk(directory):
+                for file in filenames:
+                    if not (file.endswith('.v') or file.endswith('.sv')):
+                        continue
+                    file_path = os.path.join(root, file)
+                    rel_path = os.path.relpath(file_path, TEST_DIR)
+                    stat = os.stat(file_path)
+                    entry = stored.get(rel_path)
+
+                    if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                        # The file may have changed, so only reuse the parse if its contents did not.
+                        scanned = scan_source_file(file_path)
+                        if entry is None or entry["hash"] != scanned["hash"]:
+                            entry = scanned
+                        entry["mtime_ns"], entry["size"] = stat.st_mtime_ns, stat.st_size
+                        changed = True
+
+                    files[file_path] = entry
+
+                    # Modules may be defined in any source file, packages only in .sv files in the tests directory.
+                    for module_name in entry["modules"]:
+                        module_definitions.setdefault(module_name, file_path)
+                    if directory == TESTS_DIR and file.endswith('.sv'):
+                        for package_name in entry["packages"]:
+                            package_definitions.setdefault(package_name, file_path)
+
+        # Deleted files also change the index.
+        changed = changed or len(files) != len(stored)
+
+        # Save the updated index atomically, as other runs may be reading it.
+        if changed:
+            temp_file = f"{MODULE_INDEX_FILE}.{os.getpid()}.tmp"
+            with open(temp_file, 'w') as index_fh:
+                json.dump({"version": MODULE_INDEX_VERSION, "files": {os.path.relpath(path, TEST_DIR): entry for path, entry in files.items()}}, index_fh)
+            os.replace(temp_file, MODULE_INDEX_FILE)
+
+        MODULE_INDEX = {
+            "files": files,
+            "module_definitions": module_definitions,
+            "package_definitions": package_definitions,
+        }
+        return MODULE_INDEX
+
+
+def resolve_file_dependencies(source_file, index, visiting):
+    """
+    Resolve the compilation order of a source file and everything it depends on, memoizing the result.
+
+    The direct dependencies of each file form the edges of the module-instantiation/package-import graph.
+    The file's order is the union of its dependencies' orders (in the order they are referenced) followed
+    by the file itself, which is a topological order of its subgraph. Orders are cached in
+    `DEPENDENCY_ORDERS` so shared subtrees (e.g. cpu -> Fetch -> BTB/BHT) are resolved once per run.
+
+    Args:
+        source_file (str): Path to the source file to resolve.
+        index (dict): The module/package index from `load_module_index`.
+        visiting (list): The files currently being resolved, used to detect dependency cycles.
+
+    Returns:
+        tuple: The files in compilation order (dependencies first, `source_file` last), a list of
+               diagnostics for unresolved modules/packages and dependency cycles in the subgraph, and
+               whether the order is complete (no cycle passes through a file still being resolved).
+    """
+    if source_file in DEPENDENCY_ORDERS:
+        return DEPENDENCY_ORDERS[source_file]
+
+    # Collect modules instantiated and packages imported in the file, parsing it only if it is not indexed.
+    entry = index["files"].get(source_file)
+    dependencies = entry["dependencies"] if entry is not None else scan_source_file(source_file)["dependencies"]
+
+    visiting.append(source_file)
+    ordered_files = {}
+    diagnostics = []
+    complete = True
+
+    for dep in dependencies:
+        dep_file = index["module_definitions"].get(dep) or index["package_definitions"].get(dep)
+        if dep_file is None:
+            # Keywords and gate primitives can look like instantiations, so they are not reported.
+            if dep not in VERILOG_KEYWORDS:
+                diagnostics.append(f"Unresolved module or package '{dep}' in {os.path.basename(source_file)}.")
+            continue
+        if dep_file == source_file:
+            # A module instantiating itself or another module of the same file needs no ordering.
+            continue
+        if dep_file in visiting:
+            # The back edge closes a cycle, so the order of this subgraph is not final.
+            cycle = visiting[visiting.index(dep_file):] + [dep_file]
+            diagnostics.append("Dependency cycle: " + " -> ".join(os.path.basename(path) for path in cycle) + ".")
+            complete = False
+            continue
+
+        dep_order, dep_diagnostics, dep_complete = resolve_file_dependencies(dep_file, index, visiting)
+        ordered_files.update(dict.fromkeys(dep_order))
+        diagnostics.extend(dep_diagnostics)
+        complete = complete and dep_complete
+
+    visiting.pop()
+    ordered_files[source_file] = None
+    result = (tuple(ordered_files), list(dict.fromkeys(diagnostics)), complete)
+
+    # Only cache orders that do not depend on where the cycle was entered.
+    if complete:
+        DEPENDENCY_ORDERS[source_file] = result
+    return result
+
+
+def find_dependencies(dep_file):
+    """
+    Finds all module and package dependencies for a given SystemVerilog testbench file.
+    
+    This function builds a list of files in the correct compilation order, including all modules
+    and packages required by the provided testbench file. The definitions are taken from the
+    persistent module/package index from `load_module_index`, and resolved subtrees are shared
+    by all testbenches in the run, so each file is resolved only once.
+    
+    Args:
+        dep_file (str): Path to the SystemVerilog testbench file for which dependencies are to be resolved.
+    
+    Returns:
+        tuple: A list of file paths in the correct order for compilation, with every file after the files
+               it depends on and the testbench file last, and a list of dependency diagnostics.
+    """
+    index = load_module_index()
+
+    # The memoized orders are shared across the test threads.
+    with DEPENDENCY_ORDERS_LOCK:
+        ordered_files, diagnostics, _ = resolve_file_dependencies(dep_file, index, [])
+
+    return list(ordered_files), diagnostics
+
+
+def get_library_key(test_name):
+    """
+    Compute a key identifying the compiled contents of a testbench's work library.
+
+    Args:
+        test_name (str): The name of the testbench.
+
+    Returns:
+        str: The SHA-1 of the compile manifests of the work library and of the libraries it was
+             compiled against, which change whenever any of them is recompiled.
+    """
+    key = hashlib.sha1()
+    manifest_file = os.path.join(WORK_DIR, test_name, "compile_manifest.json")
+    manifest = load_compile_manifest(manifest_file)
+    library_files = [manifest_file] + [
+        os.path.join(os.path.normpath(os.path.join(TEST_DIR, library)), "compile_manifest.json")
+        for library in re.findall(r'-L (\S+)', manifest["flags"] or "")
+    ]
+    for library_file in library_files:
+        key.update(library_file.encode())
+        try:
+            with open(library_file, 'rb') as manifest_fh:
+                key.update(manifest_fh.read())
+        except OSError:
+            pass
+    return key.hexdigest()
+
+
+def load_signal_index(test_name, args):
+    """
+    Load the signal hierarchy of a testbench, dumping it with the simulator backend if the cached one is stale.
+
+    The hierarchy is stored in `tests/output/signal_index/<test_name>.json` along with the key of the
+    work library it was dumped from (see `get_library_key`), so it is dumped again only after the
+    testbench or a design file it depends on is recompiled.
+
+    Args:
+        test_name (str): The name of the testbench.
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+
+    Returns:
+        list of str: The full hierarchy path of every signal under the testbench, in the order the simulator found them.
+
+    Raises:
+        SystemExit: If the simulator records no waveforms or fails to load the testbench.
+    """
+    dump_signals = get_backend(args)["signals"]
+    if dump_signals is None:
+        print(f"{test_name}: The {args.simulator} simulator records no waveforms to add signals to.")
+        sys.exit(1)
+
+    index_file = os.path.join(SIGNAL_INDEX_DIR, f"{test_name}.json")
+    library_key = get_library_key(test_name)
+
+    try:
+        with open(index_file, 'r') as index_fh:
+            stored = json.load(index_fh)
+        if stored.get("version") == SIGNAL_INDEX_VERSION and stored.get("key") == library_key:
+            return stored["signals"]
+    except (OSError, ValueError):
+        # A missing or corrupt index is dumped again.
+        pass
+
+    # Dump every signal below the testbench in one simulator run.
+    signals = dump_signals(test_name)
+
+    # Save the index atomically, as other runs may be reading it.
+    temp_file = f"{index_file}.{os.getpid()}.tmp"
+    with open(temp_file, 'w') as index_fh:
+        json.dump({"version": SIGNAL_INDEX_VERSION, "key": library_key, "signals": signals}, index_fh)
+    os.replace(temp_file, index_file)
+
+    return signals
+
+
+def find_signals(signal_names, test_name, args):
+    """
+    Find the full hierarchy paths for the given signal names.
+
+    All names are resolved against the testbench's signal hierarchy index (see `load_signal_index`),
+    so any number of signals takes at most one simulator run. If a full path is provided for a signal,
+    it is directly added to the result. Otherwise, the signal is resolved in the following order:
+        - A signal whose name matches exactly, the one nearest the top of the hierarchy first.
+        - The only signal whose name starts with the given name.
+        - The signal whose name is the closest match to the given name.
+
+    Args:
+        signal_names (list of str): List of signal names to search for. Full paths or partial names are accepted.
+        test_name (str): The test name used to determine the required signals.
+        args (argparse.Namespace): Command-line arguments containing the `simulator`.
+
+    Returns:
+        list of str: A list of full hierarchy paths for the provided signals. If a signal cannot be resolved,
+                     it is not included in the returned list.
+    """
+    # List to store resolved signal paths.
+    signal_paths = []
 
-            # Flag to indicate if the signal was found.
-            found_signal = False 
+    # The hierarchy is only loaded if a name needs resolving, and the signals are grouped by name once.
+    signals_by_name = None
 
-            # Process the vsim output to extract signal paths.
-            for part in result.stdout.split():
-                # Skip irrelevant lines and comments in the vsim output.
-                if part.startswith("#") or not part.strip() or part.strip() in ["//", "-access/-debug"]:
-                    continue
+    for signal in signal_names:
+        # If the signal name already includes a full path, add it directly to the list.
+        if "/" in signal:
+            signal_paths.append(signal)
+            continue
 
-                # Check if the output line contains a valid path
-                if "/" in part:
-                    # Match the last component of the path with the signal name
-                    if part.strip().split("/")[-1] == signal and not found_signal:
-                        signal_paths.append(part.strip())
-                        found_signal = True  # Avoid duplicate entries for the same signal.
-        except subprocess.CalledProcessError as e:
-            # Handle errors from the vsim command and provide feedback.
-            print(f"{test_name}: Error finding signal {signal}: {e.stderr.decode('utf-8')}")
-            sys.exit(1)
+        if signals_by_name is None:
+            signals_by_name = {}
+            for path in sorted(load_signal_index(test_name, args), key=lambda path: path.count("/")):
+                signals_by_name.setdefault(path.split("/")[-1], []).append(path)
+
+        # Exact match of the signal name, nearest the top of the hierarchy.
+        if signal in signals_by_name:
+            signal_paths.append(signals_by_name[signal][0])
+            continue
+
+        # Unique prefix match, then the closest name.
+        candidates = [name for name in signals_by_name if name.startswith(signal)]
+        if len(candidates) > 1:
+            print(f"{test_name}: Signal {signal} is ambiguous, matching {', '.join(sorted(candidates)[:10])}. Skipping it.")
+            continue
+        if not candidates:
+            candidates = difflib.get_close_matches(signal, signals_by_name, n=1, cutoff=0.8)
+        if candidates:
+            print(f"{test_name}: Signal {signal} not found, using {candidates[0]}.")
+            signal_paths.append(signals_by_name[candidates[0]][0])
+        else:
+            print(f"{test_name}: Signal {signal} not found.")
 
     return signal_paths
 
@@ -813,7 +2150,7 @@ def get_wave_command(test_name, args):
     signals_to_use = [signal.strip() for signal in user_input.split(",") if signal.strip()]
 
     # Find full hierarchy paths for the selected signals.
-    signal_paths = find_signals(signals_to_use, test_name)
+    signal_paths = find_signals(signals_to_use, test_name, args)
 
     if not signal_paths:
         print(f"{test_name}: No signals found. Exiting...")
@@ -829,7 +2166,86 @@ def get_wave_command(test_name, args):
     return add_wave_command
 
 
-def get_gui_command(test_name, log_file, args):
+def load_log_profile(test_name):
+    """
+    Load the waveform logging profile of a testbench, if it has one.
+
+    The profile `tests/add_wave_commands/<test_name>_log_profile.txt` holds one directive per line:
+        - `scope <hierarchy prefix>`: Log every signal below the prefix (e.g. `scope iDUT/iFETCH`), in
+          addition to the signals of the wave command.
+        - `window <start ns> [<end ns>]`: Only log signals from the start time until the end time.
+    Blank lines and lines starting with `#` are ignored.
+
+    Args:
+        test_name (str): The name of the testbench.
+
+    Returns:
+        dict: The `scopes` to log and the `window` (start, end) in ps, where the end may be None.
+
+    Raises:
+        SystemExit: If the profile holds an invalid directive.
+    """
+    profile = {"scopes": [], "window": (0, None)}
+    profile_file = os.path.join(WAVE_CMD_DIR, f"{test_name}{LOG_PROFILE_SUFFIX}")
+    if not os.path.exists(profile_file):
+        return profile
+
+    with open(profile_file, "r") as profile_fh:
+        for line_number, line in enumerate(profile_fh, 1):
+            words = line.split()
+            try:
+                if not words or words[0].startswith("#"):
+                    continue
+                elif words[0] == "scope" and len(words) == 2:
+                    profile["scopes"].append(words[1].rstrip("/*"))
+                elif words[0] == "window" and len(words) in (2, 3):
+                    start = int(float(words[1]) * TIME_UNITS_PS["ns"])
+                    end = int(float(words[2]) * TIME_UNITS_PS["ns"]) if len(words) == 3 else None
+                    profile["window"] = (start, end)
+                else:
+                    raise ValueError(line.strip())
+            except ValueError:
+                print(f"{test_name}: Invalid directive on line {line_number} of {os.path.basename(profile_file)}: {line.strip()}")
+                sys.exit(1)
+
+    return profile
+
+
+def get_logging_script(test_name, add_wave_command, start_time=None, end_time=None):
+    """
+    Generate the part of a vsim script that runs a simulation while logging the selected signals.
+
+    Only the signals of the wave command and the scopes of the testbench's logging profile are logged
+    (see `load_log_profile`), and only within the profile's time window, starting no earlier than the
+    given start time and ending no later than the given end time.
+
+    Args:
+        test_name (str): The name of the testbench.
+        add_wave_command (str): The `add wave` commands of the signals to show.
+        start_time (int, optional): Simulation time in ps to start logging at. Defaults to the start of the window.
+        end_time (int, optional): Simulation time in ps to stop the simulation at. Defaults to its end.
+
+    Returns:
+        str: The script, running the simulation to its end or to the end time.
+    """
+    profile = load_log_profile(test_name)
+    start, end = profile["window"]
+    start = max(start, start_time or 0)
+    if end_time is not None:
+        end = end_time if end is None else min(end, end_time)
+
+    # Run up to the start of the window before adding the waves, so nothing before it is logged.
+    script = f"run @{start} ps; " if start else ""
+    script += f"{add_wave_command} "
+    script += "".join(f"log -r {scope}/*; " for scope in profile["scopes"])
+
+    # Stop logging at the end of the window, then run the simulation to its end unless it stops at the end time.
+    if end is not None and end > start:
+        script += f"run @{end} ps; nolog -all; "
+    return script if end_time is not None else script + "run -all;"
+
+
+def get_gui_command(test_name, log_file, args, start_time=None, checkpoint=None, end_time=None):
     """
     Generate the simulation command for GUI-based waveform viewing.
 
@@ -837,6 +2253,9 @@ def get_gui_command(test_name, log_file, args):
         test_name (str): The name of the testbench, used to locate waveform files.
         log_file (str): Path to the log file for saving simulation output.
         args (argparse.Namespace): Command-line arguments, including simulation mode.
+        start_time (int, optional): Simulation time in ps to start recording waveforms at. Defaults to the start.
+        checkpoint (str, optional): Checkpoint to restore the simulation from instead of starting it from time zero.
+        end_time (int, optional): Simulation time in ps to stop the simulation at. Defaults to its end.
 
     Returns:
         str: The complete simulation command string for GUI-based waveform generation.
@@ -845,27 +2264,33 @@ def get_gui_command(test_name, log_file, args):
         - Constructs a GUI simulation command with flags to generate waveforms.
         - Retrieves or generates waveform commands for signals.
         - Adds options to save waveform formats and logs.
+        - Logs only the selected signals and the scopes of the logging profile, within its time window
+          from the start time on and up to the end time (see `get_logging_script`).
         - Adjusts command to quit after simulation based on the mode.
     """
     # Define paths for waveform files.
     wave_file = os.path.join(WAVES_DIR, f"{test_name}.wlf")
     wave_format_file = os.path.join(WAVES_DIR, f"{test_name}.do")
 
-    # Get the waveform commands for signal addition.
-    add_wave_command = get_wave_command(test_name, args)
+    # Get the waveform commands for signal addition, and log them (and the profile's scopes) from the start to the end time.
+    logging_script = get_logging_script(test_name, get_wave_command(test_name, args), start_time, end_time)
+
+    # Restore the design state from a checkpoint, or load the design.
+    design, library_options = f"./tests/WORK/{test_name}.{test_name}", get_library_options(test_name)
+    if checkpoint:
+        design, library_options = f"-restore {checkpoint}", ""
 
     # Construct the simulation command based on post-synthesis.
     sim_command = (
-        f"vsim -wlf {wave_file} ./tests/WORK/{test_name}.{test_name} -logfile {log_file} -voptargs='+acc' "
-        f"-do '{add_wave_command} run -all; write format wave -window .main_pane.wave.interior.cs.body.pw.wf {wave_format_file}; log -flush /*;'"
+        f"vsim -wlf {wave_file} {library_options}{design} -logfile {log_file} -voptargs='+acc' "
+        f"-do '{logging_script} write format wave -window .main_pane.wave.interior.cs.body.pw.wf {wave_format_file};'"
     )
 
     if args.synth:
         sim_command = (
-            f"vsim -wlf {wave_file} ./tests/WORK/{test_name}.{test_name} -logfile {log_file} -t ns "
-            f"-Lf {CELL_LIBRARY_PATH} -voptargs='+acc' -do '{add_wave_command} run -all; "
-            f"write format wave -window .main_pane.wave.interior.cs.body.pw.wf {wave_format_file}; "
-            f"log -flush /*;'"
+            f"vsim -wlf {wave_file} {design} -logfile {log_file} -t ns "
+            f"-Lf {CELL_LIBRARY_PATH} -voptargs='+acc' -do '{logging_script} "
+            f"write format wave -window .main_pane.wave.interior.cs.body.pw.wf {wave_format_file};'"
         )
 
     # Ensure the simulation quits after completion for certain modes.
@@ -888,24 +2313,29 @@ def run_simulation(test_name, log_file, args):
         str: The result of the simulation ("success", "error", "warning", or "unknown").
 
     Description:
-        - Mode 0: Command-line simulation without GUI.
+        - Mode 0: Command-line simulation without GUI, logging no signals (the waveforms of a failure are
+          recorded by a re-run, see `run_test`). With the session option, it runs in the session server,
+          elaborating the design only once (see `run_session_simulation`).
         - Mode 1: GUI simulation with waveform saving.
         - Mode 2: Full GUI mode for debugging.
         - Constructs the appropriate simulation command and executes it.
-        - Logs simulation output and returns the status based on log file checks.
+        - Logs simulation output and returns the status based on log file checks. In command-line
+          mode the transcript is checked while the simulation runs, stopping it after a failure.
     """
     # Define paths for the wave file.
     wave_file = os.path.join(WAVES_DIR, f"{test_name}.wlf")
+    backend = get_backend(args)
+    session_options = None
 
     if args.mode == 0:
         if not args.all:
             print(f"{test_name}: Running in command-line mode...")
-        sim_command = f"vsim -c ./tests/WORK/{test_name}.{test_name} -wlf {wave_file} -logfile {log_file} -do 'run -all; log -flush /*; quit -f;'"
+        run_script = get_checkpoint_script(test_name, args.checkpoint) if args.checkpoint > 0 else "run -all;"
+        sim_command = backend["command"](test_name, args, run_script, log_file, wave_file)
 
-        # Modify the command for post synthesis.
-        if args.synth:
-            sim_command = f"vsim -c ./tests/WORK/{test_name}.{test_name} -wlf {wave_file} -logfile {log_file} -t ns " \
-                    f"-Lf {CELL_LIBRARY_PATH} -do 'run -all; log -flush /*; quit -f;'"        
+        # Options loading the design into a session of the session server, if the backend has sessions.
+        if args.session and backend["session"]:
+            session_options = backend["session"](test_name, args)
     else:
         if args.mode == 1:
             if not args.all:
@@ -916,10 +2346,16 @@ def run_simulation(test_name, log_file, args):
 
         sim_command = get_gui_command(test_name, log_file, args)
 
-    # Execute the simulation command.
-    with open(log_file, 'w') as log_fh:
+    # Execute the simulation command, monitoring the transcript in command-line mode.
+    status = None
+    with open(log_file, 'w') as log_fh, timed_stage("simulation"):
         try:
-            subprocess.run(sim_command, shell=True, stdout=log_fh, stderr=subprocess.PIPE, check=True)
+            if args.mode == 0 and session_options:
+                status = run_session_simulation(test_name, session_options, run_script, log_fh, args.grace, TEST_DIR, args.jobs)
+            elif args.mode == 0:
+                status = run_monitored_simulation(sim_command, log_fh, args.grace, stop_message=backend["stop_message"])
+            else:
+                run_command(sim_command, stdout=log_fh)
         except subprocess.CalledProcessError as e:
             if args.all:
                 print(f"{test_name}: Running test failed with error {e.returncode}. Run 'make log t' for details. {e.stderr.decode('utf-8')}")
@@ -934,7 +2370,137 @@ def run_simulation(test_name, log_file, args):
     if TEST_FILE is not None:
         rename_sim_files()
 
-    return check_logs(log_file, "t")
+    if status is not None:
+        return status
+
+    with timed_stage("log_check"):
+        return check_logs(log_file, "t")
+
+
+def get_checkpoint_script(test_name, interval):
+    """
+    Generate the vsim script running a simulation to its end, checkpointing it periodically.
+
+    Args:
+        test_name (str): The name of the testbench, naming its checkpoints.
+        interval (float): Nanoseconds between checkpoints.
+
+    Returns:
+        str: The script, writing checkpoint k at k * interval ns to `tests/output/waves/checkpoints/<test_name>_<k>.cpt`
+             until the simulation stops or runs out of events.
+    """
+    checkpoint_dir = os.path.join(WAVES_DIR, "checkpoints")
+    clear_checkpoints(test_name)
+    Path(checkpoint_dir).mkdir(parents=True, exist_ok=True)
+    return (
+        f"set k 0; while {{1}} {{ run {interval:g} ns; "
+        f"if {{[runStatus] ne \"ready\" || [string match \"*end*\" [runStatus -full]]}} break; "
+        f"incr k; checkpoint {checkpoint_dir}/{test_name}_$k.cpt }};"
+    )
+
+
+def clear_checkpoints(test_name):
+    """
+    Remove the checkpoints of a testbench's last simulation.
+
+    Args:
+        test_name (str): The name of the testbench.
+    """
+    for checkpoint in Path(WAVES_DIR, "checkpoints").glob(f"{test_name}_*.cpt"):
+        checkpoint.unlink()
+
+
+def prune_waves(args):
+    """
+    Apply the retention policy to the saved waveforms.
+
+    Args:
+        args (argparse.Namespace): Command-line arguments containing `wave_keep` and `wave_retention`.
+
+    Description:
+        - Keeps the `wave_keep` most recently written waveform files (`.wlf`) as they are.
+        - Compresses the older ones to `.wlf.gz`, which `view_waveforms` decompresses again when needed.
+        - Removes compressed waveform files, and their `.do` files, last written more than
+          `wave_retention` days ago.
+    """
+    waves = sorted(Path(WAVES_DIR).glob("*.wlf"), key=lambda wave: wave.stat().st_mtime, reverse=True)
+    for wave in waves[max(args.wave_keep, 0):]:
+        compressed = wave.with_name(f"{wave.name}.gz")
+        with open(wave, "rb") as wave_fh, gzip.open(f"{compressed}.{os.getpid()}.tmp", "wb") as compressed_fh:
+            shutil.copyfileobj(wave_fh, compressed_fh)
+        os.replace(f"{compressed}.{os.getpid()}.tmp", compressed)
+        os.utime(compressed, (wave.stat().st_atime, wave.stat().st_mtime))
+        wave.unlink()
+
+    expiry = time.time() - args.wave_retention * 24 * 60 * 60
+    for compressed in Path(WAVES_DIR).glob("*.wlf.gz"):
+        if compressed.stat().st_mtime < expiry:
+            compressed.unlink()
+            Path(WAVES_DIR, compressed.name[:-len(".wlf.gz")] + ".do").unlink(missing_ok=True)
+
+
+def find_checkpoint(test_name, start_time, interval):
+    """
+    Find the latest checkpoint of a testbench's last simulation taken no later than a time.
+
+    Args:
+        test_name (str): The name of the testbench.
+        start_time (int): The simulation time in ps the checkpoint must not be later than.
+        interval (float): Nanoseconds between the checkpoints.
+
+    Returns:
+        str or None: Path to the checkpoint, or None if there is none.
+    """
+    if interval <= 0:
+        return None
+    checkpoints = {}
+    for checkpoint in Path(WAVES_DIR, "checkpoints").glob(f"{test_name}_*.cpt"):
+        index = checkpoint.stem[len(test_name) + 1:]
+        if index.isdigit() and int(index) * interval * TIME_UNITS_PS["ns"] <= start_time:
+            checkpoints[int(index)] = str(checkpoint)
+    return checkpoints[max(checkpoints)] if checkpoints else None
+
+
+def find_failure_time(log_file):
+    """
+    Find the simulation time of the first failure in a transcript.
+
+    The time is only taken from the first failing line itself, either from the `@ Cycle: N` the
+    testbench checks report (N clock periods), or from the `Time:` line vsim prints right under it or
+    under a $stop directly after it. Most testbench checks print their error and keep running, so a
+    time reported later (e.g. by the $stop ending the test) is not the failure's.
+
+    Args:
+        log_file (str): Path to the simulation transcript.
+
+    Returns:
+        int or None: The failure time in ps, or None if the failing line reports no time.
+    """
+    failing_line, next_lines = None, []
+    with open(log_file, "r", errors="replace") as log_fh:
+        for line in log_fh:
+            if failing_line is not None:
+                next_lines.append(line)
+                if len(next_lines) == 2:
+                    break
+            elif update_transcript_status("unknown", line) == "error":
+                failing_line = line
+    if failing_line is None:
+        return None
+
+    # The testbench checks count cycles as `$time/10`, i.e. in clock periods.
+    match = SIM_CYCLE_PATTERN.search(failing_line)
+    if match:
+        return int(match.group(1)) * CLOCK_PERIOD_PS
+
+    # vsim reports the time of its own messages on the line after them, e.g. "#    Time: 50 ns  Iteration: 0",
+    # which also dates a $stop run right after the failing line.
+    match = SIM_TIME_PATTERN.search(failing_line)
+    if match is None and next_lines and re.match(r'#\s+\*\* Note: \$stop', next_lines[0]):
+        next_lines.pop(0)
+    if match is None and next_lines and re.match(r'#\s+Time:', next_lines[0]):
+        match = SIM_TIME_PATTERN.search(next_lines[0])
+    return int(float(match.group(1)) * TIME_UNITS_PS[match.group(2)]) if match else None
 
 
 def rename_sim_files():
@@ -971,7 +2537,8 @@ def run_test(test_name, args):
         args (argparse.Namespace): Command-line arguments, including simulation mode.
 
     Returns:
-        None: Prints the test result status to the console.
+        str: The result of the simulation ("success", "error", "warning", or "unknown"),
+             after printing the test result status to the console.
 
     Description:
         - Executes the simulation using `run_simulation`.
@@ -988,25 +2555,45 @@ def run_test(test_name, args):
         print(f"{test_name}: YAHOO!! All tests passed.")
     elif result == "error":
         if args.mode == 0:
+            # Only backends recording waveforms re-run the failure, the others keep its transcript.
+            saving = " Saving waveforms for later debug..." if get_backend(args)["signals"] else ""
             if args.all:
-                print(f"{test_name}: Test failed. Run 'make log t' for details. Saving waveforms for later debug...")
+                print(f"{test_name}: Test failed. Run 'make log t' for details.{saving}")
             else:
                 # Print log file contents in case of an error when running a single test.
                 with open(log_file, 'r') as log_fh:
                     print(f"\n===== Running {test_name} failed with the following errors =====\n")
                     print(log_fh.read())
-                    print(f"{test_name}: Saving waveforms for later debug...")
-
-            debug_command = get_gui_command(test_name, log_file, args)
-            with open(log_file, 'w') as log_fh:
+                    if saving:
+                        print(f"{test_name}:{saving}")
+            if not saving:
+                return result
+
+            # Re-run to record the window before the failure, restoring the nearest checkpoint before it,
+            # into a log of its own so the transcript of the failing run is kept. The re-run stops a clock
+            # period after the failure, so the failing cycle is recorded too.
+            debug_log_file = os.path.join(TRANSCRIPT_DIR, f"{test_name}_waveform.log")
+            with timed_stage("waveform_rerun"):
+                failure_time = find_failure_time(log_file)
+                start_time = end_time = None
+                if failure_time is not None and args.wave_window >= 0:
+                    start_time = max(failure_time - int(args.wave_window * TIME_UNITS_PS["ns"]), 0)
+                    end_time = failure_time + CLOCK_PERIOD_PS
+                    if not args.all:
+                        print(f"{test_name}: Recording waveforms from {start_time / TIME_UNITS_PS['ns']:g} ns to the failure at {failure_time / TIME_UNITS_PS['ns']:g} ns...")
+                elif failure_time is None and args.wave_window >= 0 and not args.all:
+                    print(f"{test_name}: The failing line reports no time, recording waveforms for the whole run...")
+                checkpoint = find_checkpoint(test_name, start_time, args.checkpoint) if start_time else None
+                debug_command = get_gui_command(test_name, debug_log_file, args, start_time, checkpoint, end_time)
+            with open(debug_log_file, 'w') as log_fh, timed_stage("waveform_rerun"):
                 try:
-                    subprocess.run(debug_command, shell=True, stdout=log_fh, stderr=subprocess.PIPE, check=True)
+                    run_command(debug_command, stdout=log_fh)
                 except subprocess.CalledProcessError as e:
                     if args.all:
                         print(f"{test_name}: Running test failed with error {e.returncode}. Run 'make log t' for details. {e.stderr.decode('utf-8')}")
                     else:
                         # Print log file contents in case of an error when running a single test.
-                        with open(log_file, 'r') as log_fh:
+                        with open(debug_log_file, 'r') as log_fh:
                             print(f"\n===== Running {test_name} failed with the following errors =====\n")
                             print(log_fh.read())
                     sys.exit(1)
@@ -1017,6 +2604,12 @@ def run_test(test_name, args):
     elif result == "unknown":
         print(f"{test_name}: Unknown status. Run 'make log t' for details.")
 
+    # The checkpoints are only kept until the waveforms of a failure are recorded.
+    if args.mode == 0 and args.checkpoint > 0:
+        clear_checkpoints(test_name)
+
+    return result
+
 
 def view_waveforms(test_name, args):
     """
@@ -1034,6 +2627,7 @@ def view_waveforms(test_name, args):
 
     Description:
         - Changes the current directory to the waveform directory (`WAVES_DIR`).
+        - Decompresses the waveform first if `prune_waves` compressed it.
         - Opens a transcript file specific to the testbench to log output.
         - Constructs and executes a simulator command to load the saved waveform (`.wlf`)
           and associated script (`.do` file).
@@ -1043,19 +2637,19 @@ def view_waveforms(test_name, args):
     # Change to the waveforms directory to access saved waveform files.
     os.chdir(WAVES_DIR)
 
+    # Decompress the waveform if it was compressed by the retention policy.
+    if not os.path.exists(f"{test_name}.wlf") and os.path.exists(f"{test_name}.wlf.gz"):
+        with gzip.open(f"{test_name}.wlf.gz", "rb") as compressed_fh, open(f"{test_name}.wlf", "wb") as wave_fh:
+            shutil.copyfileobj(compressed_fh, wave_fh)
+        os.remove(f"{test_name}.wlf.gz")
+
     # View the saved waveforms by invoking the simulator.
     with open(f"{test_name}_transcript", 'w') as transcript:
         if not args.all:
             print(f"{test_name}: Viewing saved waveforms...")
         sim_command = f"vsim -view {test_name}.wlf -do {test_name}.do;"
         try:
-            subprocess.run(
-                sim_command,
-                shell=True,
-                stdout=transcript,
-                stderr=subprocess.PIPE,
-                check=True
-            )
+            run_command(sim_command, stdout=transcript)
         except subprocess.CalledProcessError as e:
             # Print error details and exit if the command fails.
             if args.all:
@@ -1136,8 +2730,14 @@ def execute_test(test_name, args):
     The function performs the following steps:
     1. Resolves the full file path for the testbench file.
     2. Finds all the dependencies required for compiling the testbench.
-    3. Compiles the required files if necessary.
-    4. Executes the testbench with the provided arguments.
+    3. Skips the testbench if the simulator cannot run it (see `find_unsupported_features`).
+    4. In command-line mode, replays the cached result if nothing the testbench depends on changed
+       since it last ran (see `get_result_key`), unless forced to re-run.
+    5. Compiles the required files if necessary.
+    6. Executes the testbench with the provided arguments, caching its verdict.
+
+    Returns:
+        str: The result of the simulation (see `run_test`), or "unsupported" if the testbench was skipped.
     """
     # First, try to find the file with the .sv extension.
     test_file_sv = os.path.join(TESTS_DIR, f"{test_name}.sv")
@@ -1149,52 +2749,407 @@ def execute_test(test_name, args):
         # Fallback to .v if .sv doesn't exist.
         test_file = os.path.join(TESTS_DIR, f"{test_name}.v")
 
-    # Find all dependencies for the testbench.
-    all_dependencies = find_dependencies(test_file)
+    # Find all dependencies for the testbench, reporting any unresolved modules or dependency cycles.
+    with timed_stage("dependencies"):
+        all_dependencies, diagnostics = find_dependencies(test_file)
+    for diagnostic in diagnostics:
+        print(f"{test_name}: {diagnostic}")
+
+    # Skip testbenches the simulator cannot run.
+    features = find_unsupported_features(all_dependencies, args)
+    if features:
+        print(f"{test_name}: The {args.simulator} simulator cannot run this testbench, it uses {', '.join(features)}.")
+        return "unsupported"
+
+    # Replay the result of a command-line test if nothing it depends on changed since it last ran.
+    result_key = None
+    if args.mode == 0 and not args.synth:
+        result_key = get_result_key(test_name, all_dependencies, args)
+        cached = None if args.force else get_cached_result(test_name, result_key)
+        if cached is not None:
+            transcript = restore_result(test_name, result_key, cached)
+            labels = {"success": "YAHOO!! All tests passed.", "warning": "Test completed with warnings.", "error": "Test failed."}
+            print(f"{test_name}: {labels[cached['status']]} (cached result of {cached['timestamp']}, see {os.path.relpath(transcript, TEST_DIR)})")
+            TEST_CONTEXT.sim_stats = cached["sim_stats"]
+            TEST_CONTEXT.cached = True
+            return cached["status"]
     
     # Compile the necessary files (if needed) for the testbench.
-    compile_files(test_name, all_dependencies, args)
+    with timed_stage("compile"):
+        compile_files(test_name, all_dependencies, args)
 
     # Run the actual test using the provided arguments.
-    run_test(test_name, args)
+    start_timestamp = time.time()
+    result = run_test(test_name, args)
+
+    # Read the statistics of the SIMLOG, which is renamed after the input file if one was assembled.
+    if TEST_FILE is not None:
+        TEST_CONTEXT.sim_stats = read_sim_stats(os.path.join(OUTPUTS_DIR, f"{TEST_FILE}_verilogsim.log.txt"), start_timestamp)
+    else:
+        TEST_CONTEXT.sim_stats = read_sim_stats(os.path.join(OUTPUTS_DIR, "verilogsim.log"), start_timestamp)
+
+    # Cache the verdict for the next run, with copies of the transcript and the simulation logs it wrote.
+    if result_key is not None and result in CACHED_STATUSES:
+        sim_files = [sim_file for sim_file in get_sim_files() if os.path.exists(sim_file) and os.path.getmtime(sim_file) >= start_timestamp]
+        store_result(test_name, result_key, result, os.path.join(TRANSCRIPT_DIR, f"{test_name}_transcript.log"), sim_files, TEST_CONTEXT.sim_stats)
+
+    return result
+
+
+def get_result_key(test_name, dependencies, args):
+    """
+    Compute the result cache key of a command-line test.
+
+    The key covers everything the verdict of the simulation and its outputs depend on: the content
+    keys of all the testbench's files (see `get_compile_keys`), the memory images they load, the
+    simulator and its compile flags, the grace period, the mode and the assembled input file the
+    simulation logs are named after (TEST_FILE).
+
+    Args:
+        test_name (str): The name of the testbench.
+        dependencies (list): All .v/.sv files of the testbench.
+        args (argparse.Namespace): Command-line arguments, including the simulator and mode.
+
+    Returns:
+        str: The SHA-1 hex digest of the key.
+    """
+    key = hashlib.sha1()
+    key.update(f"{RESULT_CACHE_VERSION} {test_name} {args.mode} {args.grace:g} {args.simulator} {TEST_FILE}".encode())
+    key.update(get_backend(args)["flags"](args).encode())
+
+    for dependency, compile_key in sorted(get_compile_keys(dependencies).items()):
+        key.update(f"{dependency} {compile_key}".encode())
+
+        # Hash the memory images the file loads, relative to the directory the simulation runs in.
+        with open(dependency, 'r', errors='replace') as source_fh:
+            images = READMEM_PATTERN.findall(COMMENT_PATTERN.sub("", source_fh.read()))
+        for image in sorted(set(images)):
+            try:
+                with open(os.path.join(TEST_DIR, image), 'rb') as image_fh:
+                    key.update(f"{image} {hashlib.sha1(image_fh.read()).hexdigest()}".encode())
+            except OSError:
+                key.update(f"{image} missing".encode())
+
+    return key.hexdigest()
+
+
+def load_result_cache():
+    """
+    Load the cached results of the tests in the selected directory.
+
+    Returns:
+        dict: Mapping of test names to their cached result, with the `key` it is valid for, the
+              `status`, the names of the `sim_files` copied, the `sim_stats` and the `timestamp` of the run.
+    """
+    try:
+        with open(RESULT_CACHE_FILE, 'r') as cache_fh:
+            cache = json.load(cache_fh)
+        return cache["tests"] if cache.get("version") == RESULT_CACHE_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def get_cached_result(test_name, key):
+    """
+    Get the cached result of a test, if it is valid for the key and its copied transcript still exists.
+
+    Args:
+        test_name (str): The name of the testbench.
+        key (str): The result cache key of the test (see `get_result_key`).
+
+    Returns:
+        dict or None: The cached result, or None on a miss.
+    """
+    with RESULT_CACHE_LOCK:
+        entry = load_result_cache().get(test_name)
+    if entry is None or entry["key"] != key or not os.path.exists(os.path.join(RESULT_CACHE_DIR, key, "transcript.log")):
+        return None
+    return entry
+
+
+def get_sim_files():
+    """
+    Get the simulation logs a run of the current test writes, named as `rename_sim_files` leaves them.
+
+    Returns:
+        list: Paths of the trace and SIMLOG files in the outputs directory.
+    """
+    if TEST_FILE is not None:
+        return [os.path.join(OUTPUTS_DIR, f"{TEST_FILE}_verilogsim.trace.txt"), os.path.join(OUTPUTS_DIR, f"{TEST_FILE}_verilogsim.log.txt")]
+    return [os.path.join(OUTPUTS_DIR, "verilogsim.trace"), os.path.join(OUTPUTS_DIR, "verilogsim.log")]
+
+
+def store_result(test_name, key, status, transcript, sim_files, sim_stats):
+    """
+    Store the result of a test in the result cache atomically.
+
+    The transcript and simulation logs are copied to `tests/output/result_cache/<key>`, as the
+    originals are overwritten by the next run of the test, and the copies of the previous result
+    of the test are removed.
+
+    Args:
+        test_name (str): The name of the testbench.
+        key (str): The result cache key of the test (see `get_result_key`).
+        status (str): The verdict of the test, one of CACHED_STATUSES.
+        transcript (str): Path to the transcript of the run.
+        sim_files (list): Paths of the simulation logs the run wrote (see `get_sim_files`).
+        sim_stats (dict): The SIMLOG statistics of the run (see `read_sim_stats`).
+    """
+    result_dir = os.path.join(RESULT_CACHE_DIR, key)
+    temp_dir = f"{result_dir}.{os.getpid()}.tmp"
+    Path(temp_dir).mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(transcript, os.path.join(temp_dir, "transcript.log"))
+    for sim_file in sim_files:
+        shutil.copyfile(sim_file, os.path.join(temp_dir, os.path.basename(sim_file)))
+
+    with RESULT_CACHE_LOCK:
+        cache = load_result_cache()
+        previous = cache.get(test_name, {}).get("key")
+        if os.path.isdir(result_dir):
+            shutil.rmtree(result_dir)
+        os.replace(temp_dir, result_dir)
+        if previous is not None and previous != key:
+            shutil.rmtree(os.path.join(RESULT_CACHE_DIR, previous), ignore_errors=True)
+
+        cache[test_name] = {
+            "key": key, "status": status, "sim_files": [os.path.basename(sim_file) for sim_file in sim_files],
+            "sim_stats": sim_stats, "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        temp_file = f"{RESULT_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(temp_file, 'w') as cache_fh:
+            json.dump({"version": RESULT_CACHE_VERSION, "tests": cache}, cache_fh, indent=2)
+        os.replace(temp_file, RESULT_CACHE_FILE)
+
+
+def restore_result(test_name, key, cached):
+    """
+    Restore the transcript and simulation logs of a cached result, as the run it replays left them.
+
+    Args:
+        test_name (str): The name of the testbench.
+        key (str): The result cache key of the test (see `get_result_key`).
+        cached (dict): The cached result (see `get_cached_result`).
+
+    Returns:
+        str: Path to the restored transcript of the test.
+    """
+    result_dir = os.path.join(RESULT_CACHE_DIR, key)
+    transcript = os.path.join(TRANSCRIPT_DIR, f"{test_name}_transcript.log")
+    shutil.copyfile(os.path.join(result_dir, "transcript.log"), transcript)
+    for sim_file in cached["sim_files"]:
+        if os.path.exists(os.path.join(result_dir, sim_file)):
+            shutil.copyfile(os.path.join(result_dir, sim_file), os.path.join(OUTPUTS_DIR, sim_file))
+    return transcript
+
+
+def load_test_history():
+    """
+    Load the recorded runtimes of the tests in the selected directory.
+
+    Returns:
+        dict: Mapping of test names to their most recent runtimes in seconds, oldest first.
+    """
+    try:
+        with open(TEST_HISTORY_FILE, 'r') as history_fh:
+            return json.load(history_fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_test_history(history):
+    """
+    Save the recorded runtimes of the tests atomically, keeping only the most recent runs.
+
+    Args:
+        history (dict): Mapping of test names to their runtimes in seconds, oldest first.
+    """
+    temp_file = f"{TEST_HISTORY_FILE}.{os.getpid()}.tmp"
+    with open(temp_file, 'w') as history_fh:
+        json.dump({test_name: runtimes[-TEST_HISTORY_RUNS:] for test_name, runtimes in history.items()}, history_fh, indent=2)
+    os.replace(temp_file, TEST_HISTORY_FILE)
+
+
+def run_scheduled_test(job, test_name, args):
+    """
+    Run a test job on a worker thread, containing any failure to the test that caused it.
+
+    A job that exits (e.g. on a compilation error), raises an exception or exceeds the
+    per-test timeout is reported for its test, and the other tests continue to run.
+
+    Args:
+        job (callable): The job to run, `execute_test` or `view_waveforms`.
+        test_name (str): The name of the testbench.
+        args (argparse.Namespace): The parsed command-line arguments containing execution details.
+
+    Returns:
+        dict: The test's `status` ("success", "error", "warning", "unknown", "timeout" or "unsupported"), its
+              wall-clock `runtime` and the wall-clock time of each of its `stages` in seconds,
+              the statistics of the SIMLOG it wrote, if any (`sim_stats`, see `read_sim_stats`),
+              and whether its result was replayed from the result cache (`cached`).
+    """
+    # Interactive modes are not limited by the timeout.
+    start_time = time.monotonic()
+    start_timestamp = time.time()
+    TEST_CONTEXT.deadline = start_time + args.timeout if args.timeout and args.mode in (0, 1) else None
+    TEST_CONTEXT.stages = {}
+    TEST_CONTEXT.sim_stats = None
+    TEST_CONTEXT.cached = False
+
+    try:
+        status = job(test_name, args) or "success"
+    except subprocess.TimeoutExpired:
+        print(f"{test_name}: Timed out after {args.timeout:g} seconds.")
+        status = "timeout"
+    except SystemExit as e:
+        # The job already reported the failure.
+        status = "error" if e.code else "success"
+    except Exception as e:
+        print(f"{test_name}: Error during test execution: {e}")
+        status = "error"
+    finally:
+        TEST_CONTEXT.deadline = None
+
+    return {
+        "status": status,
+        "runtime": round(time.monotonic() - start_time, 3),
+        "stages": TEST_CONTEXT.stages,
+        "sim_stats": TEST_CONTEXT.sim_stats or {},
+        "cached": TEST_CONTEXT.cached,
+    }
+
+
+def read_sim_stats(sim_log_file, start_timestamp):
+    """
+    Read the statistics at the end of the SIMLOG written by the processor testbench.
+
+    Args:
+        sim_log_file (str): Path to the SIMLOG.
+        start_timestamp (float): The time the test started, so only a SIMLOG written by it is read.
+
+    Returns:
+        dict: The statistics (e.g. `sim_cycles` and `inst_count`) mapped to their values, or an
+              empty dictionary if the test did not write a SIMLOG.
+    """
+    if not os.path.exists(sim_log_file) or os.path.getmtime(sim_log_file) < start_timestamp:
+        return {}
+
+    # The statistics are at the end, so only the tail of the SIMLOG is read.
+    with open(sim_log_file, 'rb') as sim_log_fh:
+        sim_log_fh.seek(max(os.path.getsize(sim_log_file) - 4096, 0))
+        tail = sim_log_fh.read().decode('utf-8', errors='replace')
+
+    return {name: int(value) for name, value in SIM_STAT_PATTERN.findall(tail)}
+
+
+def write_reports(results, args):
+    """
+    Write the results of the run as a JSON report and a JUnit XML report in the output directory.
+
+    Args:
+        results (dict): The result of each test (see `run_scheduled_test`), in the order the tests were given.
+        args (argparse.Namespace): The parsed command-line arguments containing execution details.
+    """
+    suite_name = os.path.basename(TEST_DIR)
+    report = {
+        "directory": suite_name,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "mode": args.mode,
+        "simulator": args.simulator,
+        "jobs": args.jobs,
+        "stages": RUN_STAGES,
+        "tests": results,
+    }
+    with open(os.path.join(OUTPUT_DIR, "results.json"), 'w') as report_fh:
+        json.dump(report, report_fh, indent=2)
+
+    # Failed simulations are JUnit failures, tests that could not run to a verdict are errors.
+    suite = ET.Element(
+        "testsuite", name=suite_name, timestamp=report["timestamp"], tests=str(len(results)),
+        failures=str(sum(result["status"] == "error" and "simulation" in result["stages"] for result in results.values())),
+        errors=str(sum(result["status"] == "timeout" or (result["status"] == "error" and "simulation" not in result["stages"]) for result in results.values())),
+        skipped=str(sum(result["status"] == "unsupported" for result in results.values())),
+        time=f"{sum(result['runtime'] for result in results.values()):.3f}",
+    )
+    for test_name, result in results.items():
+        case = ET.SubElement(suite, "testcase", classname=suite_name, name=test_name, time=f"{result['runtime']:.3f}")
+        properties = ET.SubElement(case, "properties")
+        for name, value in list(result["stages"].items()) + list(result["sim_stats"].items()):
+            ET.SubElement(properties, "property", name=name, value=str(value))
+        if result["status"] == "timeout":
+            ET.SubElement(case, "error", message=f"Timed out after {args.timeout:g} seconds.")
+        elif result["status"] == "error" and "simulation" in result["stages"]:
+            ET.SubElement(case, "failure", message="Test failed. Run 'make log t' for details.")
+        elif result["status"] == "error":
+            ET.SubElement(case, "error", message="Test could not be compiled or run. Run 'make log c' for details.")
+        elif result["status"] == "unsupported":
+            ET.SubElement(case, "skipped", message=f"The {args.simulator} simulator cannot run this testbench.")
+    ET.ElementTree(suite).write(os.path.join(OUTPUT_DIR, "results.xml"), encoding="utf-8", xml_declaration=True)
 
 
 def execute_tests(test_names, args):
     """
-    Runs the testbenches in parallel using a ThreadPoolExecutor.
+    Runs the testbenches in parallel on a bounded pool of workers.
     
     Args:
         test_names (list): A list of testbench names to be executed.
         args (argparse.Namespace): The parsed command-line arguments containing execution details.
         
-    This function uses a ThreadPoolExecutor to execute testbenches in parallel. It submits
-    each test to the executor and waits for all the tests to complete.
-    """
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = []
-        for test_name in test_names:
-            # The job to be submitted to the executor.
-            job = None
-
-            # Check the mode and submit the appropriate job.
-            if args.mode == 3:
-                # Submit task for viewing waveforms.
-                job = executor.submit(view_waveforms, test_name, args)
-            else:
-                # Submit task for executing the test.
-                job = executor.submit(execute_test, test_name, args)
+    At most `args.jobs` tests run at a time. Tests are started longest first according to
+    their recorded runtimes, with tests that have no history started first, so the longest
+    tests do not start last. The runtimes of the tests are recorded for the next run, the
+    results are written to `tests/output/results.json` and `tests/output/results.xml` (JUnit),
+    and the retention policy is applied to the saved waveforms (see `prune_waves`).
+
+    Raises:
+        SystemExit: If any test failed or timed out, after all tests have completed.
+    """
+    history = load_test_history()
 
-            # Submit each job (either execute or view waveforms).
-            futures.append(job)
+    # Order the tests by their mean recorded runtime, longest first.
+    def expected_runtime(test_name):
+        runtimes = history.get(test_name)
+        return sum(runtimes) / len(runtimes) if runtimes else float("inf")
 
-        # Wait for all tests to complete and handle exceptions.
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                result = future.result()  # Get the result (if any)
-            except Exception as e:
-                # Handle errors during test execution
-                print(f"Error during test execution: {e}")
-                sys.exit(1)
+    job = view_waveforms if args.mode == 3 else execute_test
+    if job is execute_test:
+        test_names = sorted(test_names, key=expected_runtime, reverse=True)
+
+    results = {}
+    start_time = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(run_scheduled_test, job, test_name, args): test_name for test_name in test_names}
+
+        # Wait for all tests to complete, killing the running commands if interrupted.
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            with ACTIVE_PROCESSES_LOCK:
+                for pid in ACTIVE_PROCESSES:
+                    kill_process_group(pid)
+            raise
+
+    RUN_STAGES["tests"] = round(time.monotonic() - start_time, 3)
+    results = {test_name: results[test_name] for test_name in test_names}
+
+    # Record the runtimes of the tests run without interaction, and report the results.
+    if args.mode in (0, 1):
+        for test_name, result in results.items():
+            if result["status"] != "unsupported" and not result["cached"]:
+                history.setdefault(test_name, []).append(result["runtime"])
+        save_test_history(history)
+    if args.mode != 3:
+        write_reports(results, args)
+        prune_waves(args)
+
+    # Report the failed tests together at the end.
+    failed_tests = [test_name for test_name in test_names if results[test_name]["status"] in ("error", "timeout")]
+    if failed_tests:
+        if len(test_names) > 1:
+            print(f"Failed tests: {', '.join(failed_tests)}.")
+        sys.exit(1)
 
 
 def print_mode_message(args):
@@ -1224,6 +3179,167 @@ def print_mode_message(args):
         sys.exit(1)
 
 
+def run_program(test_name, program, args):
+    """
+    Run a test program on the processor testbench in its own sandbox directory.
+
+    The sandbox `tests/output/matrix/<program>` holds the program's image, the data image and
+    the output files of the run, and the simulation runs in it against the compiled work library
+    of the directory, so programs can run in parallel without sharing any files.
+
+    Args:
+        test_name (str): The name of the processor testbench, e.g. `project_phase3_tb`.
+        program (str): The name of the test program in the TestPrograms directory, without the `.list` extension.
+        args (argparse.Namespace): The parsed command-line arguments containing execution details.
+
+    Returns:
+        str: The result of the simulation ("success", "error", "warning", or "unknown").
+    """
+    # Create a clean sandbox with the directory layout the testbench expects.
+    sandbox = os.path.join(OUTPUT_DIR, "matrix", program)
+    if os.path.isdir(sandbox):
+        shutil.rmtree(sandbox)
+    for directory in [os.path.join(sandbox, "tests", "output", "logs", "transcript"), os.path.join(sandbox, "outputs")]:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+    # Assemble the program into the sandbox, along with the data image of the directory if it has one.
+    with timed_stage("assemble"):
+        assemble_file(os.path.join(TEST_PROGRAMS_DIR, f"{program}.list"), os.path.join(sandbox, "tests", "loadfile_all.img"))
+    if os.path.exists(os.path.join(TESTS_DIR, "data.img")):
+        shutil.copy(os.path.join(TESTS_DIR, "data.img"), os.path.join(sandbox, "tests", "data.img"))
+
+    # Run the simulation in the sandbox, monitoring the transcript.
+    start_timestamp = time.time()
+    backend = get_backend(args)
+    with open(os.path.join(sandbox, "transcript.log"), 'w') as log_fh, timed_stage("simulation"):
+        try:
+            if args.session and backend["session"]:
+                session_options = backend["session"](test_name, args)
+                result = run_session_simulation(test_name, session_options, "run -all;", log_fh, args.grace, sandbox, args.jobs)
+            else:
+                sim_command = backend["command"](test_name, args, "run -all;", wave_file=f"{program}.wlf")
+                result = run_monitored_simulation(sim_command, log_fh, args.grace, cwd=sandbox, stop_message=backend["stop_message"])
+        except subprocess.CalledProcessError as e:
+            print(f"{os.path.basename(TEST_DIR)}/{program}: Running test failed with error {e.returncode}. See {os.path.relpath(sandbox, ROOT_DIR)}/transcript.log for details.")
+            sys.exit(1)
+
+    # Some testbenches write the SIMLOG to the working directory instead of the outputs directory.
+    sim_log_file = os.path.join(sandbox, "outputs", "verilogsim.log")
+    if not os.path.exists(sim_log_file):
+        sim_log_file = os.path.join(sandbox, "verilogsim.plog")
+    TEST_CONTEXT.sim_stats = read_sim_stats(sim_log_file, start_timestamp)
+
+    labels = {"success": "YAHOO!! All tests passed.", "error": "Test failed.", "warning": "Test completed with warnings.", "unknown": "Unknown status."}
+    print(f"{os.path.basename(TEST_DIR)}/{program}: {labels[result]}")
+    return result
+
+
+def run_matrix(args):
+    """
+    Run every test program in the TestPrograms directory against the processor testbench of the selected directory.
+
+    The testbench is compiled once, then the programs run in parallel sandboxes on a bounded
+    pool of workers (see `run_program`). The results are written to `tests/output/matrix.json`.
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments containing execution details.
+
+    Raises:
+        SystemExit: If the testbench cannot be compiled or any program failed or timed out.
+    """
+    # Find the processor testbench of the directory.
+    test_names = sorted(test_name for test_name in find_testbench(True) if re.match(r'project_phase\d+_tb$', test_name))
+    if not test_names:
+        print(f"{os.path.basename(TEST_DIR)}: No processor testbench found.")
+        sys.exit(1)
+    test_name = test_names[-1]
+
+    # Compile the testbench once for all the programs.
+    test_file = os.path.join(TESTS_DIR, f"{test_name}.sv")
+    if not os.path.exists(test_file):
+        test_file = os.path.join(TESTS_DIR, f"{test_name}.v")
+    dependencies, diagnostics = find_dependencies(test_file)
+    for diagnostic in diagnostics:
+        print(f"{test_name}: {diagnostic}")
+    features = find_unsupported_features(dependencies, args)
+    if features:
+        print(f"{test_name}: The {args.simulator} simulator cannot run this testbench, it uses {', '.join(features)}.")
+        sys.exit(1)
+    compile_files(test_name, dependencies, args)
+
+    # Run the programs in parallel, each in its own sandbox.
+    programs = sorted(os.path.splitext(f)[0] for f in os.listdir(TEST_PROGRAMS_DIR) if f.endswith(".list"))
+    job = lambda program, args: run_program(test_name, program, args)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = dict(zip(programs, executor.map(lambda program: run_scheduled_test(job, program, args), programs)))
+
+    with open(os.path.join(OUTPUT_DIR, "matrix.json"), 'w') as report_fh:
+        json.dump({"directory": os.path.basename(TEST_DIR), "testbench": test_name, "programs": results}, report_fh, indent=2)
+
+    if any(result["status"] in ("error", "timeout") for result in results.values()):
+        sys.exit(1)
+
+
+def run_matrix_directories(args):
+    """
+    Run the test program matrix of every directory in parallel and print the results as one table.
+
+    Each directory runs in its own process (see `run_matrix`), sharing the worker cap between them.
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments containing execution details.
+
+    Raises:
+        SystemExit: If any program failed or timed out in any directory.
+    """
+    directories = [PHASE1_DIR, PHASE2_DIR, PHASE3_DIR, EXTRA_CREDIT_DIR]
+
+    # Pass the options on to each directory's process, splitting the workers between them.
+    options = ["-mx", "-j", str(max(args.jobs // len(directories), 1)), "-gr", str(args.grace), "-sim", args.simulator, "-st", str(args.sim_threads)]
+    if args.timeout:
+        options += ["-to", str(args.timeout)]
+    if args.shared:
+        options.append("-sl")
+    if args.cache:
+        options.append("-cc")
+    if args.session:
+        options.append("-ss")
+
+    processes = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "-d", os.path.basename(directory)] + options)
+        for directory in directories
+    ]
+    return_codes = [process.wait() for process in processes]
+
+    # Collect the results of all directories.
+    matrix = {}
+    for directory in directories:
+        try:
+            with open(os.path.join(directory, "tests", "output", "matrix.json"), 'r') as report_fh:
+                matrix[os.path.basename(directory)] = json.load(report_fh)["programs"]
+        except (OSError, ValueError):
+            matrix[os.path.basename(directory)] = {}
+
+    # Print one row per program and one column per directory.
+    labels = {"success": "pass", "error": "FAIL", "warning": "warn", "unknown": "unknown", "timeout": "TIMEOUT", "unsupported": "n/a"}
+    programs = sorted({program for results in matrix.values() for program in results})
+    print(f"\n{'Program':<12}" + "".join(f"{name:>20}" for name in matrix))
+    for program in programs:
+        cells = []
+        for results in matrix.values():
+            result = results.get(program)
+            if result is None:
+                cells.append("-")
+            elif "sim_cycles" in result["sim_stats"]:
+                cells.append(f"{labels[result['status']]} {result['sim_stats']['sim_cycles']}")
+            else:
+                cells.append(labels[result["status"]])
+        print(f"{program:<12}" + "".join(f"{cell:>20}" for cell in cells))
+
+    if any(return_codes):
+        sys.exit(1)
+
+
 def main():
     """
     Main function to parse arguments, set up the environment, and execute tests.
@@ -1234,15 +3350,32 @@ def main():
     will exit gracefully.
     """
     args = parse_arguments()
+
+    # Run the test program matrix of every directory without prompting for one.
+    if args.matrix and not args.directory:
+        run_matrix_directories(args)
+        return
+
+    # Check the design files of every directory without prompting for one.
+    if args.check and args.all and not args.directory:
+        check_design_files([os.path.join(directory, "designs") for directory in [PHASE1_DIR, PHASE2_DIR, PHASE3_DIR, EXTRA_CREDIT_DIR]], args)
+        return
     
     try:
-        setup_directories(choose_directory(args))
+        directory = choose_directory(args)
+        start_time = time.monotonic()
+        setup_directories(directory)
+        RUN_STAGES["setup"] = round(time.monotonic() - start_time, 3)
         
         # Handle log file display and exit, otherwise check design files, or run tests / view waves.
         if args.logs:
             display_log(args.logs)
         elif args.check:
-            check_design_files()
+            check_design_files([DESIGNS_DIR], args)
+        elif args.capabilities:
+            report_capabilities(args)
+        elif args.matrix:
+            run_matrix(args)
         else:
             # Assemble the selected input file if not all tests running in parallel.
             if args.asm and not args.all:
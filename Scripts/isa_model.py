@@ -0,0 +1,587 @@
+import os
+import sys
+import argparse
+
+from assembler import assemble_file, read_image
+
+# Constants for directory paths.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+TEST_PROGRAMS_DIR = os.path.join(ROOT_DIR, "TestPrograms")
+
+# Constants describing the WISC-S25 memory and the project testbenches.
+MEM_WORDS = 65536        # Number of 16-bit words in the (word addressed) main memory.
+MAX_CYCLES = 100000      # Cycle limit used by the project_phase*_tb.v testbenches.
+FIRST_CYCLE = 4          # First cycle number logged by the testbenches after reset.
+
+# Opcodes of the WISC-S25 instruction set.
+ADD, SUB, XOR, RED, SLL, SRA, ROR, PADDSB, LW, SW, LLB, LHB, B, BR, PCS, HLT = range(16)
+
+# Pseudo opcode for the all zero word, which the pipelined decode stages squash into a NOP.
+NOP = 16
+
+# Opcodes that write the register file (ADD..PADDSB, LW, LLB, LHB, PCS).
+REG_WRITE_OPS = frozenset([ADD, SUB, XOR, RED, SLL, SRA, ROR, PADDSB, LW, LLB, LHB, PCS])
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for running the ISA model.
+
+    Arguments:
+        - 'program' is the WISC-S25 assembly file (.list/.s) or memory image (.img) to execute.
+        - The '-a' flag runs every program in the TestPrograms directory instead.
+        - The '-p' flag selects the phase whose testbench output format is reproduced.
+        - The '-o' flag selects the directory the verilogsim.trace/verilogsim.log files are written to.
+        - The '-d' flag optionally gives a separate data memory image (Harvard memories of Phase-1/Phase-2).
+        - The '-n' flag sets the cycle limit after which the model gives up.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Run a WISC-S25 program on the Python ISA model.")
+
+    # The program to execute, either assembly or an assembled memory image.
+    parser.add_argument("program", nargs="?", help="WISC-S25 assembly file (.list/.s) or memory image (.img) to execute.")
+
+    # Flag to run every program in the TestPrograms directory.
+    parser.add_argument("-a", "--all", action="store_true", help="Run all programs in the TestPrograms directory.")
+
+    # Phase whose testbench output format is reproduced.
+    parser.add_argument(
+        "-p", "--phase", type=int, choices=[1, 2, 3], default=3,
+        help="Phase whose verilogsim.trace/log format is reproduced: 1=single cycle, 2/3=pipelined."
+    )
+
+    # Directory to write the simulation files to.
+    parser.add_argument("-o", "--outdir", help="Directory to write the trace and log files to.")
+
+    # Optional separate data memory image.
+    parser.add_argument("-d", "--data", help="Separate data memory image (e.g. tests/data.img of Phase-1/Phase-2).")
+
+    # Cycle limit of the model.
+    parser.add_argument("-n", "--max-cycles", type=int, default=MAX_CYCLES, help="Cycle limit before the model gives up.")
+
+    # Parse and return the arguments.
+    return parser.parse_args()
+
+
+def assemble_program(asm_file):
+    """
+    Assemble a WISC-S25 assembly file with the Python assembler and return the machine words.
+
+    Args:
+        asm_file (str): Path to the WISC-S25 assembly file.
+
+    Returns:
+        list: A list of MEM_WORDS integers holding the assembled program.
+
+    Raises:
+        ValueError: If the assembler fails.
+    """
+    # The assembled words are stored from address 0, as assemble() does.
+    words = assemble_file(asm_file)
+    return words + [0] * (MEM_WORDS - len(words))
+
+
+def load_program(program_file):
+    """
+    Load a program into memory, assembling it first if it is not a memory image.
+
+    Args:
+        program_file (str): Path to an assembly file (.list/.s) or a memory image (.img).
+
+    Returns:
+        list: A list of MEM_WORDS integers holding the program.
+    """
+    if program_file.endswith(".img"):
+        return read_image(program_file)
+    return assemble_program(program_file)
+
+
+def list_programs():
+    """
+    List the test programs in the TestPrograms directory.
+
+    Returns:
+        list: Sorted paths of the assembly files (.list/.s) in TestPrograms.
+    """
+    return sorted(
+        os.path.join(TEST_PROGRAMS_DIR, f) for f in os.listdir(TEST_PROGRAMS_DIR) if f.endswith((".s", ".list"))
+    )
+
+
+def default_data_file(phase):
+    """
+    Get the data memory image a phase's testbench loads, if it has a separate data memory.
+
+    Args:
+        phase (int): The phase being modelled.
+
+    Returns:
+        str or None: The path to `Phase-<phase>/tests/data.img` for the Harvard memories of Phase-1/Phase-2,
+                     or None if the phase uses a unified memory or the image does not exist.
+    """
+    if phase not in (1, 2):
+        return None
+    phase_data = os.path.join(ROOT_DIR, f"Phase-{phase}", "tests", "data.img")
+    return phase_data if os.path.exists(phase_data) else None
+
+
+def sign_extend(value, bits):
+    """
+    Sign extend a `bits` wide value to a Python integer.
+
+    Args:
+        value (int): The unsigned field value.
+        bits (int): The width of the field.
+
+    Returns:
+        int: The signed value.
+    """
+    sign = 1 << (bits - 1)
+    return (value & (sign - 1)) - (value & sign)
+
+
+def paddsb(a, b):
+    """
+    Compute the PADDSB result: four saturating signed 4-bit additions (PSA_16bit.v).
+
+    Args:
+        a (int): First 16-bit operand.
+        b (int): Second 16-bit operand.
+
+    Returns:
+        int: The 16-bit result.
+    """
+    result = 0
+    for pos in (0, 4, 8, 12):
+        # Add each signed nibble pair and saturate it to [-8, 7].
+        total = sign_extend((a >> pos) & 0xF, 4) + sign_extend((b >> pos) & 0xF, 4)
+        total = 7 if total > 7 else (-8 if total < -8 else total)
+        result |= (total & 0xF) << pos
+    return result
+
+
+def red(a, b):
+    """
+    Compute the RED result: the sign-extended sum of all eight signed nibbles (RED_Unit.v).
+
+    Args:
+        a (int): First 16-bit operand.
+        b (int): Second 16-bit operand.
+
+    Returns:
+        int: The 16-bit result.
+    """
+    total = 0
+    for pos in (0, 4, 8, 12):
+        total += sign_extend((a >> pos) & 0xF, 4) + sign_extend((b >> pos) & 0xF, 4)
+    return sign_extend(total & 0xFF, 8) & 0xFFFF
+
+
+def shift(value, amount, opcode):
+    """
+    Compute the SLL/SRA/ROR result of the Shifter.
+
+    Args:
+        value (int): The 16-bit value to shift.
+        amount (int): The 4-bit shift amount.
+        opcode (int): One of SLL, SRA or ROR.
+
+    Returns:
+        int: The 16-bit result.
+    """
+    if opcode == SLL:
+        return (value << amount) & 0xFFFF
+    if opcode == SRA:
+        return (sign_extend(value, 16) >> amount) & 0xFFFF
+    return ((value >> amount) | (value << (16 - amount))) & 0xFFFF
+
+
+def branch_taken(cond, z, v, n):
+    """
+    Evaluate a branch condition code against the flags (Branch_control.v).
+
+    Args:
+        cond (int): The 3-bit condition code.
+        z (int): The Z flag.
+        v (int): The V flag.
+        n (int): The N flag.
+
+    Returns:
+        bool: True if the branch is taken.
+    """
+    if cond == 0:
+        return not z                  # Not Equal (Z = 0)
+    if cond == 1:
+        return bool(z)                # Equal (Z = 1)
+    if cond == 2:
+        return not z and not n        # Greater Than (Z = N = 0)
+    if cond == 3:
+        return bool(n)                # Less Than (N = 1)
+    if cond == 4:
+        return bool(z) or not n       # Greater Than or Equal (Z = 1 or Z = N = 0)
+    if cond == 5:
+        return bool(z or n)           # Less Than or Equal (Z = 1 or N = 1)
+    if cond == 6:
+        return bool(v)                # Overflow (V = 1)
+    return True                       # Unconditional
+
+
+# Branch outcome for every condition code (row) and packed Z/V/N flag value (column).
+BRANCH_TAKEN = [[branch_taken(cond, (f >> 2) & 1, (f >> 1) & 1, f & 1) for f in range(8)] for cond in range(8)]
+
+
+def decode(inst, zero_nop):
+    """
+    Decode an instruction word into the fields used by `simulate`.
+
+    Args:
+        inst (int): The 16-bit instruction word.
+        zero_nop (bool): Decode the all zero word as a NOP instead of ADD R0, R0, R0.
+
+    Returns:
+        tuple: (inst, opcode, rd, rs, rt, imm, reg_write) where `imm` is the immediate already extended
+               and scaled for the opcode (byte for LLB/LHB, byte offset for LW/SW and B, shift amount).
+    """
+    opcode = inst >> 12
+    rd, rs, rt = (inst >> 8) & 0xF, (inst >> 4) & 0xF, inst & 0xF
+
+    if inst == 0 and zero_nop:
+        return (inst, NOP, rd, rs, rt, 0, 0)
+
+    if opcode == LW or opcode == SW:
+        imm = sign_extend(rt, 4) << 1
+    elif opcode == B:
+        imm = sign_extend(inst & 0x1FF, 9) << 1
+    elif opcode == LLB:
+        imm = inst & 0xFF
+    elif opcode == LHB:
+        imm = (inst & 0xFF) << 8
+    else:
+        imm = rt
+
+    return (inst, opcode, rd, rs, rt, imm, int(opcode in REG_WRITE_OPS))
+
+
+def simulate(memory, data_memory=None, max_cycles=MAX_CYCLES, zero_nop=True, records=None):
+    """
+    Execute a WISC-S25 program on the architectural model until HLT or the cycle limit.
+
+    Args:
+        memory (list): The instruction memory (also the data memory unless `data_memory` is given).
+                       It is modified in place by stores to a unified memory.
+        data_memory (list, optional): A separate data memory for the Harvard memories of Phase-1/Phase-2.
+        max_cycles (int): The cycle limit of the testbench; the model gives up after this many instructions.
+        zero_nop (bool): Treat the all zero instruction word as a NOP, as the pipelined decode stages do.
+        records (list, optional): If given, one retirement record is appended per executed instruction.
+
+    Returns:
+        tuple: (regs, halted, count) - the final register file, whether HLT was reached, and the number of
+               instructions executed.
+
+    Description:
+        - Each retirement record is the tuple
+          (pc, inst, reg_write, reg_rd, write_data, mem_read, mem_write, mem_addr, mem_data_in, mem_data_out).
+        - `mem_addr` holds the ALU output and `mem_data_in` the second register read, like the testbench wires.
+        - Decoded instructions are cached per word and invalidated by stores into a unified memory.
+    """
+    # Register file, packed flags (Z << 2 | V << 1 | N), and program counter.
+    regs = [0] * 16
+    flags = 0
+    pc = 0
+
+    # Stores go to the data memory, and only invalidate decoded instructions if memory is unified.
+    dmem = memory if data_memory is None else data_memory
+    unified = data_memory is None
+
+    # Cache of decoded instructions indexed by word address.
+    decoded = [None] * MEM_WORDS
+
+    # Bound methods and constants used in the hot loop.
+    record = records.append if records is not None else None
+    taken_table = BRANCH_TAKEN
+    count = 0
+    halted = False
+
+    # The testbench logs from FIRST_CYCLE, so that many fewer cycles are available to the program.
+    limit = max_cycles - FIRST_CYCLE + 1
+
+    while count < limit:
+        entry = decoded[pc >> 1]
+
+        # Decode the instruction on first use.
+        if entry is None:
+            entry = decode(memory[pc >> 1], zero_nop)
+            decoded[pc >> 1] = entry
+
+        inst, opcode, rd, rs, rt, imm, reg_write = entry
+        pc_next = (pc + 2) & 0xFFFF
+        count += 1
+
+        # Second register read: Rd for SW, Rt otherwise (Decode.v), and nothing for a NOP.
+        if record is not None:
+            src2 = regs[rd] if opcode == SW else (regs[rt] if opcode != NOP else 0)
+
+        # Defaults for the retirement record.
+        alu_out = 0
+        mem_read = mem_write = 0
+        mem_data_out = 0
+
+        if opcode <= SUB:
+            # Saturating signed ADD/SUB, setting Z, V and N.
+            a = (regs[rs] ^ 0x8000) - 0x8000
+            b = (regs[rt] ^ 0x8000) - 0x8000
+            total = a - b if opcode else a + b
+            if total > 0x7FFF:
+                alu_out, flags = 0x7FFF, 0b010
+            elif total < -0x8000:
+                alu_out, flags = 0x8000, 0b011
+            else:
+                alu_out = total & 0xFFFF
+                flags = (4 if not alu_out else 0) | (alu_out >> 15)
+        elif opcode == LW or opcode == SW:
+            # Word aligned base plus the sign extended, word scaled offset.
+            alu_out = ((regs[rs] & 0xFFFE) + imm) & 0xFFFF
+            if opcode == LW:
+                mem_read = 1
+                mem_data_out = dmem[alu_out >> 1]
+            else:
+                mem_write = 1
+                dmem[alu_out >> 1] = regs[rd]
+                if unified:
+                    decoded[alu_out >> 1] = None
+        elif opcode == B:
+            if taken_table[rd >> 1][flags]:
+                pc_next = (pc_next + imm) & 0xFFFF
+        elif opcode == LLB:
+            alu_out = (regs[rd] & 0xFF00) | imm
+        elif opcode == LHB:
+            alu_out = (regs[rd] & 0x00FF) | imm
+        elif opcode == XOR:
+            alu_out = regs[rs] ^ regs[rt]
+            flags = (flags & 0b011) | (4 if not alu_out else 0)
+        elif SLL <= opcode <= ROR:
+            alu_out = shift(regs[rs], imm, opcode)
+            flags = (flags & 0b011) | (4 if not alu_out else 0)
+        elif opcode == BR:
+            if taken_table[rd >> 1][flags]:
+                pc_next = regs[rs]
+        elif opcode == RED:
+            alu_out = red(regs[rs], regs[rt])
+        elif opcode == PADDSB:
+            alu_out = paddsb(regs[rs], regs[rt])
+        elif opcode == HLT:
+            halted = True
+
+        # Write back the loaded data, PC+2, or the ALU result.
+        if opcode == LW or opcode == SW:
+            write_data = mem_data_out
+        elif opcode == PCS:
+            write_data = pc_next
+        else:
+            write_data = alu_out
+
+        # R0 is hardwired to zero, although the write is still visible on the testbench wires.
+        if reg_write and rd:
+            regs[rd] = write_data
+
+        if record is not None:
+            record((pc, inst, reg_write, rd, write_data, mem_read, mem_write, alu_out, src2, mem_data_out))
+
+        if halted:
+            break
+
+        pc = pc_next
+
+    return regs, halted, count
+
+
+def count_instructions(records, phase):
+    """
+    Compute the `inst_count` statistic the phase's testbench would report.
+
+    Args:
+        records (list): Retirement records produced by `simulate`.
+        phase (int): The phase whose testbench is reproduced.
+
+    Returns:
+        int: The instruction count.
+
+    Description:
+        - The Phase-1 testbench counts every instruction, including branches and NOPs.
+        - The pipelined testbenches count cycles that write a register, write memory, or halt. In a
+          stall-free pipeline a store is in MEM in the same cycle the instruction before it writes back,
+          so the two share one count.
+    """
+    if phase == 1:
+        return len(records)
+
+    # A store as the very first instruction has no write back to share its cycle with.
+    count = 1 if records and records[0][6] else 0
+
+    for k, rec in enumerate(records):
+        # Cycle with instruction k in WB and instruction k+1 in MEM.
+        next_store = k + 1 < len(records) and records[k + 1][6]
+        if rec[2] or next_store or rec[1] >> 12 == HLT:
+            count += 1
+
+    return count
+
+
+def write_trace(trace_file, records, phase):
+    """
+    Write the `verilogsim.trace` file for the retired instructions.
+
+    Args:
+        trace_file (str): Path of the trace file to write.
+        records (list): Retirement records produced by `simulate`.
+        phase (int): The phase whose testbench trace format is reproduced.
+    """
+    lines = []
+
+    for inum, (pc, inst, reg_write, reg_rd, write_data, mem_read, mem_write, mem_addr, data_in, data_out) in enumerate(records):
+        if phase == 1:
+            # Single cycle format: one INUM line per instruction.
+            if reg_write:
+                if mem_read:
+                    lines.append(f"INUM: {inum:8d} PC: 0x{pc:04x} REG: {reg_rd:2d} VALUE: 0x{write_data:04x} ADDR: 0x{mem_addr:04x}")
+                else:
+                    lines.append(f"INUM: {inum:8d} PC: 0x{pc:04x} REG: {reg_rd:2d} VALUE: 0x{write_data:04x}")
+            elif mem_write:
+                lines.append(f"INUM: {inum:8d} PC: 0x{pc:04x} ADDR: 0x{mem_addr:04x} VALUE: 0x{data_in:04x}")
+            else:
+                lines.append(f"INUM: {inum:8d} PC: 0x{pc:04x}")
+        else:
+            # Pipelined format: memory accesses happen in MEM, before the write back of the same instruction.
+            if mem_read:
+                lines.append(f"LOAD: ADDR: 0x{mem_addr:04x} VALUE: 0x{data_out:04x}")
+            if mem_write:
+                lines.append(f"STORE: ADDR: 0x{mem_addr:04x} VALUE: 0x{data_in:04x}")
+            if reg_write:
+                lines.append(f"REG: {reg_rd:2d} VALUE: 0x{write_data:04x}")
+
+    with open(trace_file, "w") as f:
+        f.write("\n".join(lines) + ("\n" if lines else ""))
+
+
+def write_log(log_file, records, phase, halted):
+    """
+    Write the `verilogsim.log` file for the retired instructions.
+
+    Args:
+        log_file (str): Path of the log file to write.
+        records (list): Retirement records produced by `simulate`.
+        phase (int): The phase whose testbench log format is reproduced.
+        halted (bool): Whether the program reached HLT (otherwise no summary is written).
+
+    Description:
+        - One `SIMLOG:: Cycle` line is written per instruction, with the PC/I/R/M fields of that
+          instruction, i.e. the log of an ideal machine retiring one instruction per cycle.
+        - The Phase-1 log has two M data columns, the pipelined logs have three (data in and data out).
+    """
+    lines = []
+
+    for cycle, (pc, inst, reg_write, reg_rd, write_data, mem_read, mem_write, mem_addr, data_in, data_out) in enumerate(records, FIRST_CYCLE):
+        line = (f"SIMLOG:: Cycle {cycle:11d} PC: {pc:08x} I: {inst:08x} R: {reg_write} {reg_rd:3d} {write_data:08x} "
+                f"M: {mem_read} {mem_write} {mem_addr:08x} {data_in:08x}")
+        if phase != 1:
+            line += f" {data_out:08x}"
+        lines.append(line)
+
+    # Summary lines written by the testbench on HLT, each followed by an empty line.
+    if halted:
+        lines.append("SIMLOG:: Processor halted\n")
+        lines.append(f"SIMLOG:: sim_cycles {FIRST_CYCLE - 1 + len(records):11d}\n")
+        lines.append(f"SIMLOG:: inst_count {count_instructions(records, phase):11d}\n")
+
+    with open(log_file, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def run_model(program_file, outdir, phase=3, data_file=None, max_cycles=MAX_CYCLES, name=None):
+    """
+    Run a program on the ISA model and write its trace and log files to a directory.
+
+    Args:
+        program_file (str): Assembly file or memory image to execute.
+        outdir (str): Directory to write the simulation files to.
+        phase (int): The phase whose testbench output format is reproduced.
+        data_file (str, optional): Separate data memory image.
+        max_cycles (int): The cycle limit of the model.
+        name (str, optional): If given, the files are named `<name>_verilogsim.trace.txt` and
+                              `<name>_verilogsim.log.txt`, as `rename_sim_files()` stores them.
+
+    Returns:
+        tuple: (records, halted) - the retirement records and whether HLT was reached.
+    """
+    memory = load_program(program_file)
+    data_memory = read_image(data_file) if data_file else None
+
+    # Execute the program, collecting one record per instruction.
+    records = []
+    _, halted, _ = simulate(memory, data_memory, max_cycles, zero_nop=(phase != 1), records=records)
+
+    # Write the simulation files with the names used by the testbenches or the renamed outputs.
+    os.makedirs(outdir, exist_ok=True)
+    if name is None:
+        trace_file = os.path.join(outdir, "verilogsim.trace")
+        log_file = os.path.join(outdir, "verilogsim.log")
+    else:
+        trace_file = os.path.join(outdir, f"{name}_verilogsim.trace.txt")
+        log_file = os.path.join(outdir, f"{name}_verilogsim.log.txt")
+    write_trace(trace_file, records, phase)
+    write_log(log_file, records, phase, halted)
+
+    return records, halted
+
+
+def main():
+    """
+    Main function to parse arguments and run one or all programs on the ISA model.
+
+    With '-a', every program in TestPrograms is run and the outputs are stored under
+    `Phase-<n>/tests/output/model` (or the '-o' directory) with the renamed output file names.
+    """
+    args = parse_arguments()
+
+    # The Harvard memories of Phase-1/Phase-2 load their data memory from tests/data.img.
+    data_file = args.data or default_data_file(args.phase)
+
+    # Select the programs to run along with the directory and names of their outputs.
+    if args.all:
+        programs = list_programs()
+        outdir = args.outdir or os.path.join(ROOT_DIR, f"Phase-{args.phase}", "tests", "output", "model")
+    elif args.program:
+        programs = [args.program]
+        outdir = args.outdir or "."
+    else:
+        print("No program given. Pass a program or '-a' to run all programs in TestPrograms.")
+        sys.exit(1)
+
+    failed = False
+    for program in programs:
+        name = os.path.splitext(os.path.basename(program))[0]
+        try:
+            records, halted = run_model(program, outdir, args.phase, data_file, args.max_cycles, name if args.all else None)
+        except FileNotFoundError as e:
+            print(e)
+            sys.exit(1)
+        except ValueError as e:
+            print(f"\n===== Error assembling file {os.path.basename(program)} =====")
+            print(str(e).replace("\n", " ").strip())
+            sys.exit(1)
+
+        if halted:
+            print(f"{name}: Processor halted after {len(records)} instructions.")
+        else:
+            print(f"{name}: ERROR: More than {args.max_cycles} cycles of simulation.")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
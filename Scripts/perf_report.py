@@ -0,0 +1,290 @@
+import os
+import sys
+import argparse
+
+from trace_diff import iter_cycles, parse_fields, read_summary
+
+# Suffix of the simulation logs stored by `rename_sim_files()`.
+LOG_SUFFIX = "_verilogsim.log.txt"
+
+# Opcodes of the branch instructions (B and BR) in the upper nibble of an instruction word.
+BRANCH_OPCODES = (0xC, 0xD)
+
+# Metrics of a report in the order they are printed, with their labels and formats.
+METRICS = [
+    ("sim_cycles", "sim_cycles", "{:d}"),
+    ("inst_count", "inst_count", "{:d}"),
+    ("cpi", "CPI", "{:.2f}"),
+    ("bubble_cycles", "bubble cycles (I: 0)", "{:d}"),
+    ("stall_cycles", "stall cycles (PC repeats)", "{:d}"),
+    ("stall_runs", "stall runs", "{:d}"),
+    ("longest_stall", "longest stall run", "{:d}"),
+    ("taken_branches", "taken branches", "{:d}"),
+    ("flushes", "flushes", "{:d}"),
+    ("loads", "loads", "{:d}"),
+    ("stores", "stores", "{:d}"),
+    ("mem_op_rate", "memory ops / inst", "{:.2f}"),
+    ("mem_cycles", "memory cycles", "{:d}"),
+    ("icache_hit_rate", "icache hit rate", "{:.1%}"),
+    ("dcache_hit_rate", "dcache hit rate", "{:.1%}"),
+]
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for the performance report.
+
+    Arguments:
+        - 'logs' are the simulation logs to report on, side by side.
+        - The '-d' flag reports on every log of a directory, e.g. Phase-3/outputs, instead.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Report performance metrics of simulation logs side by side.")
+
+    # The logs to report on.
+    parser.add_argument("logs", nargs="*", help="Simulation logs (verilogsim.log) to compare side by side.")
+
+    # Directory of logs to report on.
+    parser.add_argument("-d", "--directory", help="Report on every '*_verilogsim.log.txt' in the directory, comparing variants of each test.")
+
+    # Parse and return the arguments.
+    return parser.parse_args()
+
+
+def to_int(value):
+    """
+    Convert a hex field of a cycle record to an integer.
+
+    Args:
+        value (str): The hex value, which may hold unknown (x/z) digits.
+
+    Returns:
+        int or None: The value, or None if it is missing or not fully known.
+    """
+    try:
+        return int(value, 16)
+    except (TypeError, ValueError):
+        return None
+
+
+def analyze_log(log_file):
+    """
+    Compute the performance metrics of a simulation log, reading it as a stream.
+
+    Args:
+        log_file (str): Path of the `verilogsim.log` file.
+
+    Returns:
+        dict: The metrics of the log (see METRICS), along with `cycles` (the number of cycle records)
+              and `halted`.
+
+    Description:
+        - A bubble cycle fetches the all zero word (`I: 0`), e.g. while the instruction cache misses.
+        - A stall cycle repeats the PC of the cycle before. Consecutive stall cycles form a stall run.
+        - A PC that is neither repeated nor the next word is a redirect. If the instruction fetched
+          before it is a branch, the predictor or the branch redirected fetch right away and the branch
+          is taken. Otherwise it is a flush: the last branch fetched resolved later and redirected fetch,
+          discarding the instructions fetched after it. The branch is taken unless the flush returns to
+          the word after it, which corrects a branch predicted taken and already counted as taken.
+        - Memory operations are the runs of cycles accessing the same address, as the memory signals
+          stay asserted while the data cache stalls.
+    """
+    stats = {"cycles": 0, "bubble_cycles": 0, "stall_cycles": 0, "stall_runs": 0, "longest_stall": 0,
+             "taken_branches": 0, "flushes": 0, "loads": 0, "stores": 0, "mem_cycles": 0}
+
+    pc = None          # PC of the cycle before.
+    inst = None        # Last instruction fetched at a new PC.
+    branch_pc = None   # PC of the last branch fetched.
+    stall = 0          # Length of the current stall run.
+    access = None      # Memory access of the cycle before.
+
+    for _, _, tokens in iter_cycles(log_file):
+        fields = dict(parse_fields(tokens))
+        stats["cycles"] += 1
+
+        next_pc, next_inst = to_int(fields.get("PC")), to_int(fields.get("I"))
+        if next_inst == 0:
+            stats["bubble_cycles"] += 1
+
+        # Classify the change of the PC.
+        if pc is not None and next_pc == pc:
+            stats["stall_cycles"] += 1
+            stall += 1
+            if stall == 1:
+                stats["stall_runs"] += 1
+            stats["longest_stall"] = max(stats["longest_stall"], stall)
+        else:
+            stall = 0
+            if pc is not None and next_pc is not None and next_pc != (pc + 2) & 0xFFFF:
+                if inst is not None and inst >> 12 in BRANCH_OPCODES:
+                    stats["taken_branches"] += 1
+                else:
+                    stats["flushes"] += 1
+                    if branch_pc is not None and next_pc == (branch_pc + 2) & 0xFFFF:
+                        stats["taken_branches"] -= 1
+                    else:
+                        stats["taken_branches"] += 1
+            inst = next_inst
+            if inst is not None and inst >> 12 in BRANCH_OPCODES:
+                branch_pc = next_pc
+        pc = next_pc
+
+        # Count each memory operation once, however many cycles it is held for.
+        read, write = fields.get("M.read") == "1", fields.get("M.write") == "1"
+        if read or write:
+            stats["mem_cycles"] += 1
+            current = (read, write, fields.get("M.addr"))
+            if current != access:
+                stats["loads" if read else "stores"] += 1
+            access = current
+        else:
+            access = None
+
+    # Statistics reported by the testbench on HLT, counting the cycles when it did not halt.
+    summary = read_summary(log_file)
+    stats["halted"] = "Processor halted" in summary
+    stats["sim_cycles"] = int(summary.get("sim_cycles") or stats["cycles"])
+    stats["inst_count"] = int(summary.get("inst_count") or 0)
+    stats["cpi"] = stats["sim_cycles"] / stats["inst_count"] if stats["inst_count"] else None
+    stats["mem_op_rate"] = (stats["loads"] + stats["stores"]) / stats["inst_count"] if stats["inst_count"] else None
+
+    # Cache hit rates of the Phase-3 testbench.
+    for cache in ("icache", "dcache"):
+        requests = int(summary.get(f"{cache}req_count") or 0)
+        stats[f"{cache}_hit_rate"] = int(summary.get(f"{cache}hit_count") or 0) / requests if requests else None
+
+    return stats
+
+
+def format_metric(value, fmt):
+    """
+    Format a metric for the report.
+
+    Args:
+        value (int, float or None): The metric.
+        fmt (str): The format of the metric.
+
+    Returns:
+        str: The formatted metric, or "-" if it is not available.
+    """
+    return "-" if value is None else fmt.format(value)
+
+
+def format_delta(value, base, fmt):
+    """
+    Format the change of a metric from a base.
+
+    Args:
+        value (int, float or None): The metric.
+        base (int, float or None): The metric of the base.
+        fmt (str): The format of the metric.
+
+    Returns:
+        str: The signed change and, for non-zero bases, the relative change, or "-" if not available.
+    """
+    if value is None or base is None:
+        return "-"
+    delta = value - base
+    text = ("+" if delta >= 0 else "-") + fmt.format(abs(delta))
+    if base and not fmt.endswith("%}"):
+        text += f" ({delta / base:+.1%})"
+    return text
+
+
+def print_table(names, reports):
+    """
+    Print the metrics of several logs side by side, with the change of each from the first.
+
+    Args:
+        names (list): The column names (e.g. test4 and test4_predict_not_taken).
+        reports (list): The metrics of each log, from `analyze_log`.
+    """
+    rows = [["metric"] + names + [f"{name} vs {names[0]}" for name in names[1:]]]
+    for key, label, fmt in METRICS:
+        values = [report[key] for report in reports]
+        if all(value is None for value in values):
+            continue
+        rows.append([label] + [format_metric(value, fmt) for value in values] + [format_delta(value, values[0], fmt) for value in values[1:]])
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(cell.ljust(widths[0]) if i == 0 else cell.rjust(widths[i]) for i, cell in enumerate(row)))
+
+    for name, report in zip(names, reports):
+        if not report["halted"]:
+            print(f"{name}: Processor did not halt, metrics cover the {report['cycles']} logged cycles.")
+
+
+def group_variants(log_files):
+    """
+    Group the logs of a directory by test, pairing each test with its variants.
+
+    Args:
+        log_files (list): Paths of `<name>_verilogsim.log.txt` files.
+
+    Returns:
+        list: (names, paths) of each group, the base test first, e.g. (["test4", "test4_predict_not_taken"], [...]).
+              A log is a variant of the test whose name is the longest prefix of its own name followed by '_'.
+    """
+    names = {os.path.basename(f)[:-len(LOG_SUFFIX)]: f for f in log_files}
+    groups = {}
+    for name in sorted(names):
+        bases = [base for base in names if name.startswith(f"{base}_")]
+        base = max(bases, key=len) if bases else name
+        groups.setdefault(base, []).append(name)
+    return [(group, [names[name] for name in group]) for _, group in sorted(groups.items())]
+
+
+def main():
+    """
+    Main function to report the performance metrics of simulation logs side by side.
+    """
+    args = parse_arguments()
+
+    try:
+        if args.directory:
+            log_files = sorted(
+                os.path.join(args.directory, f) for f in os.listdir(args.directory) if f.endswith(LOG_SUFFIX)
+            )
+            if not log_files:
+                print(f"No '*{LOG_SUFFIX}' files in {args.directory}.")
+                sys.exit(1)
+            groups = group_variants(log_files)
+        elif args.logs:
+            names = [os.path.basename(f).replace(LOG_SUFFIX, "") for f in args.logs]
+            if len(set(names)) < len(names):
+                # Logs of the same test in different directories are named after their directory too (e.g. Phase-2/test4).
+                names = [f"{os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(f))))}/{name}" for f, name in zip(args.logs, names)]
+            groups = [(names, args.logs)]
+        else:
+            print("No logs given. Pass simulation logs or '-d' with a directory of logs.")
+            sys.exit(1)
+
+        printed = False
+        for names, paths in groups:
+            # Leave out logs without cycle records, e.g. those of testbenches with another log format.
+            reports = []
+            for name, path in zip(names, paths):
+                report = analyze_log(path)
+                if report["cycles"]:
+                    reports.append((name, report))
+                else:
+                    print(f"{name}: No SIMLOG cycle records in the log.")
+
+            if reports:
+                if printed:
+                    print()
+                print_table([name for name, _ in reports], [report for _, report in reports])
+                printed = True
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+
+    if not printed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
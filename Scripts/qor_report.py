@@ -0,0 +1,422 @@
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+
+# Directory where `make synthesis` writes its reports (see proc.dc).
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+REPORTS_DIR = os.path.join(ROOT_DIR, "Extra-Credit", "outputs")
+
+# Local history of the QoR of every synthesis run recorded.
+HISTORY_FILE = os.path.join(ROOT_DIR, ".qor_history.jsonl")
+
+# Reports written by proc.dc.
+REPORTS = {
+    "area": "proc_area.syn.txt",
+    "power": "proc_power.syn.txt",
+    "max_delay": "proc_max_delay.syn.txt",
+    "min_delay": "proc_min_delay.syn.txt",
+}
+
+# Default relative change of fmax or area flagged as a regression.
+TOLERANCE = 0.01
+
+# Area report lines, with the keys they are stored under.
+AREA_FIELDS = {
+    "Number of cells": "cells",
+    "Number of combinational cells": "combinational_cells",
+    "Number of sequential cells": "sequential_cells",
+    "Number of buf/inv": "buf_inv_cells",
+    "Combinational area": "combinational_area",
+    "Noncombinational area": "noncombinational_area",
+    "Net Interconnect area": "net_area",
+    "Total cell area": "total_cell_area",
+    "Total area": "total_area",
+}
+
+# Metrics compared between runs in the order they are printed, with their labels and formats.
+METRICS = [
+    ("fmax_mhz", "fmax (MHz)", "{:.4f}"),
+    ("setup_slack", "worst setup slack (ns)", "{:.2f}"),
+    ("hold_slack", "worst hold slack (ns)", "{:.2f}"),
+    ("total_area", "total area", "{:.1f}"),
+    ("total_cell_area", "total cell area", "{:.1f}"),
+    ("cells", "cells", "{:d}"),
+    ("sequential_cells", "sequential cells", "{:d}"),
+    ("dynamic_power_uw", "dynamic power (uW)", "{:.4f}"),
+    ("leakage_power_uw", "leakage power (uW)", "{:.1f}"),
+]
+
+# Scale of the power units of the power report to uW.
+POWER_UNITS = {"pW": 1e-6, "nW": 1e-3, "uW": 1.0, "mW": 1e3, "W": 1e6}
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for the synthesis QoR report.
+
+    Arguments:
+        - The '-d' flag sets the directory holding the proc_*.syn.txt reports.
+        - The '-r' flag records the run in the QoR history, unless it is already recorded.
+        - The '-l' flag lists the QoR history instead.
+        - The '-t' flag sets the relative fmax loss or area growth flagged as a regression.
+        - The '-p' flag prints the per-stage delays of the critical path.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Report the QoR of a synthesis run and flag regressions against the previous run.")
+
+    # Directory of the reports.
+    parser.add_argument("-d", "--directory", default=REPORTS_DIR, help="Directory of the proc_*.syn.txt reports (default: Extra-Credit/outputs).")
+
+    # Flag to record the run.
+    parser.add_argument("-r", "--record", action="store_true", help=f"Record the run in {os.path.basename(HISTORY_FILE)}.")
+
+    # Flag to list the history.
+    parser.add_argument("-l", "--list", action="store_true", help="List the QoR of every recorded run.")
+
+    # Regression tolerance.
+    parser.add_argument("-t", "--tolerance", type=float, default=TOLERANCE, help=f"Relative fmax loss or area growth flagged as a regression (default {TOLERANCE}).")
+
+    # Flag to print the critical path.
+    parser.add_argument("-p", "--path", action="store_true", help="Print the incremental delay of each stage of the critical path.")
+
+    # Parse and return the arguments.
+    return parser.parse_args()
+
+
+def read_report(report_file):
+    """
+    Read a Design Compiler report and the date of the run it was written by.
+
+    Args:
+        report_file (str): Path of the report.
+
+    Returns:
+        tuple: (lines, date) - the lines of the report and its `Date` header in ISO format (None if missing).
+    """
+    with open(report_file, "r") as f:
+        lines = f.read().splitlines()
+    date = next((line.split(":", 1)[1].strip() for line in lines if line.startswith("Date")), None)
+    try:
+        date = datetime.strptime(date, "%a %b %d %H:%M:%S %Y").isoformat(sep=" ")
+    except (TypeError, ValueError):
+        pass
+    return lines, date
+
+
+def parse_area(lines):
+    """
+    Parse the cell counts and areas of a `report_area` report.
+
+    Args:
+        lines (list): The lines of the report.
+
+    Returns:
+        dict: The values of AREA_FIELDS found, as int counts and float areas.
+    """
+    area = {}
+    for line in lines:
+        name, sep, value = line.partition(":")
+        key = AREA_FIELDS.get(name.strip())
+        if sep and key:
+            area[key] = int(value) if key.endswith("cells") else float(value)
+    return area
+
+
+def parse_power(lines):
+    """
+    Parse the total dynamic and leakage power of a `report_power` report.
+
+    Args:
+        lines (list): The lines of the report.
+
+    Returns:
+        dict: `dynamic_power_uw` and `leakage_power_uw`, converted to uW.
+    """
+    power = {}
+    for line in lines:
+        match = re.match(r"\s*(Total Dynamic Power|Cell Leakage Power)\s*=\s*([-\d.eE+]+)\s*(\w+)", line)
+        if match:
+            key = "dynamic_power_uw" if match.group(1).startswith("Total") else "leakage_power_uw"
+            power[key] = float(match.group(2)) * POWER_UNITS.get(match.group(3), 1.0)
+    return power
+
+
+def parse_timing(lines):
+    """
+    Parse the path of a `report_timing` report.
+
+    Args:
+        lines (list): The lines of the report.
+
+    Returns:
+        dict: `startpoint`, `endpoint`, `arrival`, `required`, `slack`, `met`, `period` (the capturing clock
+              edge, 0 for a hold check) and `stages`, the (point, incremental delay) of each point of the path.
+
+    Description:
+        Points whose names are too long for their column are followed by their delays on the next line.
+    """
+    timing = {"stages": []}
+    pending = None
+    in_path = False
+    edges = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith(("Startpoint:", "Endpoint:")):
+            key, value = stripped.split(":", 1)
+            timing[key.lower()] = value.strip()
+        elif stripped.startswith("Point") and "Incr" in stripped:
+            in_path = True
+        elif stripped.startswith("data arrival time") and in_path:
+            timing["arrival"] = float(stripped.split()[-1])
+            in_path = False
+        elif stripped.startswith("data required time") and "required" not in timing:
+            timing["required"] = float(stripped.split()[-1])
+        elif stripped.startswith("clock ") and ("(rise edge)" in stripped or "(fall edge)" in stripped):
+            edges.append(float(stripped.split()[-1]))
+        elif stripped.startswith("slack"):
+            timing["slack"] = float(stripped.split()[-1])
+            timing["met"] = "MET" in stripped
+        elif in_path and stripped and not stripped.startswith("-"):
+            # A point is its name and (cell), then the incremental delay, an optional '#'/'&' and the path delay.
+            match = re.match(r"(.*?)\s*(-?[\d.]+)\s*[#&*]?\s+(-?[\d.]+)(\s+[rf])?$", stripped)
+            if match and (match.group(1) or pending):
+                point = match.group(1) or pending
+                pending = None
+                if not point.startswith("clock"):
+                    timing["stages"].append((point, float(match.group(2))))
+            elif not match:
+                pending = stripped
+
+    # The capturing clock edge is the last clock edge of the report.
+    timing["period"] = edges[-1] if edges else None
+    return timing
+
+
+def stage_delays(stages):
+    """
+    Sum the incremental delays of a path by the top-level instance each point is in.
+
+    Args:
+        stages (list): (point, incremental delay) of each point of the path.
+
+    Returns:
+        list: (instance, delay) in path order, consecutive points of the same instance merged. Cells at the
+              top of the hierarchy (e.g. U44703/Y) are grouped under "proc".
+    """
+    delays = []
+    for point, incr in stages:
+        name = point.split()[0]
+        instance = name.split("/")[0] if name.count("/") > 1 else "proc"
+        if delays and delays[-1][0] == instance:
+            delays[-1] = (instance, delays[-1][1] + incr)
+        else:
+            delays.append((instance, incr))
+    return delays
+
+
+def parse_reports(directory):
+    """
+    Parse the area, power and timing reports of a synthesis run into its QoR.
+
+    Args:
+        directory (str): Directory holding the proc_*.syn.txt reports.
+
+    Returns:
+        dict: The QoR of the run: `date`, the area and power values, `setup_slack`, `hold_slack`, `period`,
+              `fmax_mhz` (from the setup arrival and slack, with times in ns), the critical path `startpoint`
+              and `endpoint`, and its `stages`.
+
+    Raises:
+        FileNotFoundError: If a report is missing.
+    """
+    qor = {}
+    dates = []
+    for kind, name in REPORTS.items():
+        lines, date = read_report(os.path.join(directory, name))
+        dates.append(date)
+        if kind == "area":
+            qor.update(parse_area(lines))
+        elif kind == "power":
+            qor.update(parse_power(lines))
+        elif kind == "max_delay":
+            timing = parse_timing(lines)
+            qor.update(
+                setup_slack=timing.get("slack"), setup_met=timing.get("met"), period=timing.get("period"),
+                startpoint=timing.get("startpoint"), endpoint=timing.get("endpoint"), stages=timing["stages"]
+            )
+            # The shortest period the path meets setup at is the period less the slack.
+            if timing.get("period") is not None and timing.get("slack") is not None:
+                qor["fmax_mhz"] = 1000.0 / (timing["period"] - timing["slack"])
+        else:
+            timing = parse_timing(lines)
+            qor.update(hold_slack=timing.get("slack"), hold_met=timing.get("met"))
+
+    # The reports of one run are written within seconds of each other, and the latest date identifies it.
+    qor["date"] = max((date for date in dates if date), default=None)
+    return qor
+
+
+def read_history(history_file=HISTORY_FILE):
+    """
+    Read the QoR of every recorded synthesis run.
+
+    Args:
+        history_file (str): Path of the history file.
+
+    Returns:
+        list: The recorded QoR of each run, oldest first (empty if there is no history yet).
+    """
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_run(qor, history, history_file=HISTORY_FILE):
+    """
+    Append the QoR of a run to the history, unless a run of the same date is recorded.
+
+    Args:
+        qor (dict): The QoR of the run.
+        history (list): The recorded runs.
+        history_file (str): Path of the history file.
+
+    Returns:
+        bool: True if the run was recorded.
+    """
+    if any(run.get("date") == qor["date"] for run in history):
+        return False
+    with open(history_file, "a") as f:
+        f.write(json.dumps(qor) + "\n")
+    return True
+
+
+def find_regressions(qor, previous, tolerance):
+    """
+    Compare the QoR of a run with a previous run and find the regressions.
+
+    Args:
+        qor (dict): The QoR of the run.
+        previous (dict or None): The QoR of the previous run.
+        tolerance (float): The relative fmax loss or area growth tolerated.
+
+    Returns:
+        list: A description of each regression. Violated setup or hold checks are regressions on their own.
+    """
+    regressions = []
+    if qor.get("setup_met") is False:
+        regressions.append(f"setup slack VIOLATED ({qor['setup_slack']:.2f} ns)")
+    if qor.get("hold_met") is False:
+        regressions.append(f"hold slack VIOLATED ({qor['hold_slack']:.2f} ns)")
+    if previous is None:
+        return regressions
+
+    old, new = previous.get("fmax_mhz"), qor.get("fmax_mhz")
+    if old and new is not None and new < old * (1 - tolerance):
+        regressions.append(f"fmax {old:.4f} -> {new:.4f} MHz ({new / old - 1:+.1%})")
+    for key in ("total_area", "total_cell_area"):
+        old, new = previous.get(key), qor.get(key)
+        if old and new is not None and new > old * (1 + tolerance):
+            regressions.append(f"{key} {old:.1f} -> {new:.1f} ({new / old - 1:+.1%})")
+    return regressions
+
+
+def print_qor(qor, previous, show_path):
+    """
+    Print the QoR of a run, with the change of each metric from the previous run.
+
+    Args:
+        qor (dict): The QoR of the run.
+        previous (dict or None): The QoR of the previous run.
+        show_path (bool): Print the delay of each stage of the critical path.
+    """
+    header = f"Synthesis run of {qor['date']}" + (f" vs {previous['date']}" if previous else "")
+    print(header)
+    for key, label, fmt in METRICS:
+        value = qor.get(key)
+        if value is None:
+            continue
+        line = f"  {label:<26}{fmt.format(value):>16}"
+        old = previous.get(key) if previous else None
+        if old is not None:
+            delta = value - old
+            line += f"  {'+' if delta >= 0 else '-'}{fmt.format(abs(delta))}"
+            if old:
+                line += f" ({delta / old:+.1%})"
+        print(line)
+    print(f"  critical path: {qor.get('startpoint')} -> {qor.get('endpoint')}")
+    if previous and (qor.get("startpoint"), qor.get("endpoint")) != (previous.get("startpoint"), previous.get("endpoint")):
+        # Not a regression on its own, but it explains a change of fmax.
+        print(f"  critical path moved, was: {previous.get('startpoint')} -> {previous.get('endpoint')}")
+
+    if show_path:
+        print("  critical path delay by instance:")
+        for instance, delay in stage_delays(qor.get("stages", [])):
+            print(f"    {instance:<40}{delay:>12.2f}")
+
+
+def list_history(history):
+    """
+    Print the main metrics of every recorded run.
+
+    Args:
+        history (list): The recorded runs, oldest first.
+    """
+    rows = [["date", "fmax (MHz)", "setup slack", "hold slack", "total area", "cells", "endpoint"]]
+    for run in history:
+        rows.append([
+            str(run.get("date")), f"{run.get('fmax_mhz') or 0:.4f}", f"{run.get('setup_slack') or 0:.2f}",
+            f"{run.get('hold_slack') or 0:.2f}", f"{run.get('total_area') or 0:.1f}", str(run.get("cells")), str(run.get("endpoint")),
+        ])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def main():
+    """
+    Main function to report the QoR of the last synthesis run and flag regressions against the history.
+    """
+    args = parse_arguments()
+    history = read_history()
+
+    if args.list:
+        if not history:
+            print(f"No synthesis runs recorded in {os.path.basename(HISTORY_FILE)}.")
+            sys.exit(1)
+        list_history(history)
+        return
+
+    try:
+        qor = parse_reports(args.directory)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+
+    # Compare against the latest recorded run other than this one.
+    previous = next((run for run in reversed(history) if run.get("date") != qor["date"]), None)
+    print_qor(qor, previous, args.path)
+
+    if args.record:
+        if record_run(qor, history):
+            print(f"Recorded the run in {os.path.basename(HISTORY_FILE)}.")
+        else:
+            print(f"The run is already recorded in {os.path.basename(HISTORY_FILE)}.")
+
+    regressions = find_regressions(qor, previous, args.tolerance)
+    if regressions:
+        print("===== QoR REGRESSION =====")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("===== QoR OK =====")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+import os
+import sys
+import glob
+import json
+import time
+import fcntl
+import shutil
+import signal
+import socket
+import argparse
+import threading
+import subprocess
+
+# Command echoed by a session once a script has run. It is sent in lower case and printed in
+# upper case, so the command itself is never taken for its output.
+DONE_MARKER = "__SIM_SERVER_DONE__"
+DONE_COMMAND = f"echo [string toupper {DONE_MARKER.lower()}]"
+
+# Seconds a session may take to return to its prompt after a run is interrupted, before it is killed.
+INTERRUPT_GRACE = 10
+
+# The sessions of the server, each holding the vsim process of one elaborated design. A design may
+# have several sessions, so jobs of the same design run in parallel. The condition is notified
+# whenever a session becomes idle.
+SESSIONS = []
+SESSIONS_LOCK = threading.Condition()
+
+# Server wide state: the time of the last job, the number of sessions started and elaborations, and whether it is running.
+STATE = {"last_job": time.monotonic(), "sessions": 0, "elaborations": 0, "running": True}
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for the simulator session server.
+
+    Arguments:
+        - The '-s' option is the path of the Unix socket the server listens on.
+        - The '-v' option is the simulator command, e.g. the stub `python3 vsim_stub.py` for testing.
+        - The '-n' option limits the number of sessions kept elaborated at a time, over all designs.
+        - The '-i' option sets the seconds without jobs after which the server exits.
+        - The '-q' option queries a running server ('status') or stops it ('stop') instead of serving.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Keep elaborated vsim sessions alive and run simulation jobs in them.")
+
+    # Socket to listen on.
+    parser.add_argument("-s", "--socket", required=True, help="Path of the Unix socket to listen on.")
+
+    # Simulator command.
+    parser.add_argument("-v", "--vsim", default=os.environ.get("VSIM", "vsim"), help="Simulator command (default: $VSIM or vsim).")
+
+    # Number of sessions kept alive.
+    parser.add_argument("-n", "--sessions", type=int, default=int(os.environ.get("SIM_SESSIONS", 4)),
+                        help="Maximum number of elaborated sessions kept alive (default: $SIM_SESSIONS or 4).")
+
+    # Idle time before the server exits.
+    parser.add_argument("-i", "--idle", type=float, default=float(os.environ.get("SIM_SERVER_IDLE", 900)),
+                        help="Seconds without jobs after which the server exits (default: $SIM_SERVER_IDLE or 900).")
+
+    # Query a running server instead.
+    parser.add_argument("-q", "--query", choices=["status", "stop"], help="Print the sessions of the running server, or stop it.")
+
+    args = parser.parse_args()
+    if args.sessions < 1:
+        parser.error("The number of sessions must be at least 1.")
+    return args
+
+
+def read_until_done(session, on_line):
+    """
+    Read the output of a session until it has run its last script.
+
+    Args:
+        session (dict): The session, holding its vsim `process`.
+        on_line (callable): Called with each line of output before the done marker.
+
+    Returns:
+        bool: True if the done marker was read, False if the session exited first.
+    """
+    for line in session["process"].stdout:
+        if DONE_MARKER in line:
+            return True
+        on_line(line)
+    return False
+
+
+def stop_session(session):
+    """
+    Quit the vsim process of a session, killing it if it does not quit, and remove its directory.
+
+    Args:
+        session (dict): The session, holding its vsim `process` and its working directory `dir`.
+    """
+    process = session["process"]
+    session["process"] = None
+    if process is not None and process.poll() is None:
+        try:
+            process.stdin.write("quit -f\n")
+            process.stdin.flush()
+            process.wait(timeout=INTERRUPT_GRACE)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+    shutil.rmtree(session["dir"], ignore_errors=True)
+
+
+def start_session(session, args, on_line):
+    """
+    Start the vsim process of a session in its own directory, loading and elaborating its design once.
+
+    Args:
+        session (dict): The session, holding the vsim `options` of its design and its working directory `dir`.
+        args (argparse.Namespace): The server's arguments, containing the simulator command.
+        on_line (callable): Called with each line of the elaboration output.
+
+    Returns:
+        bool: True if the design was elaborated, False if vsim exited.
+    """
+    # $finish stops the run instead of quitting, so the session outlives each simulation.
+    command = f"exec {args.vsim} -c -onfinish stop -wlf {args.socket}.{session['index']}.wlf {session['options']}"
+    os.makedirs(session["dir"], exist_ok=True)
+    session["process"] = subprocess.Popen(
+        command, shell=True, cwd=session["dir"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1,
+    )
+    session["process"].stdin.write(f"{DONE_COMMAND}\n")
+    session["process"].stdin.flush()
+
+    with SESSIONS_LOCK:
+        STATE["elaborations"] += 1
+        session["elaborations"] += 1
+    if read_until_done(session, on_line):
+        return True
+    stop_session(session)
+    return False
+
+
+def acquire_session(request, args):
+    """
+    Take an idle session of a job's design, or a new one if the design has none idle.
+
+    A design gets a new session while it has fewer than the job's `parallel` sessions and the
+    server fewer than its limit, evicting the least recently used idle sessions of other designs
+    to make room. Otherwise the job waits for a session of its design to become idle. Idle sessions
+    of the same design options with another key (i.e. compiled from other sources since) are stale
+    and stopped.
+
+    Args:
+        request (dict): The job, with the session `key`, vsim `options` and the number of sessions it may run in parallel.
+        args (argparse.Namespace): The server's arguments, containing the session limit.
+
+    Returns:
+        dict: The session of the job, marked busy, which may not have been started yet.
+    """
+    evicted = []
+    with SESSIONS_LOCK:
+        while True:
+            evicted += [other for other in SESSIONS if not other["busy"] and other["options"] == request["options"]
+                        and other["key"] != request["key"]]
+            SESSIONS[:] = [other for other in SESSIONS if other not in evicted]
+
+            pool = [other for other in SESSIONS if other["key"] == request["key"]]
+            idle = sorted((other for other in pool if not other["busy"]), key=lambda other: other["last_used"])
+            if idle:
+                session = idle[-1]
+                break
+
+            others = sorted((other for other in SESSIONS if not other["busy"]), key=lambda other: other["last_used"])
+            if len(pool) < max(request.get("parallel", 1), 1) and (len(SESSIONS) < args.sessions or others):
+                if len(SESSIONS) >= args.sessions:
+                    evicted.append(others[0])
+                    SESSIONS.remove(others[0])
+                STATE["sessions"] += 1
+                session = {"key": request["key"], "options": request["options"], "index": STATE["sessions"],
+                           "dir": f"{args.socket}.{STATE['sessions']}.d", "busy": False, "process": None,
+                           "elaborations": 0, "runs": 0, "last_used": time.monotonic()}
+                SESSIONS.append(session)
+                break
+            SESSIONS_LOCK.wait()
+
+        session["busy"] = True
+        session["last_used"] = time.monotonic()
+
+    for other in evicted:
+        stop_session(other)
+    return session
+
+
+def release_session(session):
+    """
+    Mark a session idle again, waking the jobs waiting for one.
+
+    Args:
+        session (dict): The session the job ran in.
+    """
+    with SESSIONS_LOCK:
+        session["busy"] = False
+        session["runs"] += 1
+        session["last_used"] = time.monotonic()
+        STATE["last_job"] = time.monotonic()
+        SESSIONS_LOCK.notify_all()
+
+
+def stage_inputs(session, request):
+    """
+    Copy the input files of a job into its session's directory, and clear the outputs of the last run.
+
+    Args:
+        session (dict): The session, with its working directory `dir`.
+        request (dict): The job, with its `cwd` and the `inputs` and `outputs` relative to it.
+    """
+    for output in request.get("outputs", []):
+        path = os.path.join(session["dir"], output)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        # The testbench opens its output files in directories that already exist.
+        if os.path.isdir(os.path.join(request["cwd"], output)):
+            os.makedirs(path)
+
+    for input_file in request.get("inputs", []):
+        source, target = os.path.join(request["cwd"], input_file), os.path.join(session["dir"], input_file)
+        if os.path.exists(source):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+        elif os.path.exists(target):
+            os.remove(target)
+
+
+def collect_outputs(session, request):
+    """
+    Move the files a run wrote in its session's directory to the job's directory.
+
+    Args:
+        session (dict): The session, with its working directory `dir`.
+        request (dict): The job, with its `cwd` and the `outputs` relative to it.
+    """
+    for output in request.get("outputs", []):
+        path = os.path.join(session["dir"], output)
+        files = [path] if os.path.isfile(path) else [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+        for file in files:
+            target = os.path.join(request["cwd"], os.path.relpath(file, session["dir"]))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(file, target)
+
+
+def run_job(request, reply, args):
+    """
+    Run a simulation job in a session of its design, elaborating the design only if no session is idle.
+
+    vsim cannot change its directory while a design is loaded, so each session runs in a directory
+    of its own. The job's input files (e.g. its memory image) are copied into it, the simulation is
+    restarted, re-running its initial blocks (e.g. loading the image) before the script, and the
+    files the run wrote are moved back to the job's directory.
+
+    Args:
+        request (dict): The job, with the session `key`, vsim `options`, its `cwd`, `inputs`, `outputs` and `script`.
+        reply (callable): Sends a message to the client, raising OSError if it is gone.
+        args (argparse.Namespace): The server's arguments.
+    """
+    session = acquire_session(request, args)
+    client = {"connected": True}
+
+    def on_line(line):
+        if client["connected"]:
+            try:
+                reply({"line": line})
+            except OSError:
+                # Interrupt the run once the client is gone, e.g. after its timeout or grace period.
+                client["connected"] = False
+                os.kill(session["process"].pid, signal.SIGINT)
+                timer = threading.Timer(INTERRUPT_GRACE, session["process"].kill)
+                timer.start()
+                client["timer"] = timer
+
+    try:
+        start_time = time.monotonic()
+        elaborated = session["process"] is None or session["process"].poll() is not None
+        if elaborated and not start_session(session, args, on_line):
+            reply({"done": True, "error": "The simulator exited while loading the design."})
+            return
+        elaboration_time = time.monotonic() - start_time if elaborated else 0
+
+        restart = "" if elaborated else "restart -f; "
+        try:
+            stage_inputs(session, request)
+            session["process"].stdin.write(f"{restart}{request['script']}\n{DONE_COMMAND}\n")
+            session["process"].stdin.flush()
+            finished = read_until_done(session, on_line)
+            collect_outputs(session, request)
+        except OSError:
+            finished = False
+        if "timer" in client:
+            client["timer"].cancel()
+        if not finished or not client["connected"]:
+            stop_session(session)
+    finally:
+        release_session(session)
+
+    if client["connected"]:
+        reply({
+            "done": True, "error": None if finished else "The simulator exited during the run.",
+            "elaboration": round(elaboration_time, 3), "elaborations": session["elaborations"],
+        })
+
+
+def get_status():
+    """
+    Get the status of the server's sessions.
+
+    Returns:
+        dict: The total number of `elaborations` and, for each session, its design options,
+              whether it is alive, and its number of elaborations and runs.
+    """
+    with SESSIONS_LOCK:
+        sessions = [
+            {"options": session["options"], "alive": session["process"] is not None and session["process"].poll() is None,
+             "elaborations": session["elaborations"], "runs": session["runs"]}
+            for session in SESSIONS
+        ]
+    return {"elaborations": STATE["elaborations"], "sessions": sessions}
+
+
+def handle_client(connection, args):
+    """
+    Handle one request of a client: a simulation job, a status query or a stop request.
+
+    Args:
+        connection (socket.socket): The client's connection, closed when done.
+        args (argparse.Namespace): The server's arguments.
+    """
+    with connection:
+        reader = connection.makefile("r", encoding="utf-8", errors="replace")
+
+        def reply(message):
+            connection.sendall((json.dumps(message) + "\n").encode())
+
+        try:
+            request = json.loads(reader.readline() or "{}")
+            if request.get("query") == "status":
+                reply(get_status())
+            elif request.get("query") == "stop":
+                STATE["running"] = False
+                reply({"stopped": True})
+            elif {"key", "options", "cwd", "script"} <= request.keys():
+                run_job(request, reply, args)
+            else:
+                reply({"done": True, "error": "Invalid request."})
+        except (OSError, ValueError):
+            pass
+
+
+def serve(args):
+    """
+    Serve jobs on the socket until stopped or idle, then quit all sessions.
+
+    Args:
+        args (argparse.Namespace): The server's arguments.
+    """
+    # Only one server may run on a socket, the lock is held until it exits.
+    lock_fh = open(f"{args.socket}.server.lock", "w")
+    try:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"{args.socket}: A server is already running.")
+        sys.exit(1)
+
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(args.socket)
+    server.listen()
+    server.settimeout(1)
+    print(f"Serving on {args.socket} with '{args.vsim}'.", flush=True)
+
+    try:
+        while STATE["running"]:
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                with SESSIONS_LOCK:
+                    busy = any(session["busy"] for session in SESSIONS)
+                if not busy and time.monotonic() - STATE["last_job"] > args.idle:
+                    print(f"Idle for {args.idle:g} seconds, exiting.", flush=True)
+                    break
+                continue
+            threading.Thread(target=handle_client, args=(connection, args), daemon=True).start()
+    finally:
+        server.close()
+        os.remove(args.socket)
+        with SESSIONS_LOCK:
+            sessions = list(SESSIONS)
+        for session in sessions:
+            stop_session(session)
+        for wave_file in glob.glob(f"{glob.escape(args.socket)}.*.wlf"):
+            os.remove(wave_file)
+        print(f"Stopped after {STATE['elaborations']} elaborations.", flush=True)
+
+
+def query(args):
+    """
+    Print the status of the server on the socket, or stop it.
+
+    Args:
+        args (argparse.Namespace): The arguments, containing the socket and the query.
+
+    Raises:
+        SystemExit: If no server is running on the socket.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(args.socket)
+            connection.sendall((json.dumps({"query": args.query}) + "\n").encode())
+            response = json.loads(connection.makefile("r").readline())
+    except (OSError, ValueError):
+        print(f"{args.socket}: No server running.")
+        sys.exit(1)
+
+    if args.query == "stop":
+        print(f"{args.socket}: Server stopping.")
+        return
+    print(f"{args.socket}: {response['elaborations']} elaborations.")
+    for session in response["sessions"]:
+        state = "alive" if session["alive"] else "stopped"
+        print(f"  {session['options']}: {state}, {session['elaborations']} elaborations, {session['runs']} runs.")
+
+
+def main():
+    """
+    Main function to run the simulator session server, or query a running one.
+    """
+    args = parse_arguments()
+    if args.query:
+        query(args)
+    else:
+        serve(args)
+
+
+if __name__ == "__main__":
+    main()
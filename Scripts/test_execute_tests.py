@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import execute_tests
+
+
+# Transcript of a testbench whose check prints its error and keeps running until the $stop ending the test.
+CONTINUING_TRANSCRIPT = """\
+# Loading work.cpu_tb
+# [EXECUTE] ERROR: ZF: 0x0, expected_ZF: 0x1. @ Cycle: 12
+# |[MEMORY] SUCCESS @ Cycle: 13
+# |[WRITE-BACK] SUCCESS @ Cycle: 13
+# ** Note: $stop    : ./tests/cpu_tb.sv(210)
+#    Time: 50 us  Iteration: 1  Instance: /cpu_tb
+# Break in Module cpu_tb at ./tests/cpu_tb.sv line 210
+"""
+
+
+class FindFailureTimeTest(unittest.TestCase):
+    """
+    Tests of `find_failure_time` on the transcripts of failing testbenches.
+    """
+
+    def find_failure_time(self, transcript):
+        """
+        Write a transcript to a temporary file and find its failure time.
+
+        Args:
+            transcript (str): The transcript.
+
+        Returns:
+            int or None: The failure time in ps, as returned by `find_failure_time`.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as log_fh:
+            log_fh.write(transcript)
+        try:
+            return execute_tests.find_failure_time(log_fh.name)
+        finally:
+            os.remove(log_fh.name)
+
+    def test_cycle_of_failing_line(self):
+        # Cycle 12 of the 10 ns clock, not the $stop ending the test.
+        self.assertEqual(self.find_failure_time(CONTINUING_TRANSCRIPT), 120000)
+
+    def test_time_on_failing_line(self):
+        transcript = CONTINUING_TRANSCRIPT.replace("@ Cycle: 12", "Time: 125 ns")
+        self.assertEqual(self.find_failure_time(transcript), 125000)
+
+    def test_testbench_running_after_error_records_whole_run(self):
+        # The $stop ending the test is not the failure, so no time is found.
+        transcript = CONTINUING_TRANSCRIPT.replace(" @ Cycle: 12", "")
+        self.assertIsNone(self.find_failure_time(transcript))
+
+    def test_stop_right_after_failing_line(self):
+        transcript = (
+            "# ERROR: hlt not getting asserted and/or held at its value.\n"
+            "# ** Note: $stop    : ./tests/Verification_tasks.sv(33)\n"
+            "#    Time: 1500 ns  Iteration: 0  Instance: /cpu_tb\n"
+        )
+        self.assertEqual(self.find_failure_time(transcript), 1500000)
+
+    def test_passing_transcript(self):
+        transcript = CONTINUING_TRANSCRIPT.replace("ERROR", "SUCCESS")
+        self.assertIsNone(self.find_failure_time(transcript))
+
+
+class LoggingScriptTest(unittest.TestCase):
+    """
+    Tests of the vsim script `get_logging_script` builds for a testbench without a logging profile.
+    """
+
+    def setUp(self):
+        # An empty wave command directory, so no testbench has a logging profile.
+        wave_cmd_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(wave_cmd_dir.cleanup)
+        patcher = mock.patch.object(execute_tests, "WAVE_CMD_DIR", wave_cmd_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_whole_run(self):
+        script = execute_tests.get_logging_script("no_such_tb", "add wave *;")
+        self.assertEqual(script, "add wave *; run -all;")
+
+    def test_window_up_to_failure(self):
+        # Logging stops at the failure and the simulation is not run past it.
+        script = execute_tests.get_logging_script("no_such_tb", "add wave *;", 100000, 130000)
+        self.assertEqual(script, "run @100000 ps; add wave *; run @130000 ps; nolog -all; ")
+
+
+if __name__ == "__main__":
+    unittest.main()
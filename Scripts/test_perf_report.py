@@ -0,0 +1,41 @@
+import os
+import unittest
+
+import perf_report
+
+# Directory of the stored Phase-3 simulation logs.
+OUTPUTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Phase-3", "outputs")
+
+
+class TakenBranchesTest(unittest.TestCase):
+    """
+    Tests of the branch metrics of `analyze_log` on the stored Phase-3 logs.
+    """
+
+    def analyze(self, name):
+        """
+        Compute the metrics of a stored Phase-3 log.
+
+        Args:
+            name (str): The test name, e.g. test4_predict_not_taken.
+
+        Returns:
+            dict: The metrics of the log, as returned by `analyze_log`.
+        """
+        return perf_report.analyze_log(os.path.join(OUTPUTS_DIR, f"{name}{perf_report.LOG_SUFFIX}"))
+
+    def test_branches_taken_on_late_redirects(self):
+        # Without prediction every taken branch of test4 redirects fetch through a flush.
+        stats = self.analyze("test4_predict_not_taken")
+        self.assertEqual(stats["taken_branches"], 22)
+        self.assertEqual(stats["flushes"], 22)
+
+    def test_mispredictions_are_not_taken_branches(self):
+        # Flushes back to the word after a branch predicted taken undo its count.
+        stats = self.analyze("test4")
+        self.assertEqual(stats["taken_branches"], 22)
+        self.assertEqual(stats["flushes"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import unittest
+import threading
+import subprocess
+
+import execute_tests
+
+# Directory of the server and the vsim stub it runs instead of vsim.
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds to wait for the server to accept connections.
+STARTUP_TIMEOUT = 10
+
+
+class SimServerTest(unittest.TestCase):
+    """
+    Tests of sim_server.py running jobs in sessions of the vsim stub (see vsim_stub.py).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # Start a server with room for two sessions on a socket of its own.
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.socket = os.path.join(cls.temp_dir, "server.sock")
+        vsim = f"{sys.executable} {os.path.join(SCRIPTS_DIR, 'vsim_stub.py')}"
+        cls.server = subprocess.Popen(
+            [sys.executable, os.path.join(SCRIPTS_DIR, "sim_server.py"), "-s", cls.socket, "-v", vsim, "-n", "2", "-i", "60"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while not os.path.exists(cls.socket):
+            if time.monotonic() > deadline or cls.server.poll() is not None:
+                cls.tearDownClass()
+                raise RuntimeError("The session server did not start.")
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.server.poll() is None:
+            try:
+                cls.send({"query": "stop"})
+            except OSError:
+                cls.server.kill()
+            cls.server.wait(timeout=30)
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    @classmethod
+    def send(cls, request):
+        """
+        Send a request to the server and read its replies.
+
+        Args:
+            request (dict): The job or query.
+
+        Returns:
+            tuple: (lines, reply) - the transcript lines of a job and the last reply.
+        """
+        lines = []
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(cls.socket)
+            connection.sendall((json.dumps(request) + "\n").encode())
+            for message in connection.makefile("r"):
+                reply = json.loads(message)
+                if "line" not in reply:
+                    return lines, reply
+                lines.append(reply["line"])
+        raise OSError("The server closed the connection.")
+
+    def make_job(self, name, words):
+        """
+        Create the directory of a job, holding an image of a number of words and an empty outputs directory.
+
+        Args:
+            name (str): The name of the job's directory.
+            words (int): The number of words of its image.
+
+        Returns:
+            str: The job's directory.
+        """
+        cwd = os.path.join(self.temp_dir, self.id().split(".")[-1], name)
+        os.makedirs(os.path.join(cwd, "tests"))
+        os.makedirs(os.path.join(cwd, "outputs"))
+        with open(os.path.join(cwd, "tests", "loadfile_all.img"), "w") as image_fh:
+            image_fh.write("@0000\n" + "".join("a105\n" for _ in range(words)))
+        return cwd
+
+    def run_job(self, cwd, options, script="run -all;", parallel=1):
+        """
+        Run a job of a design in the server, as `run_session_simulation` sends it.
+
+        Args:
+            cwd (str): The job's directory.
+            options (str): The vsim options of the design, also used as its session key.
+            script (str, optional): The vsim commands to run.
+            parallel (int, optional): The number of sessions the design may run in.
+
+        Returns:
+            tuple: (lines, reply) as returned by `send`.
+        """
+        return self.send({
+            "key": options, "options": options, "cwd": cwd, "script": script, "parallel": parallel,
+            "inputs": execute_tests.SESSION_INPUTS, "outputs": execute_tests.SESSION_OUTPUTS,
+        })
+
+    def read_sim_cycles(self, cwd):
+        """
+        Read the `sim_cycles` the stub wrote to the SIMLOG of a job.
+
+        Args:
+            cwd (str): The job's directory.
+
+        Returns:
+            int: The simulated cycles, the number of words of the job's image.
+        """
+        with open(os.path.join(cwd, "outputs", "verilogsim.log"), "r") as sim_log_fh:
+            return int(execute_tests.SIM_STAT_PATTERN.search(sim_log_fh.read()).group(2))
+
+    def test_jobs_share_one_elaboration(self):
+        # Each job of the design restarts the session elaborated by the first and gets its own outputs.
+        for words in (3, 5, 8):
+            cwd = self.make_job(f"job{words}", words)
+            lines, reply = self.run_job(cwd, "work.serial_tb")
+            self.assertIsNone(reply["error"])
+            self.assertEqual(reply["elaborations"], 1)
+            self.assertIn(f"# Loaded {words} words from tests/loadfile_all.img.\n", lines)
+            self.assertEqual(self.read_sim_cycles(cwd), words)
+
+        _, status = self.send({"query": "status"})
+        sessions = [session for session in status["sessions"] if session["options"] == "work.serial_tb"]
+        self.assertEqual([(session["elaborations"], session["runs"]) for session in sessions], [(1, 3)])
+
+    def test_parallel_jobs_keep_their_outputs(self):
+        # Jobs running at once are spread over at most `parallel` sessions, each writing its job's outputs.
+        jobs = {words: self.make_job(f"job{words}", words) for words in (2, 4, 6, 7)}
+        replies = {}
+        threads = [
+            threading.Thread(target=lambda words, cwd: replies.update({words: self.run_job(cwd, "work.parallel_tb", parallel=2)[1]}), args=item)
+            for item in jobs.items()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for words, cwd in jobs.items():
+            self.assertIsNone(replies[words]["error"])
+            self.assertEqual(self.read_sim_cycles(cwd), words)
+
+        _, status = self.send({"query": "status"})
+        sessions = [session for session in status["sessions"] if session["options"] == "work.parallel_tb"]
+        self.assertLessEqual(len(sessions), 2)
+        self.assertEqual(sum(session["runs"] for session in sessions), len(jobs))
+        self.assertEqual(sum(session["elaborations"] for session in sessions), len(sessions))
+
+    def test_cd_in_loaded_design_fails(self):
+        # vsim cannot change directory with a design loaded, which is why each session has a directory of its own.
+        cwd = self.make_job("job", 1)
+        lines, reply = self.run_job(cwd, "work.cd_tb", f"cd {{{cwd}}}; run -all;")
+        self.assertIsNone(reply["error"])
+        self.assertTrue(any("cd: Cannot change directory" in line for line in lines))
+        self.assertFalse(os.path.exists(os.path.join(cwd, "outputs", "verilogsim.log")))
+
+
+if __name__ == "__main__":
+    unittest.main()
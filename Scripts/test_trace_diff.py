@@ -0,0 +1,43 @@
+import os
+import shutil
+import unittest
+import subprocess
+
+# Root of the repository, holding the Makefile, and the stored Phase-3 outputs.
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+OUTPUTS_DIR = os.path.join(ROOT_DIR, "Phase-3", "outputs")
+
+# Suffix of the traces stored by `rename_sim_files()`.
+TRACE_SUFFIX = "_verilogsim.trace.txt"
+
+# Stored outputs of known design bugs, with the divergence `make diff` reports for them. In test7 the
+# first SW misses the data cache and its data bus drops to 0 while the write is held, so the array's
+# first element reads back as 0 (the Phase-3 design reproduces the stored trace on Verilator too).
+KNOWN_DIVERGENCES = {
+    "test7": "Trace diverges at record 16 after 16 matching records.\n    VALUE: 0x0000 (new) vs 0x0003 (reference)",
+    "test7_predict_not_taken": "Trace diverges at record 16 after 16 matching records.\n    VALUE: 0x0000 (new) vs 0x0003 (reference)",
+}
+
+
+@unittest.skipIf(shutil.which("make") is None, "make is not installed.")
+class StoredOutputsTest(unittest.TestCase):
+    """
+    Tests that the stored Phase-3 outputs match the ISA model with `make diff 3 <test>`, but for known bugs.
+    """
+
+    def test_stored_outputs_match_model(self):
+        tests = sorted(f[:-len(TRACE_SUFFIX)] for f in os.listdir(OUTPUTS_DIR) if f.endswith(TRACE_SUFFIX))
+        self.assertTrue(tests)
+        for test in tests:
+            with self.subTest(test=test):
+                result = subprocess.run(["make", "-s", "diff", "3", test], cwd=ROOT_DIR, capture_output=True, text=True)
+                if test in KNOWN_DIVERGENCES:
+                    # Only the known bug diverges, remove the entry once the outputs are fixed.
+                    self.assertNotEqual(result.returncode, 0, f"{test} matches the model now.")
+                    self.assertIn(KNOWN_DIVERGENCES[test], result.stdout)
+                else:
+                    self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,460 @@
+import os
+import sys
+import argparse
+from collections import namedtuple
+
+from isa_model import (
+    MAX_CYCLES, FIRST_CYCLE, SW, LW, LLB, LHB, B, BR, PCS, HLT, REG_WRITE_OPS,
+    list_programs, default_data_file, load_program, read_image, simulate
+)
+
+# Constants describing the Phase-3 memory hierarchy (memory4c.v, Cache.v, Cache_Control.v).
+MEM_LATENCY = 4          # Cycles from enabling memory4c until its data is valid.
+BLOCK_WORDS = 8          # Words per cache block, filled one per cycle.
+CACHE_SETS = 64          # Sets per cache, indexed by addr[9:4].
+CACHE_WAYS = 2           # Ways per set, replaced in LRU order.
+
+# Constants describing the branch predictor (BHT.v, BTB.v), both indexed by PC[3:1].
+BRANCH_ENTRIES = 8
+
+# Flag setting opcodes (ControlUnit.v Z_en/NV_en): ADD, SUB, XOR, SLL, SRA, ROR.
+FLAG_OPS = frozenset([0, 1, 2, 4, 5, 6])
+
+# Opcodes that read Rd as their first source (ControlUnit.v RegSrc): LLB, LHB, PCS, HLT.
+REG_SRC_OPS = frozenset([LLB, LHB, PCS, HLT])
+
+# Events counted by the model, named after the signals cpu_tb.sv monitors.
+EVENTS = ("load_to_use_hazard", "B_hazard", "BR_hazard", "IF_flush", "I_cache_stall", "D_cache_stall")
+
+# The pipeline view of one instruction: its control signals, hazard unit inputs and branch outcome.
+Slot = namedtuple("Slot", [
+    "pc", "reg_write", "rd", "mem_enable", "mem_read", "mem_write", "flag_set", "src1", "src2",
+    "is_branch", "is_br", "hlt", "mem_addr", "taken", "actual_target"
+])
+
+# An empty pipeline slot (NOP or flushed instruction).
+BUBBLE = Slot(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for running the timing model.
+
+    Arguments:
+        - 'program' is the WISC-S25 assembly file (.list/.s) or memory image (.img) to time.
+        - The '-a' flag times every program in the TestPrograms directory instead.
+        - The '-p' flag selects the pipeline to model (Phase-2 single cycle memories or Phase-3 caches).
+        - The '-b' flag selects the branch predictor (dynamic BHT/BTB or static predict not taken).
+        - The '-l' flag sets the main memory latency of the Phase-3 memory hierarchy.
+        - The '-n' flag sets the cycle limit after which the model gives up.
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Estimate the cycle count of a WISC-S25 program on the pipeline.")
+
+    # The program to time, either assembly or an assembled memory image.
+    parser.add_argument("program", nargs="?", help="WISC-S25 assembly file (.list/.s) or memory image (.img) to time.")
+
+    # Flag to time every program in the TestPrograms directory.
+    parser.add_argument("-a", "--all", action="store_true", help="Time all programs in the TestPrograms directory.")
+
+    # Pipeline to model.
+    parser.add_argument(
+        "-p", "--phase", type=int, choices=[2, 3], default=3,
+        help="Pipeline to model: 2=single cycle memories, 3=instruction/data caches over memory4c."
+    )
+
+    # Branch predictor to model.
+    parser.add_argument(
+        "-b", "--predictor", choices=["dynamic", "not-taken"], default="dynamic",
+        help="Branch predictor: dynamic BHT/BTB or static predict not taken."
+    )
+
+    # Main memory latency.
+    parser.add_argument("-l", "--latency", type=int, default=MEM_LATENCY, help="Main memory read latency in cycles (Phase-3).")
+
+    # Cycle limit of the model.
+    parser.add_argument("-n", "--max-cycles", type=int, default=MAX_CYCLES, help="Cycle limit before the model gives up.")
+
+    # Parse and return the arguments.
+    return parser.parse_args()
+
+
+def build_slots(records):
+    """
+    Convert the ISA model's retirement records into the pipeline view of each instruction.
+
+    Args:
+        records (list): Retirement records produced by `isa_model.simulate`.
+
+    Returns:
+        list: One Slot per executed instruction, in program order.
+
+    Description:
+        - Control signals follow ControlUnit.v, and are zero for a NOP as Decode.v squashes them.
+        - The hazard unit compares against SrcReg1/SrcReg2 as decoded, even for B whose Rs field is offset bits.
+        - A branch is taken when the next executed instruction is not at PC+2, or it is unconditional.
+    """
+    slots = []
+
+    for k, (pc, inst, reg_write, rd, _, mem_read, mem_write, mem_addr, _, _) in enumerate(records):
+        opcode = inst >> 12
+        rs, rt = (inst >> 4) & 0xF, inst & 0xF
+        pc_next = (pc + 2) & 0xFFFF
+
+        # A NOP has no control signals, and its (all zero) register fields cannot cause hazards.
+        if inst == 0:
+            slots.append(BUBBLE._replace(pc=pc))
+            continue
+
+        # Source registers as seen by the hazard unit (Decode.v).
+        src1 = rd if opcode in REG_SRC_OPS else rs
+        src2 = rd if opcode == SW else rt
+
+        # Outcome of a branch, taken from the path the program actually executed.
+        is_branch = opcode in (B, BR)
+        actual_target = records[k + 1][0] if k + 1 < len(records) else pc_next
+        taken = is_branch and (actual_target != pc_next or rd >> 1 == 7)
+
+        slots.append(Slot(
+            pc, int(opcode in REG_WRITE_OPS), rd, int(opcode in (LW, SW)), mem_read, mem_write,
+            int(opcode in FLAG_OPS), src1, src2, int(is_branch), opcode == BR, opcode == HLT,
+            mem_addr, taken, actual_target
+        ))
+
+    return slots
+
+
+def cache_lookup(cache, addr):
+    """
+    Look up an address in a cache, making its block the most recently used on a hit.
+
+    Args:
+        cache (list): Per set lists of the tags present, most recently used first.
+        addr (int): The byte address being accessed.
+
+    Returns:
+        bool: True on a hit.
+    """
+    ways = cache[(addr >> 4) % CACHE_SETS]
+    tag = addr >> 4
+    if tag not in ways:
+        return False
+
+    # Move the block to the front of the LRU order.
+    if ways[0] != tag:
+        ways.remove(tag)
+        ways.insert(0, tag)
+    return True
+
+
+def cache_fill(cache, addr):
+    """
+    Install the block holding an address in a cache, evicting the least recently used way.
+
+    Args:
+        cache (list): Per set lists of the tags present, most recently used first.
+        addr (int): A byte address in the block being installed.
+    """
+    ways = cache[(addr >> 4) % CACHE_SETS]
+    ways.insert(0, addr >> 4)
+    del ways[CACHE_WAYS:]
+
+
+def simulate_timing(records, phase=3, predictor="dynamic", latency=MEM_LATENCY, max_cycles=MAX_CYCLES):
+    """
+    Replay an executed program through a cycle level model of the pipelined processor.
+
+    Args:
+        records (list): Retirement records of the program produced by `isa_model.simulate`.
+        phase (int): 2 for the single cycle memories of Phase-2, 3 for the caches of Phase-3.
+        predictor (str): "dynamic" for the BHT/BTB predictor, "not-taken" to always fetch PC+2.
+        latency (int): Main memory read latency of the Phase-3 cache fills.
+        max_cycles (int): The cycle limit of the testbench.
+
+    Returns:
+        dict: The `sim_cycles`, `inst_count`, cache hit/request counts and `halted` flag the testbench would
+              report, the per-cycle counts of each event in EVENTS, and the `branches`/`mispredictions` counts.
+
+    Description:
+        - Each cycle evaluates HazardDetectionUnit.v on the IF/ID, ID/EX, EX/MEM and MEM/WB registers:
+          load-to-use, B and BR hazards stall IF/ID and flush ID/EX, I-cache misses stall the PC and flush
+          IF/ID, D-cache misses freeze everything up to EX/MEM and flush MEM/WB.
+        - Branches resolve in ID; a fetch PC different from the actual target flushes IF/ID and redirects.
+          Predictor reads and writes only happen while the PC is not stalled, as in Branch_Cache.v.
+        - A cache miss spends one cycle detecting it, one cycle waiting for the memory bus, then
+          `latency + BLOCK_WORDS` cycles filling. The D-cache only gets the bus while the I-cache hits.
+        - The program runs along its executed path, so wrong path fetches only matter for the I-cache.
+    """
+    slots = build_slots(records)
+    count = len(slots)
+    caches = phase == 3
+    dynamic = predictor == "dynamic"
+    fill_cycles = 1 + latency + BLOCK_WORDS
+
+    # Statistics in the format of the testbench.
+    stats = dict.fromkeys(EVENTS, 0)
+    stats.update(sim_cycles=0, inst_count=0, halted=False, branches=0, mispredictions=0,
+                 dcachehit_count=0, icachehit_count=0, dcachereq_count=0, icachereq_count=0)
+
+    # Fetch PC, and index of the next instruction on the executed path.
+    pc = 0
+    next_inst = 0
+
+    # Pipeline registers, with the prediction and BTB target pipelined alongside IF/ID.
+    if_id = id_ex = ex_mem = mem_wb = BUBBLE
+    if_id_prediction = if_id_target = 0
+
+    # Branch history table entries (valid, tag, 2-bit counter) and branch target buffer.
+    bht = [(0, 0, 0)] * BRANCH_ENTRIES
+    btb = [0] * BRANCH_ENTRIES
+
+    # Caches, and the state of their fill FSMs: the block being filled, the cycle it is installed,
+    # and the cycle the FSM is idle again. The D-cache FSM waits for the bus while `d_done` is None.
+    icache = [[] for _ in range(CACHE_SETS)]
+    dcache = [[] for _ in range(CACHE_SETS)]
+    i_fill = d_fill = None
+    i_done = d_done = i_idle = d_detect = 0
+
+    for cycle in range(FIRST_CYCLE, max_cycles + 1):
+        # The testbench counts cycles with a register write, a memory write or the halt.
+        if mem_wb.hlt or mem_wb.reg_write or ex_mem.mem_write:
+            stats["inst_count"] += 1
+
+        ############################
+        # Instruction cache (IF). #
+        ############################
+        icache_hit = True
+        if caches:
+            if i_fill is not None and cycle == i_done:
+                # The fill completes and the block can be read this cycle.
+                cache_fill(icache, i_fill)
+                i_fill = None
+
+            if i_fill is not None:
+                icache_hit = False
+            else:
+                icache_hit = cache_lookup(icache, pc)
+                if not icache_hit and cycle >= i_idle:
+                    # Detect the miss, wait one cycle for the bus (always granted), then fill.
+                    i_fill = pc
+                    i_done = cycle + 1 + fill_cycles
+                    i_idle = i_done + 1
+                    stats["icachereq_count"] += 1
+
+            stats["icachehit_count"] += icache_hit
+            stats["icachereq_count"] += icache_hit
+
+        #######################
+        # Data cache (MEM). #
+        #######################
+        dcache_miss = False
+        if caches and ex_mem.mem_enable:
+            if d_fill is not None and cycle == d_done:
+                # The fill completes and the access hits this cycle.
+                cache_fill(dcache, d_fill)
+                d_fill = None
+
+            if d_fill is not None:
+                dcache_miss = True
+
+                # The FSM waits in WAIT until the I-cache hits, then fills.
+                if d_done is None and cycle > d_detect and icache_hit:
+                    d_done = cycle + fill_cycles
+            elif not cache_lookup(dcache, ex_mem.mem_addr):
+                dcache_miss = True
+                d_fill, d_done, d_detect = ex_mem.mem_addr, None, cycle
+
+            stats["dcachereq_count"] += 1
+            stats["dcachehit_count"] += not dcache_miss
+
+        # The simulation ends once HLT reaches write back, after the cache statistics of that cycle.
+        if mem_wb.hlt:
+            stats.update(sim_cycles=cycle, halted=True)
+            return stats
+
+        #########################################
+        # Hazard detection and branches (ID). #
+        #########################################
+        load_to_use_hazard = bool(
+            id_ex.mem_read and id_ex.rd and
+            (id_ex.rd == if_id.src1 or (id_ex.rd == if_id.src2 and not if_id.mem_write))
+        )
+        B_hazard = bool(if_id.is_branch and id_ex.flag_set)
+        BR_hazard = bool(if_id.is_br and (
+            id_ex.flag_set or
+            (id_ex.reg_write and id_ex.rd and id_ex.rd == if_id.src1) or
+            (ex_mem.reg_write and ex_mem.rd and ex_mem.rd == if_id.src1)
+        ))
+        hazard = load_to_use_hazard or B_hazard or BR_hazard
+
+        if_id_stall = dcache_miss or hazard
+        pc_stall = not icache_hit or if_id_stall
+        id_flush = hazard and not dcache_miss
+        update_PC = bool(if_id.is_branch and pc != if_id.actual_target)
+        IF_flush = not if_id_stall and (not icache_hit or update_PC)
+
+        # Count the events like the signals cpu_tb.sv monitors.
+        stats["load_to_use_hazard"] += load_to_use_hazard
+        stats["B_hazard"] += B_hazard
+        stats["BR_hazard"] += BR_hazard
+        stats["IF_flush"] += IF_flush
+        stats["I_cache_stall"] += not icache_hit
+        stats["D_cache_stall"] += dcache_miss
+
+        ####################################
+        # Branch prediction (Fetch.v). #
+        ####################################
+        index = (pc >> 1) % BRANCH_ENTRIES
+        if phase == 3:
+            # A valid entry with a matching tag gives its counter, otherwise weakly not taken.
+            valid, tag, counter = bht[index]
+            prediction = counter if valid and tag == pc >> 4 else 1
+            predicted_taken = prediction >> 1
+        elif if_id.is_branch:
+            # The single ported Phase-2 BHT reads zero while the branch in ID writes it.
+            prediction = predicted_taken = 0
+        else:
+            _, tag, prediction = bht[index]
+            predicted_taken = tag == pc >> 4 and prediction >> 1
+        predicted_target = btb[index]
+
+        # The PC holds on a fetched HLT, and past the end of the executed path only HLT is fetched.
+        on_path = next_inst < count and pc == slots[next_inst].pc
+        hlt_fetched = slots[next_inst].hlt if on_path else next_inst >= count
+
+        if update_PC:
+            pc_new = if_id.actual_target
+        elif hlt_fetched:
+            pc_new = pc
+        elif predicted_taken and dynamic:
+            pc_new = predicted_target
+        else:
+            pc_new = (pc + 2) & 0xFFFF
+
+        # Update the BHT and BTB with the outcome of the branch in ID, unless the PC is stalled.
+        if if_id.is_branch and not pc_stall:
+            index = (if_id.pc >> 1) % BRANCH_ENTRIES
+            taken = if_id.taken
+            if phase == 3:
+                # Weak not taken always moves on, the other states only if the entry still holds this branch.
+                tags_match = bht[index][1] == if_id.pc >> 4
+                if if_id_prediction == 1 or tags_match:
+                    counter = min(if_id_prediction + 1, 3) if taken else max(if_id_prediction - 1, 0)
+                else:
+                    counter = 1
+                bht[index] = (1, if_id.pc >> 4, counter)
+            else:
+                counter = min(if_id_prediction + 1, 3) if taken else max(if_id_prediction - 1, 0)
+                bht[index] = (1, if_id.pc >> 4, counter)
+            if taken and if_id_target != if_id.actual_target:
+                btb[index] = if_id.actual_target
+
+            stats["branches"] += 1
+            stats["mispredictions"] += update_PC
+
+        ##############################
+        # Clock the pipeline state. #
+        ##############################
+        # A D-cache miss freezes EX/MEM and everything before it, and sends a NOP to write back.
+        mem_wb = BUBBLE if dcache_miss else ex_mem
+        if not dcache_miss:
+            ex_mem = id_ex
+            id_ex = BUBBLE if id_flush else if_id
+
+        if not if_id_stall:
+            if IF_flush or not on_path:
+                if_id, if_id_prediction, if_id_target = BUBBLE, 0, 0
+            else:
+                if_id, if_id_prediction, if_id_target = slots[next_inst], prediction, predicted_target
+                next_inst += 1
+
+        # A redirect always wins (the executed path is modelled even if the I-cache is missing).
+        if update_PC and not if_id_stall:
+            pc = pc_new
+        elif not pc_stall:
+            pc = pc_new
+
+    # The cycle limit was reached without HLT reaching write back.
+    stats["sim_cycles"] = max_cycles
+    return stats
+
+
+def run_timing(program_file, phase=3, predictor="dynamic", latency=MEM_LATENCY, max_cycles=MAX_CYCLES):
+    """
+    Execute a program on the ISA model and estimate its cycle count on the pipeline.
+
+    Args:
+        program_file (str): Assembly file or memory image to time.
+        phase (int): The pipeline to model (2 or 3).
+        predictor (str): The branch predictor to model ("dynamic" or "not-taken").
+        latency (int): Main memory read latency of the Phase-3 cache fills.
+        max_cycles (int): The cycle limit of the model.
+
+    Returns:
+        tuple: (stats, count) - the statistics from `simulate_timing` and the number of instructions executed.
+    """
+    memory = load_program(program_file)
+    data_file = default_data_file(phase)
+    data_memory = read_image(data_file) if data_file else None
+
+    # Run the program architecturally, then replay it through the pipeline.
+    records = []
+    simulate(memory, data_memory, max_cycles, zero_nop=True, records=records)
+    stats = simulate_timing(records, phase, predictor, latency, max_cycles)
+
+    return stats, len(records)
+
+
+def main():
+    """
+    Main function to parse arguments and time one or all programs on the pipeline model.
+    """
+    args = parse_arguments()
+
+    # Select the programs to time.
+    if args.all:
+        programs = list_programs()
+    elif args.program:
+        programs = [args.program]
+    else:
+        print("No program given. Pass a program or '-a' to time all programs in TestPrograms.")
+        sys.exit(1)
+
+    failed = False
+    for program in programs:
+        name = os.path.splitext(os.path.basename(program))[0]
+        try:
+            stats, count = run_timing(program, args.phase, args.predictor, args.latency, args.max_cycles)
+        except FileNotFoundError as e:
+            print(e)
+            sys.exit(1)
+        except ValueError as e:
+            print(f"\n===== Error assembling file {os.path.basename(program)} =====")
+            print(str(e).replace("\n", " ").strip())
+            sys.exit(1)
+
+        if not stats["halted"]:
+            print(f"{name}: ERROR: More than {args.max_cycles} cycles of simulation.")
+            failed = True
+            continue
+
+        # Summary line with the testbench statistics and the CPI.
+        print(f"{name}: sim_cycles {stats['sim_cycles']}, inst_count {stats['inst_count']}, "
+              f"{count} instructions, CPI {stats['sim_cycles'] / count:.2f}")
+
+        # Stall and flush breakdown.
+        events = ", ".join(f"{event} {stats[event]}" for event in EVENTS)
+        print(f"    {events}")
+        print(f"    branches {stats['branches']}, mispredictions {stats['mispredictions']}")
+        if args.phase == 3:
+            print(f"    icache {stats['icachehit_count']}/{stats['icachereq_count']} hits, "
+                  f"dcache {stats['dcachehit_count']}/{stats['dcachereq_count']} hits")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
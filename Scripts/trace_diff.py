@@ -0,0 +1,445 @@
+import os
+import re
+import sys
+import argparse
+import tempfile
+from itertools import zip_longest
+
+from isa_model import MAX_CYCLES, default_data_file, run_model
+
+# Regular expression for the header of a program in the aggregated outputs (e.g. Phase2_test_outputs.txt).
+SET_HEADER_PATTERN = re.compile(r'^//\s*INSTRUCTION SET\s+(\d+)')
+
+# Regular expression for a summary record of the testbench log (e.g. `SIMLOG:: sim_cycles 18`).
+SUMMARY_PATTERN = re.compile(r'^SIMLOG::\s+(.*?)\s*(\d*)\s*$')
+
+# Names of the values of the multi-column R: and M: fields of a cycle record.
+COLUMN_NAMES = {
+    "R": ("R.write", "R.reg", "R.data"),
+    "M": ("M.read", "M.write", "M.addr", "M.data_in", "M.data_out"),
+}
+
+# First token of each kind of trace record (single cycle INUM records, pipelined REG/LOAD/STORE records).
+TRACE_KINDS = ("INUM:", "REG:", "LOAD:", "STORE:")
+
+# Summary statistics that depend on the pipeline timing, which the ISA model only reports for an ideal pipeline.
+# The Phase-3 testbench also counts the stalled cycles of an instruction in inst_count.
+TIMING_SUMMARIES = {
+    2: ("sim_cycles",),
+    3: ("sim_cycles", "inst_count", "dcachehit_count", "icachehit_count", "dcachereq_count", "icachereq_count"),
+}
+
+
+def parse_arguments():
+    """
+    Parse and validate command-line arguments for the trace differ.
+
+    Arguments:
+        - 'new' is the log or trace file of the run to check.
+        - 'reference' is the golden log or trace file to compare it against.
+        - The '-m' flag runs a program on the ISA model and uses its output as the reference instead.
+        - The '-p' flag selects the phase whose testbench format the ISA model reproduces.
+        - The '-s' flag selects a program of an aggregated outputs file (e.g. Phase2_test_outputs.txt).
+
+    Returns:
+        argparse.Namespace: A namespace object containing the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Find the first divergence between a simulation log or trace and a reference.")
+
+    # The files to compare.
+    parser.add_argument("new", help="Log or trace file of the run to check.")
+    parser.add_argument("reference", nargs="?", help="Golden log or trace file to compare against.")
+
+    # Program to run on the ISA model as the reference.
+    parser.add_argument("-m", "--model", help="Assembly file or memory image to run on the ISA model as the reference.")
+
+    # Phase whose testbench format the ISA model reproduces.
+    parser.add_argument("-p", "--phase", type=int, choices=[1, 2, 3], default=3, help="Phase of the files (default 3).")
+
+    # Program of an aggregated outputs file.
+    parser.add_argument("-s", "--set", type=int, help="Instruction set to compare from aggregated outputs files.")
+
+    # Parse the arguments.
+    args = parser.parse_args()
+
+    if bool(args.reference) == bool(args.model):
+        parser.error("Pass either a reference file or '-m' with a program to run on the ISA model.")
+
+    return args
+
+
+def iter_lines(path, instruction_set=None):
+    """
+    Iterate over the numbered lines of a file, optionally only those of one program of aggregated outputs.
+
+    Args:
+        path (str): Path of the log, trace or aggregated outputs file.
+        instruction_set (int, optional): The `INSTRUCTION SET` to select. Files without such
+                                         headers are read in full.
+
+    Yields:
+        tuple: (line_number, line) for each selected line, without the line ending.
+    """
+    # None until a header is seen, then whether the current program is the selected one.
+    selected = None
+
+    with open(path, "r", errors="replace") as f:
+        for line_number, line in enumerate(f, 1):
+            if instruction_set is not None:
+                match = SET_HEADER_PATTERN.match(line)
+                if match:
+                    selected = int(match.group(1)) == instruction_set
+                    continue
+            if selected is not False:
+                yield line_number, line.rstrip("\n")
+
+
+def iter_cycles(path, instruction_set=None):
+    """
+    Iterate over the `SIMLOG:: Cycle` records of a testbench log.
+
+    Args:
+        path (str): Path of the log file.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+
+    Yields:
+        tuple: (line_number, cycle, tokens) with the tokens of the PC, I, R and M fields (see `parse_fields`).
+    """
+    for line_number, line in iter_lines(path, instruction_set):
+        if not line.startswith("SIMLOG:: "):
+            continue
+        tokens = line.split()
+        if len(tokens) > 2 and tokens[1] == "Cycle":
+            yield line_number, int(tokens[2]), tokens[3:]
+
+
+def read_summary(path, instruction_set=None):
+    """
+    Read the summary records a testbench writes after the cycle records (halt and statistics).
+
+    Args:
+        path (str): Path of the log file.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+
+    Returns:
+        dict: Mapping of each summary name (e.g. "sim_cycles") to its value ("" for `Processor halted`).
+    """
+    summary = {}
+    for _, line in iter_lines(path, instruction_set):
+        if line.startswith("SIMLOG::") and line.split()[1:2] != ["Cycle"]:
+            match = SUMMARY_PATTERN.match(line)
+            summary[match.group(1)] = match.group(2)
+    return summary
+
+
+def iter_events(path, instruction_set=None, collapse=False):
+    """
+    Iterate over the records of a testbench trace (`INUM:`, `REG:`, `LOAD:` and `STORE:` lines).
+
+    Args:
+        path (str): Path of the trace file.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+        collapse (bool, optional): Skip records equal to the one before, which the Phase-3 testbench
+                                   writes for each cycle an instruction stalls in WB or MEM. A STORE
+                                   stalled in MEM is written each cycle with the data bus of that cycle,
+                                   so STOREs to the address of the one before are skipped too.
+
+    Yields:
+        tuple: (line_number, tokens) with the tokens of the record (see `parse_fields`).
+    """
+    previous = None
+
+    for line_number, line in iter_lines(path, instruction_set):
+        tokens = line.split()
+        if not tokens or tokens[0] not in TRACE_KINDS:
+            continue
+        if collapse and previous is not None:
+            if tokens == previous:
+                continue
+            if tokens[0] == "STORE:" and previous[0] == "STORE:" and tokens[1:3] == previous[1:3]:
+                continue
+        previous = tokens
+        yield line_number, tokens
+
+
+def parse_fields(tokens):
+    """
+    Parse the tokens of a log or trace record into named fields.
+
+    Args:
+        tokens (list): The tokens of the record, each `NAME:` token followed by its values.
+
+    Returns:
+        list: The (name, value) pairs of the record, e.g. [("REG", "1"), ("VALUE", "0x0051")],
+              [("LOAD", None), ("ADDR", "0x0010"), ("VALUE", "0x0001")] or, for the R: and M:
+              columns of a cycle record, [("R.write", "1"), ("R.reg", "1"), ("R.data", "00000051")].
+    """
+    fields = []
+    name, values = None, []
+    for token in tokens + [":"]:
+        if not token.endswith(":"):
+            values.append(token)
+            continue
+
+        # A new name ends the values of the previous one.
+        if name in COLUMN_NAMES:
+            fields += [(column, value) for column, value in zip_longest(COLUMN_NAMES[name], values) if column]
+        elif name is not None:
+            fields.append((name, " ".join(values) or None))
+        name, values = token[:-1], []
+    return fields
+
+
+def same_value(new, reference):
+    """
+    Check whether two field values are equal, ignoring case and leading zeros of numbers.
+
+    Args:
+        new (str): The value in the new file.
+        reference (str): The value in the reference.
+
+    Returns:
+        bool: True if the values are equal.
+    """
+    if new is None or reference is None:
+        return new == reference
+    new, reference = new.lower(), reference.lower()
+    try:
+        return int(new, 0 if new.startswith("0x") else 16) == int(reference, 0 if reference.startswith("0x") else 16)
+    except ValueError:
+        return new == reference
+
+
+def first_field_difference(new_tokens, reference_tokens):
+    """
+    Find the first field that differs between two records.
+
+    Args:
+        new_tokens (list): The tokens of the new record.
+        reference_tokens (list): The tokens of the reference record.
+
+    Returns:
+        tuple or None: (name, new_value, reference_value) of the first difference, or None if the records match.
+    """
+    # Most records match exactly, so only parse the fields of records that differ in their text.
+    if new_tokens == reference_tokens:
+        return None
+
+    new_fields, reference_fields = parse_fields(new_tokens), parse_fields(reference_tokens)
+    for new, reference in zip_longest(new_fields, reference_fields, fillvalue=(None, None)):
+        if new[0] != reference[0]:
+            return "record", " ".join(name for name, _ in new_fields), " ".join(name for name, _ in reference_fields)
+        if not same_value(new[1], reference[1]):
+            return new[0], new[1], reference[1]
+    return None
+
+
+def diff_cycles(new_file, reference_file, instruction_set=None):
+    """
+    Compare the cycle records of two logs in lock step, reading both files as streams.
+
+    Args:
+        new_file (str): The log of the run to check.
+        reference_file (str): The reference log.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+
+    Returns:
+        tuple: (count, divergence) - the number of matching cycles and None, or a dict describing
+               the first divergence (cycle, field, values and line numbers).
+    """
+    count = 0
+    records = zip_longest(iter_cycles(new_file, instruction_set), iter_cycles(reference_file, instruction_set))
+    for new, reference in records:
+        if new is None or reference is None:
+            ended = "new log" if new is None else "reference"
+            record = reference or new
+            return count, {"where": f"cycle {record[1]}", "field": f"{ended} ended", "line": record[0]}
+
+        if new[1] != reference[1]:
+            difference = ("cycle", str(new[1]), str(reference[1]))
+        else:
+            difference = first_field_difference(new[2], reference[2])
+        if difference:
+            return count, {"where": f"cycle {reference[1]}", "field": difference[0], "new": difference[1], "reference": difference[2], "line": new[0], "reference_line": reference[0]}
+        count += 1
+
+    return count, None
+
+
+def diff_events(new_file, reference_file, instruction_set=None, collapse=False):
+    """
+    Compare the records of two traces in order, reading both files as streams.
+
+    Args:
+        new_file (str): The trace of the run to check.
+        reference_file (str): The reference trace.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+        collapse (bool, optional): Skip repeated records of stalled instructions (see `iter_events`).
+
+    Returns:
+        tuple: (count, divergence) - the number of matching records and None, or a dict describing
+               the first divergence (record number, field, values and line numbers).
+    """
+    count = 0
+    records = zip_longest(iter_events(new_file, instruction_set, collapse), iter_events(reference_file, instruction_set, collapse))
+    for new, reference in records:
+        if new is None or reference is None:
+            ended = "new trace" if new is None else "reference"
+            return count, {"where": f"record {count}", "field": f"{ended} ended", "line": (reference or new)[0]}
+
+        difference = first_field_difference(new[1], reference[1])
+        if difference:
+            return count, {"where": f"record {count}", "field": difference[0], "new": difference[1], "reference": difference[2], "line": new[0], "reference_line": reference[0]}
+        count += 1
+
+    return count, None
+
+
+def diff_summaries(new_file, reference_file, instruction_set=None, skipped=()):
+    """
+    Compare the summary records of two logs.
+
+    Args:
+        new_file (str): The log of the run to check.
+        reference_file (str): The reference log.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+        skipped (tuple, optional): Summaries not to compare, e.g. the timing statistics of an ideal pipeline.
+
+    Returns:
+        tuple: (count, divergence) - the number of matching summaries and None, or a dict describing the
+               first summary that differs. Statistics reported by only one of the files (e.g. the Phase-3
+               cache counters) are not compared.
+    """
+    new, reference = read_summary(new_file, instruction_set), read_summary(reference_file, instruction_set)
+
+    if ("Processor halted" in new) != ("Processor halted" in reference):
+        return 0, {"where": "summary", "field": "Processor halted", "new": "Processor halted" in new, "reference": "Processor halted" in reference}
+
+    count = 0
+    for name in reference:
+        if name not in new or name in skipped:
+            continue
+        if not same_value(new[name], reference[name]):
+            return count, {"where": "summary", "field": name, "new": new[name], "reference": reference[name]}
+        count += 1
+    return count, None
+
+
+def has_records(path, iterator, instruction_set=None):
+    """
+    Check whether a file holds any records of a kind.
+
+    Args:
+        path (str): Path of the file.
+        iterator (function): `iter_cycles` or `iter_events`.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+
+    Returns:
+        bool: True if the file holds at least one record.
+    """
+    return next(iterator(path, instruction_set), None) is not None
+
+
+def report(name, kind, count, divergence):
+    """
+    Print the result of a comparison.
+
+    Args:
+        name (str): The name of the compared file, used in the printed messages.
+        kind (str): The kind of records compared ("Log", "Trace" or "Summary").
+        count (int): The number of matching records.
+        divergence (dict or None): The first divergence, or None if the files match.
+
+    Returns:
+        bool: True if the files match, False otherwise.
+    """
+    if divergence is None:
+        print(f"{name}: {kind} matches the reference ({count} records).")
+        return True
+
+    print(f"{name}: {kind} diverges at {divergence['where']} after {count} matching records.")
+    if "new" in divergence:
+        print(f"    {divergence['field']}: {divergence['new']} (new) vs {divergence['reference']} (reference)")
+    else:
+        print(f"    {divergence['field']}")
+    if "line" in divergence:
+        lines = f"line {divergence['line']}"
+        if "reference_line" in divergence:
+            lines += f" (new), line {divergence['reference_line']} (reference)"
+        print(f"    at {lines}")
+    return False
+
+
+def diff_files(new_file, log_reference, trace_reference, instruction_set=None, ideal_phase=None):
+    """
+    Compare the log and trace records of a file against references and print the first divergences.
+
+    Args:
+        new_file (str): The log, trace or aggregated outputs file of the run to check.
+        log_reference (str): The file holding the reference log records.
+        trace_reference (str): The file holding the reference trace records.
+        instruction_set (int, optional): The program to select from aggregated outputs.
+        ideal_phase (int, optional): The pipelined phase (2 or 3) if the reference is the ISA model, which
+                                     retires one instruction per cycle. Only the trace records and the
+                                     summaries that do not depend on timing are compared.
+
+    Returns:
+        bool or None: True if the file matches, False if it diverges, None if it holds no records of a
+                      kind the reference also holds.
+    """
+    name = os.path.basename(new_file)
+    matched = None
+
+    # Compare the log and trace records only if both files hold them, e.g. just the log of aggregated outputs.
+    if has_records(new_file, iter_cycles, instruction_set) and has_records(log_reference, iter_cycles, instruction_set):
+        matched = True
+        if ideal_phase is None:
+            matched = report(name, "Log", *diff_cycles(new_file, log_reference, instruction_set))
+        if matched:
+            skipped = TIMING_SUMMARIES.get(ideal_phase, ())
+            matched = report(name, "Summary", *diff_summaries(new_file, log_reference, instruction_set, skipped))
+
+    if has_records(new_file, iter_events, instruction_set) and has_records(trace_reference, iter_events, instruction_set):
+        divergence = diff_events(new_file, trace_reference, instruction_set, collapse=(ideal_phase == 3))
+        matched = report(name, "Trace", *divergence) and matched is not False
+
+    return matched
+
+
+def main():
+    """
+    Main function to compare a simulation log or trace against a golden file or the ISA model.
+    """
+    args = parse_arguments()
+
+    try:
+        if args.model:
+            # Run the program on the ISA model and compare against its log and trace.
+            with tempfile.TemporaryDirectory() as outdir:
+                _, halted = run_model(args.model, outdir, args.phase, default_data_file(args.phase), MAX_CYCLES)
+                if not halted:
+                    print(f"{os.path.basename(args.model)}: ERROR: More than {MAX_CYCLES} cycles of simulation on the ISA model.")
+                    sys.exit(1)
+                matched = diff_files(
+                    args.new, os.path.join(outdir, "verilogsim.log"), os.path.join(outdir, "verilogsim.trace"),
+                    args.set, ideal_phase=(args.phase if args.phase != 1 else None)
+                )
+        else:
+            matched = diff_files(args.new, args.reference, args.reference, args.set)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"\n===== Error assembling file {os.path.basename(args.model)} =====")
+        print(str(e).replace("\n", " ").strip())
+        sys.exit(1)
+
+    if matched is None:
+        print(f"{os.path.basename(args.new)}: No SIMLOG or trace records to compare with the reference.")
+        sys.exit(1)
+    if not matched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+import time
+
+# Seconds the stub spends "elaborating" the design, to stand in for the cost of loading it.
+ELABORATION_TIME = float(os.environ.get("VSIM_STUB_ELABORATION", 0))
+
+# Image the processor testbenches load into instruction memory.
+IMAGE_FILE = os.path.join("tests", "loadfile_all.img")
+
+# vsim options followed by a value, which is not the design unit.
+VALUE_OPTIONS = {"-do", "-wlf", "-logfile", "-onfinish", "-t", "-L", "-Lf", "-voptargs", "-view"}
+
+
+def parse_command_line(argv):
+    """
+    Parse the vsim command line the stub is started with.
+
+    Args:
+        argv (list): The arguments, e.g. `-c -onfinish stop -L design work.cpu_tb`.
+
+    Returns:
+        tuple: The design unit (or None), the `-do` script (or None) and the `-logfile` path (or None).
+    """
+    unit, script, log_file = None, None, None
+    arguments = iter(argv)
+    for argument in arguments:
+        if argument in VALUE_OPTIONS:
+            value = next(arguments, None)
+            if argument == "-do":
+                script = value
+            elif argument == "-logfile":
+                log_file = value
+        elif not argument.startswith("-"):
+            unit = argument
+    return unit, script, log_file
+
+
+def split_commands(script):
+    """
+    Split a line of Tcl into its commands, keeping semicolons inside braces.
+
+    Args:
+        script (str): The line, e.g. `cd {/tmp/a}; restart -f; run -all;`.
+
+    Returns:
+        list: The commands, without surrounding whitespace.
+    """
+    commands, current, depth = [], "", 0
+    for char in script:
+        depth += {"{": 1, "}": -1}.get(char, 0)
+        if char == ";" and depth == 0:
+            commands.append(current.strip())
+            current = ""
+        else:
+            current += char
+    commands.append(current.strip())
+    return [command for command in commands if command]
+
+
+def simulate(unit, emit):
+    """
+    Stand in for a simulation run: report the image loaded and write the SIMLOG statistics.
+
+    Args:
+        unit (str): The design unit being simulated.
+        emit (callable): Prints a line of the transcript.
+    """
+    words = 0
+    if os.path.exists(IMAGE_FILE):
+        with open(IMAGE_FILE, "r") as image_fh:
+            words = sum(1 for line in image_fh if line.strip() and not line.startswith("@"))
+        emit(f"# Loaded {words} words from {IMAGE_FILE}.")
+
+    if os.path.isdir("outputs"):
+        with open(os.path.join("outputs", "verilogsim.log"), "w") as sim_log_fh:
+            sim_log_fh.write(f"SIMLOG:: sim_cycles {words}\nSIMLOG:: inst_count {words}\n")
+
+    emit("# YAHOO!! All tests passed.")
+    emit(f"# ** Note: $finish    : {unit} (stub)")
+    emit(f"#    Time: {words * 10} ns  Iteration: 0  Instance: /{unit.split('.')[-1] if unit else 'top'}")
+
+
+def run_commands(line, unit, emit):
+    """
+    Run the commands of a line of Tcl the way a `vsim -c` session would, as far as the stub can.
+
+    As in vsim, `cd` fails while a design is loaded, and a failing command drops the rest of the line.
+
+    Args:
+        line (str): The line of Tcl.
+        unit (str): The design unit loaded.
+        emit (callable): Prints a line of the transcript.
+
+    Returns:
+        bool: False once `quit` was run, True otherwise.
+    """
+    for command in split_commands(line):
+        name, _, argument = command.partition(" ")
+        if name == "quit":
+            return False
+        elif name == "cd":
+            if unit:
+                emit("# ** Error: (vsim_stub) cd: Cannot change directory while a design is loaded.")
+                break
+            os.chdir(argument.strip().strip("{}"))
+        elif name == "vlib":
+            os.makedirs(argument.strip(), exist_ok=True)
+        elif name == "restart":
+            emit("# Restarting the simulation.")
+        elif name == "run":
+            simulate(unit, emit)
+        elif name == "echo":
+            upper = re.fullmatch(r'\[string toupper (\S+)\]', argument.strip())
+            emit(f"# {upper.group(1).upper() if upper else argument.strip()}")
+        else:
+            emit(f"# (vsim_stub) Ignored: {command}")
+    return True
+
+
+def main():
+    """
+    Main function standing in for `vsim -c`: load the design once, then run the `-do` script and the commands on stdin.
+    """
+    unit, script, log_file = parse_command_line(sys.argv[1:])
+    log_fh = open(log_file, "w") if log_file else None
+
+    def emit(line):
+        print(line, flush=True)
+        if log_fh:
+            log_fh.write(f"{line}\n")
+
+    emit(f"# vsim_stub {' '.join(sys.argv[1:])}")
+    if unit:
+        emit(f"# Loading {unit}")
+        time.sleep(ELABORATION_TIME)
+        emit(f"# Elaborated {unit} (pid {os.getpid()}).")
+
+    running = run_commands(script, unit, emit) if script else True
+    while running:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        running = run_commands(line, unit, emit)
+
+    if log_fh:
+        log_fh.close()
+
+
+if __name__ == "__main__":
+    main()